@@ -52,6 +52,8 @@ if __name__ == "__main__":
         help='total epoch(default: 30)')
     parser.add_argument('--iter', type=int, default=100,
         help='total iterations per epoch(default: 100)')
+    parser.add_argument('--processes', type=int, default=1,
+        help='number of epochs run concurrently(default: 1)')
     args = parser.parse_args()
     assert args.mode in ['line', 'tree']
 
@@ -64,7 +66,8 @@ if __name__ == "__main__":
         local_search = MyLocalSearch(program)
         local_search.operators = [StmtReplacement, StmtInsertion, StmtDeletion]
 
-    result = local_search.run(warmup_reps=5, epoch=args.epoch, max_iter=args.iter, timeout=15)
+    result = local_search.run(warmup_reps=5, epoch=args.epoch, max_iter=args.iter, timeout=15,
+                              processes=args.processes)
     print("======================RESULT======================")
     for epoch in range(len(result)):
         print("Epoch {}".format(epoch))
@@ -31,7 +31,7 @@ class MyTreeProgram(TreeProgram):
 
 class MyTabuSearch(LocalSearch):
     def setup(self):
-        self.tabu = []
+        self.tabu = set()
 
     def get_neighbour(self, patch):
         while True:
@@ -41,8 +41,8 @@ class MyTabuSearch(LocalSearch):
             else:
                 edit_operator = random.choice(self.operators)
                 temp_patch.add(edit_operator.create(self.program, method="weighted"))
-            if not any(item == temp_patch for item in self.tabu):
-                self.tabu.append(temp_patch)
+            if temp_patch not in self.tabu:
+                self.tabu.add(temp_patch)
                 break
         return temp_patch
 
@@ -62,6 +62,10 @@ if __name__ == "__main__":
         help='total epoch(default: 30)')
     parser.add_argument('--iter', type=int, default=10000,
         help='total iterations per epoch(default: 10000)')
+    parser.add_argument('--prioritise', action='store_true',
+        help='run the recently failed tests first')
+    parser.add_argument('--fail_fast', action='store_true',
+        help='stop each test run at the first failure (pass/fail fitness)')
     args = parser.parse_args()
     assert args.mode in ['line', 'tree']
 
@@ -82,6 +86,9 @@ if __name__ == "__main__":
         tabu_search = MyTabuSearch(program)
         tabu_search.operators = [StmtReplacement, StmtInsertion, StmtDeletion]
 
+    program.prioritise_tests = args.prioritise
+    program.fail_fast = args.fail_fast
+
     result = tabu_search.run(warmup_reps=1, epoch=args.epoch, max_iter=args.iter)
     print("======================RESULT======================")
     print(result)
@@ -9,7 +9,7 @@ from pyggi.line import LineProgram
 from pyggi.line import LineReplacement, LineInsertion, LineDeletion
 from pyggi.tree import TreeProgram
 from pyggi.tree import StmtReplacement, StmtInsertion, StmtDeletion
-from pyggi.algorithms import LocalSearch
+from pyggi.algorithms import LocalSearch, UCBSelector, AdaptivePursuitSelector
 
 class MyProgram(AbstractProgram):
     def compute_fitness(self, result, return_code, stdout, stderr, elapsed_time):
@@ -32,7 +32,7 @@ class MyTreeProgram(TreeProgram, MyProgram):
 
 class MyTabuSearch(LocalSearch):
     def setup(self):
-        self.tabu = []
+        self.tabu = set()
 
     def get_neighbour(self, patch):
         while True:
@@ -40,10 +40,10 @@ class MyTabuSearch(LocalSearch):
             if len(temp_patch) > 0 and random.random() < 0.5:
                 temp_patch.remove(random.randrange(0, len(temp_patch)))
             else:
-                edit_operator = random.choice(self.operators)
+                edit_operator = self.select_operator()
                 temp_patch.add(edit_operator.create(self.program, method="weighted"))
-            if not any(item == temp_patch for item in self.tabu):
-                self.tabu.append(temp_patch)
+            if temp_patch not in self.tabu:
+                self.tabu.add(temp_patch)
                 break
         return temp_patch
 
@@ -61,8 +61,15 @@ if __name__ == "__main__":
         help='total epoch(default: 30)')
     parser.add_argument('--iter', type=int, default=100,
         help='total iterations per epoch(default: 100)')
+    parser.add_argument('--prioritise', action='store_true',
+        help='run the recently failed tests first')
+    parser.add_argument('--fail_fast', action='store_true',
+        help='stop each test run at the first failure (pass/fail fitness)')
+    parser.add_argument('--operator_selection', type=str, default='uniform',
+        help='choice of the edit operators: uniform, ucb or pursuit(default: uniform)')
     args = parser.parse_args()
     assert args.mode in ['line', 'tree']
+    assert args.operator_selection in ['uniform', 'ucb', 'pursuit']
 
     if args.mode == 'line':
         program = MyLineProgram(args.project_path)
@@ -73,7 +80,16 @@ if __name__ == "__main__":
         tabu_search = MyTabuSearch(program)
         tabu_search.operators = [StmtReplacement, StmtInsertion, StmtDeletion]
 
+    program.prioritise_tests = args.prioritise
+    program.fail_fast = args.fail_fast
+    if args.operator_selection == 'ucb':
+        tabu_search.operator_selector = UCBSelector(tabu_search.operators)
+    elif args.operator_selection == 'pursuit':
+        tabu_search.operator_selector = AdaptivePursuitSelector(tabu_search.operators)
+
     result = tabu_search.run(warmup_reps=1, epoch=args.epoch, max_iter=args.iter, timeout=10)
     print("======================RESULT======================")
     print(result)
+    if tabu_search.operator_selector is not None:
+        print(tabu_search.operator_selector)
     program.remove_tmp_variant()
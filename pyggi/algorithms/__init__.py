@@ -1 +1,12 @@
 from .local_search import LocalSearch
+from .delta_debugging import DeltaDebugging
+from .batch_local_search import BatchLocalSearch
+from .genetic_programming import GeneticProgramming
+from .steady_state import SteadyStateEvolution
+from .nsga2 import NSGA2
+from .simulated_annealing import SimulatedAnnealing, ExponentialCooling, LinearCooling
+from .late_acceptance import LateAcceptanceHillClimbing
+from .island_model import IslandModel
+from .operator_selection import OperatorSelector, UniformSelector, UCBSelector, AdaptivePursuitSelector
+from .edit_scan import EditScan, EditEffectTable, iter_single_edits
+from .surrogate import SurrogateFilter
@@ -0,0 +1,70 @@
+import os
+import concurrent.futures
+from .local_search import LocalSearch
+
+class BatchLocalSearch(LocalSearch):
+    """
+    Batch-neighbourhood Local Search (Abstract Class)
+
+    At each iteration, :py:attr:`batch_size` neighbours of the visited patch
+    are drawn with :py:meth:`draw_neighbour` and evaluated concurrently
+    (see :py:meth:`.AbstractProgram.set_workers`).
+    The visited patch then moves according to :py:attr:`acceptance`:
+
+    * ``'best'``: to the best neighbour of the batch
+    * ``'first'``: to the first improving neighbour to complete,
+      the evaluations not started yet being cancelled
+
+    All children classes need to override
+
+    * :py:meth:`get_neighbour`
+
+    .. hint::
+        Example of BatchLocalSearch usage. ::
+
+            class MyBatchLocalSearch(BatchLocalSearch):
+                def get_neighbour(self, patch):
+                    ...
+
+            local_search = MyBatchLocalSearch(program, batch_size=8, acceptance='first')
+            results = local_search.run(warmup_reps=5, epoch=3, max_iter=100, timeout=15)
+    """
+    ACCEPTANCES = ('best', 'first')
+
+    def __init__(self, program, batch_size=None, acceptance='best'):
+        """
+        :param program: The Program instance to optimize.
+        :type program: :py:class:`.Program`
+        :param batch_size: The number of neighbours per iteration,
+          by default the number of CPUs
+        :type batch_size: None or int
+        :param str acceptance: ``'best'`` or ``'first'``
+        """
+        assert acceptance in self.ACCEPTANCES
+        self.batch_size = batch_size or os.cpu_count() or 1
+        self.acceptance = acceptance
+        super().__init__(program)
+
+    def explore(self, patch, fitness, timeout=15):
+        """
+        :return: The evaluated neighbours and their results. With the ``'best'``
+          acceptance, all the neighbours of the batch, in the order they were drawn.
+          With the ``'first'`` acceptance, the neighbours in the order of completion
+          until the first improving one; the remaining evaluations are cancelled
+          (or ignored when they are already running).
+        :rtype: list(tuple(:py:class:`.Patch`, :py:class:`.RunResult`))
+        """
+        neighbours = [self.draw_neighbour(patch) for _ in range(self.batch_size)]
+        futures = {self.program.submit_patch(neighbour, timeout): neighbour
+                   for neighbour in neighbours}
+        if self.acceptance == 'best':
+            return [(neighbour, future.result()) for future, neighbour in futures.items()]
+        explored = []
+        for future in concurrent.futures.as_completed(futures):
+            run = future.result()
+            explored.append((futures[future], run))
+            if run.status == 'SUCCESS' and self.is_better_than_the_best(run.fitness, fitness):
+                for pending in futures:
+                    pending.cancel()
+                break
+        return explored
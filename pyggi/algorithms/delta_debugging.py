@@ -0,0 +1,109 @@
+import time
+from ..base import Patch, Algorithm
+
+class DeltaDebugging(Algorithm):
+    """
+    Delta Debugging (ddmin) based patch minimisation
+
+    It removes the edits of a patch which are not needed to preserve its fitness,
+    whatever the kind of the edits. At each step, the candidate subsets of the
+    edits and their complements are evaluated concurrently
+    (see :py:meth:`.AbstractProgram.set_workers`) with the whole test suite,
+    so that the fitness values of the reduced patches are comparable,
+    and the results are cached.
+
+    .. hint::
+        Example of DeltaDebugging usage. ::
+
+            delta_debugging = DeltaDebugging(program)
+            result = delta_debugging.run(best_patch, fitness=best_fitness, timeout=15)
+            print(result['Patch'], result['Fitness'])
+            print(result['diff'])
+    """
+    def setup(self):
+        self.cache = dict()
+        self.fitness_eval = 0
+
+    def is_acceptable(self, fitness, reference):
+        """
+        :param fitness: The fitness value of a reduced patch
+        :param reference: The fitness value to preserve
+        :return: If the reduced patch is not worse than the reference (lower is better)
+        :rtype: bool
+        """
+        return fitness <= reference
+
+    def evaluate(self, patches, timeout=15):
+        """
+        Evaluate the patches which are not in the cache concurrently,
+        with the whole test suite.
+
+        :param patches: The patches to evaluate
+        :type patches: list(:py:class:`.Patch`)
+        :param float timeout: The time limit of test run (unit: seconds)
+        :return: The results of the patches, in the same order
+        :rtype: list(:py:class:`.RunResult`)
+        """
+        todo = [patch for patch in dict.fromkeys(patches) if patch not in self.cache]
+        for patch, run in zip(todo, self.program.evaluate_patches(todo, timeout=timeout, select_tests=False)):
+            self.cache[patch] = run
+        self.fitness_eval += len(todo)
+        return [self.cache[patch] for patch in patches]
+
+    def make_patch(self, edits):
+        patch = Patch(self.program)
+        patch.edit_list = tuple(edits)
+        return patch
+
+    def run(self, patch, fitness=None, timeout=15, cache=None):
+        """
+        :param patch: The patch to minimise
+        :type patch: :py:class:`.Patch`
+        :param fitness: The fitness value to preserve, by default the fitness of *patch*
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param cache: The already known results, which is updated with the new ones
+        :type cache: None or dict(:py:class:`.Patch`, :py:class:`.RunResult`)
+        :return: The result of the minimisation(Patch, Fitness, FitnessEval, Time, diff)
+        :rtype: dict(str, )
+        """
+        if cache is not None:
+            self.cache = cache
+        self.fitness_eval = 0
+        start = time.time()
+        if fitness is None:
+            run = self.evaluate([patch], timeout)[0]
+            fitness = run.fitness if run.status == 'SUCCESS' else None
+
+        def passes(run):
+            return run.status == 'SUCCESS' and self.is_acceptable(run.fitness, fitness)
+
+        edits = list(patch.edit_list)
+        if fitness is not None and edits:
+            if passes(self.evaluate([self.make_patch([])], timeout)[0]):
+                edits = []
+            n = 2
+            while len(edits) >= 2:
+                bounds = [len(edits) * i // n for i in range(n + 1)]
+                subsets = [edits[bounds[i]:bounds[i+1]] for i in range(n)]
+                complements = [edits[:bounds[i]] + edits[bounds[i+1]:] for i in range(n)] if n > 2 else []
+                candidates = subsets + complements
+                runs = self.evaluate(list(map(self.make_patch, candidates)), timeout)
+                reduced = next((i for i, run in enumerate(runs) if passes(run)), None)
+                if reduced is None:
+                    if n >= len(edits):
+                        break
+                    n = min(2 * n, len(edits))
+                else:
+                    edits = candidates[reduced]
+                    n = 2 if reduced < len(subsets) else max(n - 1, 2)
+
+        reduced_patch = self.make_patch(edits)
+        if len(reduced_patch) < len(patch):
+            fitness = self.cache[reduced_patch].fitness
+        return {
+            'Patch': reduced_patch,
+            'Fitness': fitness,
+            'FitnessEval': self.fitness_eval,
+            'Time': time.time() - start,
+            'diff': self.program.diff(reduced_patch)
+        }
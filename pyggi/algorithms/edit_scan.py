@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import random
+import itertools
+from ..base import Patch, Algorithm
+
+def iter_single_edits(program, operators, target_file=None, sample=None, seed=None):
+    """
+    Lazily generate the single edits of the operators (see :py:meth:`.AbstractEdit.enumerate`).
+
+    :param program: The program
+    :type program: :py:class:`.Program`
+    :param operators: The edit operators
+    :type operators: list(:py:class:`.AbstractEdit`)
+    :param str target_file: Only generate the edits targeting this file
+    :param sample: If given, each edit is kept with this probability, so that every
+      operator and modification point is represented proportionally
+    :type sample: None or float
+    :param seed: The seed of the sampling
+    :return: The edits
+    :rtype: generator(:py:class:`.AbstractEdit`)
+    """
+    rng = random.Random(seed)
+    for operator in operators:
+        for edit in operator.enumerate(program, target_file=target_file):
+            if sample is None or rng.random() < sample:
+                yield edit
+
+class EditEffectTable(object):
+    """
+    The results of the single-edit patches, relative to the original program
+    (see :py:class:`EditScan`), to bias or prune the search.
+
+    .. hint::
+        Example of pruning the known invalid edits in a search. ::
+
+            table = EditEffectTable.load('edits.json', program)
+            edit = LineDeletion.create(program)
+            if not table.is_pruned(edit):
+                patch.add(edit)
+    """
+    def __init__(self, original_fitness=None):
+        """
+        :param original_fitness: The fitness value of the original program
+        """
+        self.original_fitness = original_fitness
+        self.entries = dict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, edit):
+        return edit in self.entries
+
+    def add(self, edit, run):
+        """
+        :param edit: The edit
+        :type edit: :py:class:`.AbstractEdit`
+        :param run: The result of the patch made of the edit only
+        :type run: :py:class:`.RunResult`
+        :return: None
+        """
+        self.entries[edit] = (run.status, run.fitness)
+
+    def get(self, edit):
+        """
+        :return: The status and fitness value of the edit, or None if it is unknown
+        :rtype: None or tuple(str, )
+        """
+        return self.entries.get(edit)
+
+    def effect(self, edit):
+        """
+        :return: The difference between the fitness value of the edit and
+          the original one (negative if it improves), or None if it is unknown,
+          invalid, or the fitness values are not numbers
+        :rtype: None or float
+        """
+        entry = self.entries.get(edit)
+        if entry is None or entry[0] != 'SUCCESS':
+            return None
+        if not isinstance(entry[1], (int, float)) or not isinstance(self.original_fitness, (int, float)):
+            return None
+        return entry[1] - self.original_fitness
+
+    def is_pruned(self, edit):
+        """
+        :return: If the edit alone is known to give an invalid program
+        :rtype: bool
+        """
+        entry = self.entries.get(edit)
+        return entry is not None and entry[0] != 'SUCCESS'
+
+    def safe_edits(self):
+        """
+        :return: The edits which are valid and not worse than the original program
+        :rtype: list(:py:class:`.AbstractEdit`)
+        """
+        return [edit for edit in self.entries
+                if self.effect(edit) is not None and self.effect(edit) <= 0]
+
+    def improving_edits(self):
+        """
+        :return: The edits improving the original program, from the best one
+        :rtype: list(:py:class:`.AbstractEdit`)
+        """
+        return sorted((edit for edit in self.entries
+                       if self.effect(edit) is not None and self.effect(edit) < 0), key=self.effect)
+
+    def save(self, path, program):
+        """
+        Write the table atomically in JSON, the edits being encoded with :py:meth:`.Patch.encode`.
+
+        :param str path: The file path
+        :param program: The program of the edits
+        :type program: :py:class:`.Program`
+        :return: None
+        """
+        patch = Patch(program)
+        patch.edit_list = tuple(self.entries)
+        data = {
+            'original_fitness': self.original_fitness,
+            'edits': patch.encode(),
+            'results': [list(self.entries[edit]) for edit in patch.edit_list]
+        }
+        with open(path + '.tmp', 'w') as table_file:
+            json.dump(data, table_file, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path, program):
+        """
+        :param str path: The file path, see :py:meth:`save`
+        :param program: The program of the edits
+        :type program: :py:class:`.Program`
+        :return: The table
+        :rtype: :py:class:`EditEffectTable`
+        """
+        with open(path) as table_file:
+            data = json.load(table_file)
+        table = cls(data['original_fitness'])
+        for edit, (status, fitness) in zip(Patch.decode(program, data['edits']).edit_list,
+                                           data['results']):
+            table.entries[edit] = (status, tuple(fitness) if isinstance(fitness, list) else fitness)
+        return table
+
+class EditScan(Algorithm):
+    """
+    Evaluate the single-edit patches of a program concurrently
+    (see :py:meth:`.AbstractProgram.evaluate_patches`) and record their
+    effects in an :py:class:`EditEffectTable`.
+
+    .. hint::
+        Example of EditScan usage. ::
+
+            scan = EditScan(program)
+            table = scan.run(iter_single_edits(program, [LineDeletion, LineReplacement], sample=0.1),
+                             path='edits.json')
+            print(table.improving_edits())
+    """
+    def run(self, edits, timeout=15, batch_size=64, table=None, path=None, verbose=True):
+        """
+        :param edits: The edits to evaluate, e.g. :py:func:`iter_single_edits`
+        :type edits: iterable(:py:class:`.AbstractEdit`)
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param int batch_size: The number of patches evaluated (and saved) at once
+        :param table: The table to complete, whose edits are not evaluated again,
+          by default a new table (or the one saved in *path* if it exists)
+        :type table: None or :py:class:`EditEffectTable`
+        :param path: The file where the table is saved after each batch
+        :type path: None or str
+        :return: The table of the effects of the edits
+        :rtype: :py:class:`EditEffectTable`
+        """
+        if table is None and path is not None and os.path.exists(path):
+            table = EditEffectTable.load(path, self.program)
+        if table is None:
+            run = self.program.evaluate_patch(Patch(self.program), timeout=timeout, use_cache=False)
+            table = EditEffectTable(run.fitness if run.status == 'SUCCESS' else None)
+        if verbose:
+            self.program.logger.info("Edit\tStatus\tFitness")
+
+        start = time.time()
+        edits = (edit for edit in edits if edit not in table)
+        while True:
+            batch = list(itertools.islice(edits, batch_size))
+            if not batch:
+                break
+            patches = []
+            for edit in batch:
+                patch = Patch(self.program)
+                patch.add(edit)
+                patches.append(patch)
+            for edit, run in zip(batch, self.program.evaluate_patches(patches, timeout=timeout)):
+                table.add(edit, run)
+                if verbose:
+                    self.program.logger.info("{}\t{}\t{}".format(edit, run.status, run.fitness))
+            if path is not None:
+                table.save(path, self.program)
+        if verbose:
+            self.program.logger.info("{} edits scanned in {:.1f}s".format(len(table), time.time() - start))
+        return table
@@ -0,0 +1,283 @@
+import time
+import random
+import functools
+from ..base import Patch, Algorithm
+from ..utils import summarise_timings
+
+class GeneticProgramming(Algorithm):
+    """
+    Genetic Programming over patches
+
+    Each generation, the offspring are bred from the current population by
+    tournament selection, crossover of the edit lists (see :py:meth:`crossover`)
+    and mutation (see :py:meth:`mutate`), then evaluated as one batch with
+    :py:meth:`.AbstractProgram.evaluate_patches`, so that their test runs
+    are concurrent (see :py:meth:`.AbstractProgram.set_workers`).
+    The best individuals are kept in the next population (elitism), and
+    duplicated offspring or offspring already evaluated are not re-evaluated.
+
+    .. hint::
+        Example of GeneticProgramming usage. ::
+
+            class MyGeneticProgramming(GeneticProgramming):
+                def stopping_criterion(self, generation, fitness):
+                    return fitness == 0
+
+            gp = MyGeneticProgramming(program, [LineReplacement, LineInsertion, LineDeletion])
+            results = gp.run(warmup_reps=1, epoch=3, generations=20, pop_size=40, timeout=15)
+    """
+    def __init__(self, program, operators):
+        """
+        :param program: The Program instance to optimize.
+        :type program: :py:class:`.Program`
+        :param operators: The edit classes used by :py:meth:`mutate`
+        :type operators: list(:py:class:`.AbstractEdit`)
+        """
+        self.operators = operators
+        self.random = random
+        self.operator_selector = None
+        self.mutations = dict()
+        super().__init__(program)
+
+    def is_better(self, fitness, other_fitness):
+        """
+        :param fitness: The fitness value of a patch, None if it is invalid
+        :param other_fitness: The fitness value of another patch, None if it is invalid
+        :return: If the fitness is strictly better than the other one (lower is better)
+        :rtype: bool
+        """
+        if fitness is None:
+            return False
+        if other_fitness is None:
+            return True
+        return fitness < other_fitness
+
+    def stopping_criterion(self, generation, fitness):
+        """
+        :param int generation: The current generation number in the epoch
+        :param fitness: The best fitness value of the generation
+        :return: If the satisfying patch is found, return True to stop
+          the current epoch. False otherwise.
+        :rtype: bool
+        """
+        return False
+
+    def select(self, population, fitness, tournament_size=3):
+        """
+        :param population: The current population
+        :type population: list(:py:class:`.Patch`)
+        :param fitness: The fitness value of each patch of the population
+        :type fitness: dict(:py:class:`.Patch`, )
+        :param int tournament_size: The number of competing patches
+        :return: The winner of a tournament between randomly chosen patches
+        :rtype: :py:class:`.Patch`
+        """
+        winner = None
+        for patch in self.random.sample(population, min(tournament_size, len(population))):
+            if winner is None or self.is_better(fitness[patch], fitness[winner]):
+                winner = patch
+        return winner
+
+    def crossover(self, patch, other, method='one_point'):
+        """
+        :param patch: The first parent
+        :type patch: :py:class:`.Patch`
+        :param other: The second parent
+        :type other: :py:class:`.Patch`
+        :param str method: ``'one_point'`` concatenates a prefix of the edits of
+          the first parent and a suffix of the edits of the second one, and
+          ``'uniform'`` keeps each edit of both parents with probability 0.5
+        :return: The child patch
+        :rtype: :py:class:`.Patch`
+        """
+        child = Patch(self.program)
+        if method == 'one_point':
+            i = self.random.randint(0, len(patch))
+            j = self.random.randint(0, len(other))
+            child.edit_list = patch.edit_list[:i] + other.edit_list[j:]
+        elif method == 'uniform':
+            child.edit_list = tuple(edit for edit in patch.edit_list + other.edit_list
+                                    if self.random.random() < 0.5)
+        else:
+            raise ValueError('Unknown crossover method: {}'.format(method))
+        return child
+
+    def mutate(self, patch):
+        """
+        :param patch: The patch to mutate, which is not modified
+        :type patch: :py:class:`.Patch`
+        :return: A copy of the patch with either one edit removed or
+          one new edit created with a random operator of :py:attr:`operators`,
+          or chosen by :py:attr:`operator_selector` if any (see :py:class:`.OperatorSelector`)
+        :rtype: :py:class:`.Patch`
+        """
+        mutant = patch.clone()
+        if len(mutant) > 0 and self.random.random() < 0.5:
+            mutant.remove(self.random.randrange(0, len(mutant)))
+        elif self.operator_selector is not None:
+            operator = self.operator_selector.select(self.operators)
+            mutant.add(operator.create(self.program))
+            self.mutations[mutant] = operator
+        else:
+            mutant.add(self.random.choice(self.operators).create(self.program))
+        return mutant
+
+    def discard(self, child, fitness):
+        """
+        Forget a child which is not evaluated (e.g., a duplicate), so that the operator
+        of its last mutation is no longer pending in :py:attr:`operator_selector`.
+
+        :param child: The child
+        :type child: :py:class:`.Patch`
+        :param fitness: The fitness value of each evaluated patch
+        :type fitness: dict(:py:class:`.Patch`, )
+        :return: None
+        """
+        if self.operator_selector is None or child not in self.mutations:
+            return
+        # The mutation of a child already evaluated is only recorded by this draw,
+        # whereas a child waiting for its evaluation keeps its own
+        if child in fitness:
+            self.operator_selector.cancel(self.mutations.pop(child))
+        else:
+            self.operator_selector.cancel(self.mutations[child])
+
+    def breed(self, population, fitness, tournament_size=3, crossover_rate=0.5,
+              mutation_rate=0.5, crossover='one_point'):
+        """
+        :return: A child of the population, see :py:meth:`run` for the parameters
+        :rtype: :py:class:`.Patch`
+        """
+        parent = self.select(population, fitness, tournament_size)
+        if self.random.random() < crossover_rate:
+            child = self.crossover(parent, self.select(population, fitness, tournament_size),
+                                   method=crossover)
+            if self.random.random() < mutation_rate:
+                child = self.mutate(child)
+        else:
+            child = self.mutate(parent)
+        return child
+
+    def rank(self, patches, fitness):
+        """
+        :param patches: The patches to rank
+        :type patches: list(:py:class:`.Patch`)
+        :param fitness: The fitness value of each patch
+        :type fitness: dict(:py:class:`.Patch`, )
+        :return: The patches sorted from the best to the worst (see :py:meth:`is_better`)
+        :rtype: list(:py:class:`.Patch`)
+        """
+        def compare(patch, other):
+            if self.is_better(fitness[patch], fitness[other]):
+                return -1
+            return 1 if self.is_better(fitness[other], fitness[patch]) else 0
+        return sorted(patches, key=functools.cmp_to_key(compare))
+
+    def run(self, warmup_reps=1, epoch=5, generations=10, pop_size=20, timeout=15,
+            tournament_size=3, crossover_rate=0.5, mutation_rate=0.5,
+            crossover='one_point', elitism=1, verbose=True):
+        """
+        :param int warmup_reps: The number of warming-up test runs to get
+          the base fitness value.
+        :param int epoch: The total epoch
+        :param int generations: The maximum generations per epoch
+        :param int pop_size: The size of the population
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param int tournament_size: The number of competing patches in the selection
+        :param float crossover_rate: The probability of breeding a child by crossover
+        :param float mutation_rate: The probability of mutating a child
+          (a child which was not bred by crossover is always mutated)
+        :param str crossover: The crossover method, see :py:meth:`crossover`
+        :param int elitism: The number of best patches kept in the next population
+        :return: The result of searching(Time, Success, FitnessEval, InvalidPatch,
+          CachedPatch, BestPatch, BestFitness, diff, Timings),
+          Timings summarising the durations of the phases of the evaluations
+          (see :py:func:`.summarise_timings`)
+        :rtype: list(dict(str, ))
+        """
+        if verbose:
+            self.program.logger.info(self.program.logger.log_file_path)
+
+        warmup = list()
+        empty_patch = Patch(self.program)
+        for i in range(warmup_reps):
+            result = self.program.evaluate_patch(empty_patch, timeout=timeout, use_cache=False)
+            if result.status == 'SUCCESS':
+                warmup.append(result.fitness)
+        original_fitness = self.mean_fitness(warmup)
+
+        if verbose:
+            self.program.logger.info(
+                "The fitness value of original program: {}".format(original_fitness))
+            self.program.logger.info("Epoch\tGen\tStatus\tFitness\tPatch")
+
+        result = []
+        for cur_epoch in range(1, epoch + 1):
+            self.setup()
+            cur_result = {
+                'BestPatch': None,
+                'Success': False,
+                'FitnessEval': 0,
+                'InvalidPatch': 0,
+                'CachedPatch': 0,
+                'diff': None
+            }
+            best_patch = empty_patch
+            best_fitness = original_fitness
+            fitness = {empty_patch: original_fitness}
+            population = [empty_patch]
+            timings = []
+
+            start = time.time()
+            for cur_gen in range(1, generations + 1):
+                self.mutations.clear()
+                if self.operator_selector is not None:
+                    self.operator_selector.reset_pending()
+                offspring = []
+                for _ in range(pop_size * 10):
+                    if len(offspring) == pop_size:
+                        break
+                    child = self.breed(population, fitness, tournament_size,
+                                       crossover_rate, mutation_rate, crossover)
+                    if child not in fitness and child not in offspring:
+                        offspring.append(child)
+                    else:
+                        self.discard(child, fitness)
+
+                runs = self.program.evaluate_patches(offspring, timeout=timeout)
+                for patch, run in zip(offspring, runs):
+                    cur_result['FitnessEval'] += 1
+                    timings.append(run.timings)
+                    if run.cached:
+                        cur_result['CachedPatch'] += 1
+                    if run.status != 'SUCCESS':
+                        cur_result['InvalidPatch'] += 1
+                    fitness[patch] = run.fitness if run.status == 'SUCCESS' else None
+                    update_best = self.is_better(fitness[patch], best_fitness)
+                    if self.operator_selector is not None:
+                        self.operator_selector.update(self.mutations.pop(patch, None), run, update_best)
+                    if update_best:
+                        best_fitness, best_patch = run.fitness, patch
+                    if verbose:
+                        self.program.logger.info("{}\t{}\t{}\t{}{}\t{}".format(
+                            cur_epoch, cur_gen, run.status, '*' if update_best else '',
+                            run.fitness, patch))
+
+                ranked = self.rank(population + offspring, fitness)
+                elites = ranked[:elitism]
+                population = list(dict.fromkeys(elites + offspring + ranked[elitism:]))[:pop_size]
+
+                if best_fitness is not None and self.stopping_criterion(cur_gen, best_fitness):
+                    cur_result['Success'] = True
+                    break
+
+            cur_result['Time'] = time.time() - start
+            cur_result['Timings'] = summarise_timings(timings)
+
+            if best_patch:
+                cur_result['BestPatch'] = best_patch
+                cur_result['BestFitness'] = best_fitness
+                cur_result['diff'] = self.program.diff(best_patch)
+
+            result.append(cur_result)
+        return result
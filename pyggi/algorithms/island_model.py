@@ -0,0 +1,201 @@
+import queue
+import random
+import time
+import traceback
+import multiprocessing
+from ..base import Patch, Algorithm
+from ..base.patch import encode_patches, decode_patches
+from ..utils import get_result
+
+class Migration(object):
+    """
+    The exchange of the best patches between an island and its neighbours,
+    every *interval* iterations (see :py:attr:`.LocalSearch.migration`).
+    The patches are sent encoded (see :py:meth:`.Patch.encode`) with their fitness values.
+    """
+    def __init__(self, program, inbox, outboxes, interval=10):
+        """
+        :param program: The program of the island, to decode the received patches
+        :type program: :py:class:`.Program`
+        :param inbox: The queue of the patches sent to the island
+        :type inbox: :py:class:`multiprocessing.Queue`
+        :param outboxes: The queues of the neighbours of the island
+        :type outboxes: list(:py:class:`multiprocessing.Queue`)
+        :param int interval: The number of iterations between two exchanges
+        """
+        self.program = program
+        self.inbox = inbox
+        self.outboxes = outboxes
+        self.interval = interval
+
+    def exchange(self, cur_iter, patch, fitness):
+        """
+        :param int cur_iter: The current iteration number in the epoch
+        :param patch: The best patch of the island
+        :type patch: :py:class:`.Patch`
+        :param fitness: The fitness value of the patch
+        :return: The patches received since the last exchange, with their fitness values
+        :rtype: list(tuple(:py:class:`.Patch`, ))
+        """
+        if cur_iter % self.interval != 0:
+            return []
+        if fitness is not None:
+            for outbox in self.outboxes:
+                outbox.put((patch.encode(), fitness))
+        immigrants = []
+        while True:
+            try:
+                data, immigrant_fitness = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            immigrants.append((Patch.decode(self.program, data), immigrant_fitness))
+        return immigrants
+
+class IslandModel(Algorithm):
+    """
+    Island model
+
+    Each island is a search (built by *algorithm_factory*, e.g. a
+    :py:class:`.LocalSearch`) running in its own process, with its own copy of
+    the temporary directory of the program. Every *interval* iterations,
+    the islands send their best patch to their neighbours in the *topology*
+    through multiprocessing queues, and move to the best received patch
+    if it is better than theirs (see :py:class:`Migration`).
+
+    The processes are forked, so the program and the factory need not be picklable,
+    but the platform must support the ``fork`` start method.
+    The islands are seeded from the global random generator of the parent process,
+    and if an island process dies without reporting its result (e.g., killed when
+    out of memory), the other islands are stopped and :py:meth:`run` raises
+    a :py:class:`RuntimeError` instead of waiting forever.
+
+    .. hint::
+        Example of IslandModel usage. ::
+
+            islands = IslandModel(program, MyLocalSearch, islands=4, topology='ring', interval=10)
+            result = islands.run(warmup_reps=1, epoch=1, max_iter=100, timeout=15)
+            print(result['BestPatch'], result['BestFitness'])
+    """
+    TOPOLOGIES = ('ring', 'complete', 'isolated')
+
+    def __init__(self, program, algorithm_factory, islands=4, topology='ring', interval=10):
+        """
+        :param program: The Program instance to optimize.
+        :type program: :py:class:`.Program`
+        :param algorithm_factory: The function (or class) creating the search of an island
+          from its program
+        :type algorithm_factory: callable
+        :param int islands: The number of islands
+        :param topology: ``'ring'`` (each island sends to the next one), ``'complete'``
+          (to every other island), ``'isolated'`` (no migration),
+          or the list of the neighbours of each island
+        :type topology: str or list(list(int))
+        :param int interval: The number of iterations between two migrations
+        """
+        assert topology in self.TOPOLOGIES or len(topology) == islands
+        self.algorithm_factory = algorithm_factory
+        self.islands = islands
+        self.topology = topology
+        self.interval = interval
+        super().__init__(program)
+
+    def get_neighbours(self, index):
+        """
+        :param int index: The index of an island
+        :return: The indices of the islands receiving its patches
+        :rtype: list(int)
+        """
+        if self.topology == 'ring':
+            return [(index + 1) % self.islands] if self.islands > 1 else []
+        elif self.topology == 'complete':
+            return [i for i in range(self.islands) if i != index]
+        elif self.topology == 'isolated':
+            return []
+        return list(self.topology[index])
+
+    def is_better(self, fitness, other_fitness):
+        """
+        :return: If the fitness is better than the other one (lower is better)
+        :rtype: bool
+        """
+        return other_fitness is None or (fitness is not None and fitness < other_fitness)
+
+    def run_island(self, index, program, seed, inboxes, results, kwargs):
+        # The forked islands would otherwise share the state of the random generator
+        random.seed(seed)
+        try:
+            algorithm = self.algorithm_factory(program)
+            algorithm.migration = Migration(program, inboxes[index],
+                                            [inboxes[i] for i in self.get_neighbours(index)],
+                                            self.interval)
+            result = algorithm.run(**kwargs)
+            results.put((index, encode_patches(result), None))
+        except Exception:
+            results.put((index, None, traceback.format_exc()))
+        finally:
+            for inbox in inboxes:
+                inbox.cancel_join_thread()
+
+    def run(self, **kwargs):
+        """
+        :param kwargs: The parameters of the *run* method of the islands
+        :return: The results of the islands (Islands), and their aggregation
+          (Time, FitnessEval, InvalidPatch, BestPatch, BestFitness, diff)
+        :rtype: dict(str, )
+        """
+        start = time.time()
+        context = multiprocessing.get_context('fork')
+        inboxes = [context.Queue() for _ in range(self.islands)]
+        results = context.Queue()
+        # The copies are made and removed here, even if an island process is killed
+        programs = [self.program.copy_variant('island{}'.format(i)) for i in range(self.islands)]
+        seeds = [random.getrandbits(64) for _ in range(self.islands)]
+        processes = [context.Process(target=self.run_island,
+                                     args=(i, programs[i], seeds[i], inboxes, results, kwargs))
+                     for i in range(self.islands)]
+        island_results = [None] * self.islands
+        errors = []
+        try:
+            for process in processes:
+                process.start()
+            pending = set(range(self.islands))
+            while pending:
+                index, result, error = get_result(results, [processes[i] for i in pending])
+                pending.discard(index)
+                if error:
+                    errors.append(error)
+                else:
+                    island_results[index] = decode_patches(self.program, result)
+        except BaseException:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            raise
+        finally:
+            for process in processes:
+                if process.pid is not None:
+                    process.join()
+            for program in programs:
+                program.remove_tmp_variant()
+        if errors:
+            raise RuntimeError('An island failed:\n{}'.format(errors[0]))
+
+        aggregated = {
+            'Islands': island_results,
+            'FitnessEval': 0,
+            'InvalidPatch': 0,
+            'BestPatch': None,
+            'BestFitness': None,
+            'diff': None
+        }
+        for island_result in island_results:
+            for epoch_result in island_result:
+                aggregated['FitnessEval'] += epoch_result['FitnessEval']
+                aggregated['InvalidPatch'] += epoch_result['InvalidPatch']
+                if epoch_result.get('BestPatch') is not None and self.is_better(
+                        epoch_result['BestFitness'], aggregated['BestFitness']):
+                    aggregated['BestPatch'] = epoch_result['BestPatch']
+                    aggregated['BestFitness'] = epoch_result['BestFitness']
+                    aggregated['diff'] = epoch_result['diff']
+        aggregated['Time'] = time.time() - start
+        return aggregated
@@ -0,0 +1,56 @@
+from .local_search import LocalSearch
+
+class LateAcceptanceHillClimbing(LocalSearch):
+    """
+    Late Acceptance Hill Climbing (Abstract Class)
+
+    A neighbour is accepted if it is better than the visited patch or than
+    the patch visited *history_length* steps before, which lets the search
+    cross plateaus and small valleys.
+
+    All children classes need to override
+
+    * :py:meth:`get_neighbour`
+
+    .. hint::
+        Example of LateAcceptanceHillClimbing usage. ::
+
+            class MyLateAcceptanceHillClimbing(LateAcceptanceHillClimbing):
+                def get_neighbour(self, patch):
+                    ...
+
+            lahc = MyLateAcceptanceHillClimbing(program, history_length=20)
+            results = lahc.run(warmup_reps=5, epoch=3, max_iter=100, timeout=15)
+    """
+    def __init__(self, program, history_length=10):
+        """
+        :param program: The Program instance to optimize.
+        :type program: :py:class:`.Program`
+        :param int history_length: The number of steps after which a fitness value
+          of the visited patches is used as acceptance threshold
+        """
+        self.history_length = history_length
+        super().__init__(program)
+
+    def setup(self):
+        self.history = []
+        self.steps = 0
+
+    def get_state(self):
+        return {'history': list(self.history), 'steps': self.steps}
+
+    def set_state(self, state):
+        self.history = list(state['history'])
+        self.steps = state['steps']
+
+    def accept(self, cur_iter, fitness, current_fitness):
+        if current_fitness is None:
+            return True
+        if not self.history:
+            self.history = [current_fitness] * self.history_length
+        index = self.steps % self.history_length
+        self.steps += 1
+        accepted = (self.is_better_than_the_best(fitness, current_fitness)
+                    or self.is_better_than_the_best(fitness, self.history[index]))
+        self.history[index] = fitness if accepted else current_fitness
+        return accepted
@@ -1,6 +1,15 @@
+import os
 import time
+import zlib
+import pickle
+import random
+import traceback
+import multiprocessing
 from abc import ABCMeta, abstractmethod
 from ..base import Patch, Algorithm
+from ..base.patch import encode_patches, decode_patches
+from .delta_debugging import DeltaDebugging
+from ..utils import summarise_timings, get_result
 
 class LocalSearch(Algorithm):
     """
@@ -29,6 +38,16 @@ class LocalSearch(Algorithm):
             local_search = MyLocalSearch(program)
             results = local_search.run(warmup_reps=5, epoch=3, max_iter=100, timeout=15)
     """
+    #: The exchange of patches with other searches, see :py:class:`.IslandModel`
+    migration = None
+    #: The checkpoint file and the context of the run, see :py:meth:`run`
+    checkpoint = None
+    #: The adaptive choice of the edit operators, see :py:meth:`select_operator`
+    operator_selector = None
+    #: The prediction of invalid neighbours, see :py:meth:`draw_neighbour`
+    #: (only used by the local searches)
+    surrogate = None
+
     def is_better_than_the_best(self, fitness, best_fitness):
         """
         :param fitness: The fitness value of the current patch
@@ -41,6 +60,18 @@ class LocalSearch(Algorithm):
             return True
         return fitness <= best_fitness
 
+    def accept(self, cur_iter, fitness, current_fitness):
+        """
+        :param int cur_iter: The current iteration number in the epoch
+        :param fitness: The fitness value of the neighbour
+        :param current_fitness: The fitness value of the patch the search is visiting
+        :return: If the search moves to the neighbour. By default, only if it is
+          better than the visited patch (see :py:meth:`is_better_than_the_best`),
+          so that the visited patch is always the best one.
+        :rtype: bool
+        """
+        return self.is_better_than_the_best(fitness, current_fitness)
+
     def stopping_criterion(self, iter, fitness):
         """
         :param int iter: The current iteration number in the epoch
@@ -67,12 +98,78 @@ class LocalSearch(Algorithm):
         """
         pass
 
-    def run(self, warmup_reps=1, epoch=5, max_iter=100, timeout=15, verbose=True):
+    def select_operator(self, operators=None):
+        """
+        :param operators: The edit operators to choose from, by default ``self.operators``
+        :type operators: None or list(:py:class:`.AbstractEdit`)
+        :return: The operator chosen among them by :py:attr:`operator_selector`
+          (see :py:meth:`.OperatorSelector.select`) if any, or uniformly at random
+        :rtype: :py:class:`.AbstractEdit`
+
+        .. hint::
+            An example of :py:meth:`get_neighbour`::
+
+                patch.add(self.select_operator().create(self.program))
+                return patch
+        """
+        if self.operator_selector is not None:
+            return self.operator_selector.select(operators)
+        return random.choice(operators or self.operators)
+
+    def draw_neighbour(self, patch):
+        """
+        :param patch: The patch that the search is visiting now
+        :type patch: :py:class:`.Patch`
+        :return: A neighbour of the patch (see :py:meth:`get_neighbour`), drawn again
+          while :py:attr:`surrogate` predicts it invalid (see :py:class:`.SurrogateFilter`),
+          at most ``surrogate.redraws`` times
+        :rtype: :py:class:`.Patch`
+        """
+        redraws = self.surrogate.redraws if self.surrogate is not None else 1
+        for attempt in range(1, redraws + 1):
+            neighbour = self.get_neighbour(patch.clone())
+            if attempt == redraws or not self.surrogate.skip(neighbour):
+                return neighbour
+
+    def explore(self, patch, fitness, timeout=15):
+        """
+        Draw the neighbours of the patch visited in an iteration and evaluate them.
+
+        :param patch: The patch that the search is visiting now
+        :type patch: :py:class:`.Patch`
+        :param fitness: The fitness value of the patch
+        :param float timeout: The time limit of test run (unit: seconds)
+        :return: The evaluated neighbours and their results, by default a single one
+          (see :py:meth:`get_neighbour`)
+        :rtype: list(tuple(:py:class:`.Patch`, :py:class:`.RunResult`))
+        """
+        neighbour = self.draw_neighbour(patch)
+        return [(neighbour, self.program.evaluate_patch(neighbour, timeout=timeout))]
+
+    def minimise(self, patch, fitness, timeout=15):
+        """
+        Remove the edits of the best patch of an epoch which are not needed
+        to preserve its fitness, see :py:class:`.DeltaDebugging`.
+
+        :param patch: The best patch of the epoch
+        :type patch: :py:class:`.Patch`
+        :param fitness: The fitness value of the patch
+        :param float timeout: The time limit of test run (unit: seconds)
+        :return: The result of the minimisation
+        :rtype: dict(str, )
+        """
+        return DeltaDebugging(self.program).run(patch, fitness=fitness, timeout=timeout)
+
+    def run(self, warmup_reps=1, epoch=5, max_iter=100, timeout=15, verbose=True,
+            confirm_best=True, minimise=False, processes=1, checkpoint=None,
+            checkpoint_interval=10):
         """
         It starts from a randomly generated candidate solution
         and iteratively moves to its neighbouring solution with
         a better fitness value by making small local changes to
-        the candidate solution.
+        the candidate solution. The neighbours are drawn from the patch
+        the search is visiting, which moves according to :py:meth:`accept`,
+        while the best patch of the epoch is tracked separately.
 
         :param int warmup_reps: The number of warming-up test runs to get
           the base fitness value. For some properties, non-functional
@@ -82,7 +179,25 @@ class LocalSearch(Algorithm):
         :param int epoch: The total epoch
         :param int max_iter: The maximum iterations per epoch
         :param float timeout: The time limit of test run (unit: seconds)
-        :return: The result of searching(Time, Success, FitnessEval, InvalidPatch, BestPatch)
+        :param bool confirm_best: If only the tests covering the edits were run
+          (see :py:meth:`.AbstractProgram.select_tests`), re-evaluate a new best patch
+          with the whole test suite before accepting it, as the tests not run may
+          still fail. The search then only stops on a result of the whole test suite.
+        :param bool minimise: Minimise the best patch of each epoch
+          (MinimisedPatch, MinimisedFitness, MinimisedDiff), see :py:meth:`minimise`
+        :param int processes: The number of epochs run concurrently,
+          see :py:meth:`run_epochs_in_processes`
+        :param checkpoint: The file where the state of the search is saved every
+          *checkpoint_interval* iterations and at the end of each epoch,
+          to continue the search with :py:meth:`resume` if it is interrupted
+          (not supported with several processes)
+        :type checkpoint: None or str
+        :param int checkpoint_interval: The number of iterations between two checkpoints
+        :return: The result of searching(Time, Success, FitnessEval, InvalidPatch,
+          CachedPatch, BestPatch). CachedPatch counts the patches whose program variant
+          was identical to an already evaluated one (e.g., no-op edits), so no test was run.
+          Timings gives the mean, p50, p95 and max durations of each phase of the
+          evaluations (see :py:attr:`.RunResult.timings` and :py:func:`.summarise_timings`).
         :rtype: dict(int, dict(str, ))
         """
         if verbose:
@@ -91,39 +206,241 @@ class LocalSearch(Algorithm):
         warmup = list()
         empty_patch = Patch(self.program)
         for i in range(warmup_reps):
-            result = self.program.evaluate_patch(empty_patch, timeout=timeout)
+            result = self.program.evaluate_patch(empty_patch, timeout=timeout, use_cache=False)
             if result.status is 'SUCCESS':
                 warmup.append(result.fitness)
-        original_fitness = float(sum(warmup)) / len(warmup) if warmup else None
+        original_fitness = self.mean_fitness(warmup)
 
         if verbose:
             self.program.logger.info(
                 "The fitness value of original program: {}".format(original_fitness))
 
-        result = []
-
         if verbose:
             self.program.logger.info("Epoch\tIter\tStatus\tFitness\tPatch")
 
-        for cur_epoch in range(1, epoch + 1):
+        self.max_iter = max_iter
+        kwargs = dict(original_fitness=original_fitness, max_iter=max_iter, timeout=timeout,
+                      verbose=verbose, confirm_best=confirm_best, minimise=minimise)
+        self.checkpoint = None
+        if processes > 1:
+            assert checkpoint is None
+            return self.run_epochs_in_processes(range(1, epoch + 1), processes, **kwargs)
+        results = []
+        if checkpoint is not None:
+            self.checkpoint = dict(path=checkpoint, interval=checkpoint_interval,
+                                   epoch=epoch, kwargs=kwargs, results=results)
+        return self.run_epochs(epoch, kwargs, results)
+
+    def run_epochs(self, epoch, kwargs, results, state=None):
+        """
+        :param int epoch: The total epoch
+        :param kwargs: The parameters of :py:meth:`run_epoch`
+        :param results: The results of the epochs already done, which is extended
+        :type results: list(dict(str, ))
+        :param state: The state of the epoch to continue, see :py:meth:`run_epoch`
+        :return: The results of all the epochs
+        :rtype: list(dict(str, ))
+        """
+        for cur_epoch in range(len(results) + 1, epoch + 1):
+            results.append(self.run_epoch(cur_epoch, state=state, **kwargs))
+            state = None
+            if self.checkpoint is not None:
+                self.save_checkpoint(cur_epoch + 1, None)
+        return results
+
+    def get_state(self):
+        """
+        :return: The internal state of the search to save in the checkpoints,
+          by default nothing (see :py:meth:`set_state`)
+        :rtype: dict(str, )
+        """
+        return dict()
+
+    def set_state(self, state):
+        """
+        Restore the internal state of the search saved by :py:meth:`get_state`,
+        after :py:meth:`setup` was called.
+
+        :param state: The internal state of the search
+        :type state: dict(str, )
+        :return: None
+        """
+        pass
+
+    def save_checkpoint(self, cur_epoch, state):
+        """
+        Write the state of the search atomically (the previous checkpoint is only
+        replaced once the new one is complete) as a compressed pickle, the patches
+        being encoded (see :py:meth:`.Patch.encode`). Besides the epochs, it holds the
+        random state, the variant cache with its :py:class:`.RunResult` objects, the test
+        history, and the states of the search (see :py:meth:`get_state`),
+        of :py:attr:`operator_selector` and of :py:attr:`surrogate`.
+
+        :param int cur_epoch: The number of the epoch in progress
+        :param state: The state of the epoch in progress, or None if it is not started
+        :type state: None or dict(str, )
+        :return: None
+        """
+        data = {
+            'epoch': self.checkpoint['epoch'],
+            'kwargs': self.checkpoint['kwargs'],
+            'interval': self.checkpoint['interval'],
+            'results': encode_patches(self.checkpoint['results']),
+            'cur_epoch': cur_epoch,
+            'state': encode_patches(state),
+            'search': self.get_state() if state is not None else None,
+            'operator_selector': (self.operator_selector.get_state()
+                                  if self.operator_selector is not None else None),
+            'surrogate': encode_patches(self.surrogate.get_state()) if self.surrogate is not None else None,
+            'random': random.getstate(),
+            'variant_cache': self.program.variant_cache,
+            'test_history': (self.program.test_history, self.program.num_test_runs)
+        }
+        path = self.checkpoint['path']
+        with open(path + '.tmp', 'wb') as checkpoint_file:
+            checkpoint_file.write(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(path + '.tmp', path)
+
+    def resume(self, checkpoint):
+        """
+        Continue a search interrupted after its last checkpoint (see :py:meth:`run`).
+        The :py:attr:`operator_selector` and :py:attr:`surrogate` of the search, if any,
+        must be configured as in the interrupted one to restore their states.
+
+        :param str checkpoint: The checkpoint file
+        :return: The results of all the epochs, see :py:meth:`run`
+        :rtype: list(dict(str, ))
+        """
+        with open(checkpoint, 'rb') as checkpoint_file:
+            data = pickle.loads(zlib.decompress(checkpoint_file.read()))
+        results = decode_patches(self.program, data['results'])
+        state = decode_patches(self.program, data['state'])
+        random.setstate(data['random'])
+        self.program.variant_cache.update(data['variant_cache'])
+        self.program.test_history, self.program.num_test_runs = data['test_history']
+        if self.operator_selector is not None and data['operator_selector'] is not None:
+            self.operator_selector.set_state(data['operator_selector'])
+        if self.surrogate is not None and data['surrogate'] is not None:
+            self.surrogate.set_state(decode_patches(self.program, data['surrogate']))
+        kwargs = data['kwargs']
+        self.max_iter = kwargs['max_iter']
+        self.checkpoint = dict(path=checkpoint, interval=data['interval'],
+                               epoch=data['epoch'], kwargs=kwargs, results=results)
+        if state is not None:
+            self.setup()
+            self.set_state(data['search'])
+        if kwargs['verbose']:
+            self.program.logger.info("Resume from epoch {} iteration {}".format(
+                data['cur_epoch'], state['iteration'] + 1 if state else 1))
+        return self.run_epochs(data['epoch'], kwargs, results, state)
+
+    def run_epochs_in_processes(self, epochs, processes, **kwargs):
+        """
+        Run the epochs in forked worker processes, each evaluating the patches
+        in its own copy of the temporary directory (see :py:meth:`.AbstractProgram.copy_variant`).
+        The random generator is seeded for each epoch from a seed drawn once,
+        so that the epochs explore different patches.
+        If a worker process dies (e.g., killed when out of memory), the other ones
+        are stopped and a :py:class:`RuntimeError` is raised.
+
+        :param epochs: The epoch numbers
+        :type epochs: list(int)
+        :param int processes: The number of worker processes
+        :param kwargs: The parameters of :py:meth:`run_epoch`
+        :return: The results of the epochs, in order
+        :rtype: list(dict(str, ))
+        """
+        context = multiprocessing.get_context('fork')
+        tasks = context.Queue()
+        results = context.Queue()
+        seed = random.getrandbits(64)
+        for cur_epoch in epochs:
+            tasks.put(cur_epoch)
+        processes = min(processes, len(epochs))
+        for _ in range(processes):
+            tasks.put(None)
+
+        # The copies are made and removed here, even if a worker process is killed
+        programs = [self.program.copy_variant('epoch{}'.format(i)) for i in range(processes)]
+
+        def work(index):
+            self.program = programs[index]
+            for cur_epoch in iter(tasks.get, None):
+                random.seed(seed + cur_epoch)
+                try:
+                    result = encode_patches(self.run_epoch(cur_epoch, **kwargs))
+                    results.put((cur_epoch, result, None))
+                except Exception:
+                    results.put((cur_epoch, None, traceback.format_exc()))
+
+        workers = [context.Process(target=work, args=(i,)) for i in range(processes)]
+        epoch_results = dict()
+        try:
+            for worker in workers:
+                worker.start()
+            for _ in epochs:
+                cur_epoch, result, error = get_result(results, workers)
+                if error:
+                    raise RuntimeError('Epoch {} failed:\n{}'.format(cur_epoch, error))
+                epoch_results[cur_epoch] = decode_patches(self.program, result)
+        except BaseException:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+            raise
+        finally:
+            for worker in workers:
+                if worker.pid is not None:
+                    worker.join()
+            for program in programs:
+                program.remove_tmp_variant()
+        return [epoch_results[cur_epoch] for cur_epoch in epochs]
+
+    def run_epoch(self, cur_epoch, original_fitness=None, max_iter=100, timeout=15, verbose=True,
+                  confirm_best=True, minimise=False, state=None):
+        """
+        :param int cur_epoch: The epoch number
+        :param original_fitness: The fitness value of the original program
+        :param state: The state of the epoch saved in a checkpoint, to continue it
+        :type state: None or dict(str, )
+        :return: The result of the epoch, see :py:meth:`run` for the other parameters
+        :rtype: dict(str, )
+        """
+        if state is None:
             # Reset Search
             self.setup()
             cur_result = {}
-            best_patch = empty_patch
-            best_fitness = original_fitness
+            empty_patch = Patch(self.program)
+            best_patch = current_patch = empty_patch
+            best_fitness = current_fitness = original_fitness
 
             # Result Initilization
             cur_result['BestPatch'] = None
             cur_result['Success'] = False
             cur_result['FitnessEval'] = 0
             cur_result['InvalidPatch'] = 0
+            cur_result['CachedPatch'] = 0
             cur_result['diff'] = None
+            first_iter, elapsed_time = 1, 0
+            timings = []
+        else:
+            cur_result = dict(state['result'])
+            best_patch, best_fitness = state['best_patch'], state['best_fitness']
+            current_patch, current_fitness = state['current_patch'], state['current_fitness']
+            first_iter, elapsed_time = state['iteration'] + 1, state['time']
+            timings = list(state.get('timings', []))
 
-            start = time.time()
-            for cur_iter in range(1, max_iter + 1):
-                patch = self.get_neighbour(best_patch.clone())
-                run = self.program.evaluate_patch(patch, timeout=timeout)
+        start = time.time() - elapsed_time
+        for cur_iter in range(first_iter, max_iter + 1):
+            if self.operator_selector is not None:
+                self.operator_selector.reset_pending()
+            for patch, run in self.explore(current_patch, current_fitness, timeout=timeout):
                 cur_result['FitnessEval'] += 1
+                timings.append(run.timings)
+                if run.cached:
+                    cur_result['CachedPatch'] += 1
 
                 if run.status is not 'SUCCESS':
                     cur_result['InvalidPatch'] += 1
@@ -131,6 +448,25 @@ class LocalSearch(Algorithm):
                 else:
                     update_best = self.is_better_than_the_best(run.fitness, best_fitness)
 
+                # The surrogate predicts the result of the evaluation by explore
+                explored_run = run
+                partial = confirm_best and self.program.select_tests(patch) is not None
+                if update_best and partial:
+                    partial = False
+                    run = self.program.evaluate_patch(patch, timeout=timeout, select_tests=False)
+                    cur_result['FitnessEval'] += 1
+                    timings.append(run.timings)
+                    update_best = run.status == 'SUCCESS' and self.is_better_than_the_best(
+                        run.fitness, best_fitness)
+
+                if self.operator_selector is not None:
+                    self.operator_selector.feedback(current_patch, patch, run, update_best)
+                if self.surrogate is not None and not explored_run.cached:
+                    self.surrogate.observe(patch, explored_run, update_best)
+
+                if run.status == 'SUCCESS' and self.accept(cur_iter, run.fitness, current_fitness):
+                    current_fitness, current_patch = run.fitness, patch
+
                 if update_best:
                     best_fitness, best_patch = run.fitness, patch
 
@@ -139,16 +475,47 @@ class LocalSearch(Algorithm):
                         cur_epoch, cur_iter, run.status, '*' if update_best else '',
                         run.fitness, patch))
 
-                if run.fitness is not None and self.stopping_criterion(cur_iter, run.fitness):
+                if not partial and run.fitness is not None and self.stopping_criterion(cur_iter, run.fitness):
                     cur_result['Success'] = True
                     break
+            if cur_result['Success']:
+                break
+
+            if self.migration is not None:
+                for patch, fitness in self.migration.exchange(cur_iter, best_patch, best_fitness):
+                    if patch != best_patch and self.is_better_than_the_best(fitness, best_fitness):
+                        best_fitness, best_patch = fitness, patch
+                        current_fitness, current_patch = fitness, patch
+                        if verbose:
+                            self.program.logger.info("{}\t{}\tMIGRATION\t*{}\t{}".format(
+                                cur_epoch, cur_iter, fitness, patch))
+
+            if self.checkpoint is not None and cur_iter % self.checkpoint['interval'] == 0:
+                self.save_checkpoint(cur_epoch, {
+                    'iteration': cur_iter,
+                    'result': cur_result,
+                    'best_patch': best_patch,
+                    'best_fitness': best_fitness,
+                    'current_patch': current_patch,
+                    'current_fitness': current_fitness,
+                    'time': time.time() - start,
+                    'timings': timings
+                })
+
+        cur_result['Time'] = time.time() - start
+        cur_result['Timings'] = summarise_timings(timings)
+        if self.surrogate is not None:
+            cur_result['Surrogate'] = self.surrogate.report()
 
-            cur_result['Time'] = time.time() - start
+        if best_patch:
+            cur_result['BestPatch'] = best_patch
+            cur_result['BestFitness'] = best_fitness
+            cur_result['diff'] = self.program.diff(best_patch)
 
-            if best_patch:
-                cur_result['BestPatch'] = best_patch
-                cur_result['BestFitness'] = best_fitness
-                cur_result['diff'] = self.program.diff(best_patch)
+            if minimise:
+                minimised = self.minimise(best_patch, best_fitness, timeout=timeout)
+                cur_result['MinimisedPatch'] = minimised['Patch']
+                cur_result['MinimisedFitness'] = minimised['Fitness']
+                cur_result['MinimisedDiff'] = minimised['diff']
 
-            result.append(cur_result)
-        return result
+        return cur_result
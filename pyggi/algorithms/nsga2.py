@@ -0,0 +1,218 @@
+import time
+from ..base import Patch
+from ..utils import summarise_timings
+from .genetic_programming import GeneticProgramming
+
+def dominates(objectives, other):
+    """
+    :param objectives: The objective values of a solution (lower is better)
+    :type objectives: tuple
+    :param other: The objective values of another solution
+    :type other: tuple
+    :return: If the solution is not worse than the other one for every objective
+      and better for at least one
+    :rtype: bool
+    """
+    better = False
+    for value, other_value in zip(objectives, other):
+        if value > other_value:
+            return False
+        if value < other_value:
+            better = True
+    return better
+
+def non_dominated_sort(points):
+    """
+    Efficient non-dominated sort with sequential search (ENS-SS):
+    as the solutions are visited in lexicographic order, a solution can only be
+    dominated by the solutions visited before it, so it is put in the first
+    front none of whose solutions dominates it. The solutions of a front are
+    compared from the last added one, which is the most likely to dominate it.
+
+    :param points: The objective values of the solutions
+    :type points: list(tuple)
+    :return: The indices of the solutions of each front, from the first (non-dominated) one
+    :rtype: list(list(int))
+    """
+    fronts = []
+    for i in sorted(range(len(points)), key=lambda i: points[i]):
+        for front in fronts:
+            if not any(dominates(points[j], points[i]) for j in reversed(front)):
+                front.append(i)
+                break
+        else:
+            fronts.append([i])
+    return fronts
+
+def crowding_distance(points):
+    """
+    :param points: The objective values of the solutions of a front
+    :type points: list(tuple)
+    :return: The crowding distance of each solution,
+      infinite for the extreme solutions of each objective
+    :rtype: list(float)
+    """
+    distances = [0.0] * len(points)
+    if not points:
+        return distances
+    for m in range(len(points[0])):
+        order = sorted(range(len(points)), key=lambda i: points[i][m])
+        low, high = points[order[0]][m], points[order[-1]][m]
+        distances[order[0]] = distances[order[-1]] = float('inf')
+        if high == low:
+            continue
+        for k in range(1, len(order) - 1):
+            distances[order[k]] += (points[order[k+1]][m] - points[order[k-1]][m]) / (high - low)
+    return distances
+
+class NSGA2(GeneticProgramming):
+    """
+    Multi-objective Genetic Programming (NSGA-II)
+
+    The objective values of a patch (see :py:meth:`get_objectives`) are all minimised.
+    Each generation, the offspring are bred by tournament selection on the crowded
+    comparison (rank of the front, then larger crowding distance), crossover and
+    mutation (see :py:class:`.GeneticProgramming`), and evaluated as one batch.
+    The next population is made of the best fronts of the parents and offspring,
+    the last front being truncated by crowding distance.
+    With an :py:attr:`operator_selector`, an offspring improves if no patch of
+    the population it was bred from dominates it.
+
+    .. hint::
+        Example of NSGA2 usage. ::
+
+            class MyNSGA2(NSGA2):
+                def get_objectives(self, patch, run):
+                    runtime, memory = run.fitness
+                    return (runtime, memory, len(patch))
+
+            program.multi_objective = True  # the test command prints the runtime and the memory
+            nsga2 = MyNSGA2(program, [LineReplacement, LineInsertion, LineDeletion])
+            results = nsga2.run(epoch=1, generations=20, pop_size=100, timeout=15)
+            for solution in results[0]['ParetoFront']:
+                print(solution['Fitness'], solution['diff'])
+    """
+    def get_objectives(self, patch, run):
+        """
+        :param patch: The evaluated patch
+        :type patch: :py:class:`.Patch`
+        :param run: The result of the patch, whose status is ``'SUCCESS'``
+        :type run: :py:class:`.RunResult`
+        :return: The objective values to minimise, by default the fitness value
+          (a tuple if :py:attr:`.AbstractProgram.multi_objective` is set,
+          see :py:meth:`.AbstractProgram.compute_fitness`)
+        :rtype: tuple
+        """
+        if isinstance(run.fitness, (tuple, list)):
+            return tuple(run.fitness)
+        return (run.fitness,)
+
+    def sort(self, population, objectives):
+        """
+        :param population: The patches to sort
+        :type population: list(:py:class:`.Patch`)
+        :param objectives: The objective values of each patch, None if it is invalid
+        :type objectives: dict(:py:class:`.Patch`, tuple)
+        :return: The patches sorted by the crowded comparison
+          and the rank and crowding distance of each patch
+          (the invalid patches are the last ones, with no rank)
+        :rtype: tuple(list(:py:class:`.Patch`), dict(:py:class:`.Patch`, tuple))
+        """
+        valid = [patch for patch in population if objectives[patch] is not None]
+        keys = {patch: None for patch in population}
+        ranked = []
+        for rank, front in enumerate(non_dominated_sort([objectives[patch] for patch in valid])):
+            front = [valid[i] for i in front]
+            distances = crowding_distance([objectives[patch] for patch in front])
+            for patch, distance in sorted(zip(front, distances), key=lambda pair: -pair[1]):
+                keys[patch] = (rank, -distance)
+                ranked.append(patch)
+        ranked += [patch for patch in population if objectives[patch] is None]
+        return ranked, keys
+
+    def run(self, epoch=1, generations=10, pop_size=20, timeout=15, tournament_size=2,
+            crossover_rate=0.5, mutation_rate=0.5, crossover='one_point', verbose=True):
+        """
+        :return: The result of searching(Time, FitnessEval, InvalidPatch, CachedPatch, ParetoFront, Timings).
+          ParetoFront is the list of the non-dominated patches found (Patch, Fitness, diff),
+          with the shortest patch for identical objective values.
+        :rtype: list(dict(str, ))
+
+        The parameters are the ones of :py:meth:`.GeneticProgramming.run`.
+        """
+        if verbose:
+            self.program.logger.info(self.program.logger.log_file_path)
+            self.program.logger.info("Epoch\tGen\tStatus\tFitness\tPatch")
+
+        result = []
+        for cur_epoch in range(1, epoch + 1):
+            self.setup()
+            cur_result = {
+                'FitnessEval': 0,
+                'InvalidPatch': 0,
+                'CachedPatch': 0,
+                'ParetoFront': []
+            }
+            objectives = dict()
+            runs = dict()
+            population = []
+            offspring = [Patch(self.program)]
+            timings = []
+
+            start = time.time()
+            for cur_gen in range(0, generations + 1):
+                for patch, run in zip(offspring, self.program.evaluate_patches(offspring, timeout=timeout)):
+                    cur_result['FitnessEval'] += 1
+                    timings.append(run.timings)
+                    if run.cached:
+                        cur_result['CachedPatch'] += 1
+                    if run.status != 'SUCCESS':
+                        cur_result['InvalidPatch'] += 1
+                    runs[patch] = run
+                    objectives[patch] = self.get_objectives(patch, run) if run.status == 'SUCCESS' else None
+                    if self.operator_selector is not None:
+                        improved = objectives[patch] is not None and not any(
+                            objectives[parent] is not None and dominates(objectives[parent], objectives[patch])
+                            for parent in population)
+                        self.operator_selector.update(self.mutations.pop(patch, None), run, improved)
+                    if verbose:
+                        self.program.logger.info("{}\t{}\t{}\t{}\t{}".format(
+                            cur_epoch, cur_gen, run.status, run.fitness, patch))
+
+                ranked, keys = self.sort(population + offspring, objectives)
+                population = ranked[:pop_size]
+                if cur_gen == generations:
+                    break
+
+                self.mutations.clear()
+                if self.operator_selector is not None:
+                    self.operator_selector.reset_pending()
+                offspring = []
+                for _ in range(pop_size * 10):
+                    if len(offspring) == pop_size:
+                        break
+                    child = self.breed(population, keys, tournament_size,
+                                       crossover_rate, mutation_rate, crossover)
+                    if child not in objectives and child not in offspring:
+                        offspring.append(child)
+                    else:
+                        self.discard(child, objectives)
+
+            cur_result['Time'] = time.time() - start
+            cur_result['Timings'] = summarise_timings(timings)
+
+            # The shortest patch of each objective vector
+            shortest = dict()
+            for patch in sorted(objectives, key=len):
+                if objectives[patch] is not None:
+                    shortest.setdefault(objectives[patch], patch)
+            valid = list(shortest.values())
+            if valid:
+                front = non_dominated_sort([objectives[patch] for patch in valid])[0]
+                cur_result['ParetoFront'] = [{
+                    'Patch': valid[i],
+                    'Fitness': runs[valid[i]].fitness,
+                    'diff': self.program.diff(valid[i])
+                } for i in sorted(front)]
+            result.append(cur_result)
+        return result
@@ -0,0 +1,236 @@
+import math
+import random
+from abc import ABC, abstractmethod
+
+class OperatorSelector(ABC):
+    """
+    Operator Selector (Abstract Class)
+
+    It chooses the edit operator used to create the next edit
+    (see :py:meth:`select`) and learns from the results of the
+    patches it produced (see :py:meth:`update`): the reward of an operator
+    is *valid_reward* for a valid patch and 1 for an improving one.
+    The operators selected whose results are not recorded yet are pending,
+    so that the patches drawn in a batch before their evaluation
+    are spread over the operators (see :py:meth:`reset_pending`).
+
+    All children classes need to override
+
+    * :py:meth:`choose`
+
+    .. hint::
+        Example of usage in any algorithm. ::
+
+            selector = UCBSelector([LineReplacement, LineInsertion, LineDeletion])
+            operator = selector.select()
+            patch.add(operator.create(program))
+            run = program.evaluate_patch(patch)
+            selector.update(operator, run, improved=run.fitness < best_fitness)
+    """
+    def __init__(self, operators, valid_reward=0.5):
+        """
+        :param operators: The edit operators
+        :type operators: list(:py:class:`.AbstractEdit`)
+        :param float valid_reward: The reward of a valid but not improving patch
+        """
+        self.operators = list(operators)
+        self.valid_reward = valid_reward
+        self.counts = {operator: 0 for operator in self.operators}
+        self.valid = {operator: 0 for operator in self.operators}
+        self.improved = {operator: 0 for operator in self.operators}
+        self.rewards = {operator: 0.0 for operator in self.operators}
+        self.pending = {operator: 0 for operator in self.operators}
+
+    def select(self, operators=None):
+        """
+        :param operators: The operators to choose from, by default :py:attr:`operators`.
+          The ones unknown to the selector are ignored, unless none is known,
+          in which case the operator is chosen uniformly at random.
+        :type operators: None or list(:py:class:`.AbstractEdit`)
+        :return: The operator to use, pending until its result is recorded
+        :rtype: :py:class:`.AbstractEdit`
+        """
+        if operators is None:
+            operators = self.operators
+        candidates = [operator for operator in operators if operator in self.counts]
+        if not candidates:
+            return random.choice(operators)
+        operator = self.choose(candidates)
+        self.pending[operator] += 1
+        return operator
+
+    @abstractmethod
+    def choose(self, operators):
+        """
+        :param operators: The candidate operators, all known to the selector
+        :type operators: list(:py:class:`.AbstractEdit`)
+        :return: The operator to use
+        :rtype: :py:class:`.AbstractEdit`
+        """
+        pass
+
+    def cancel(self, operator):
+        """
+        Forget a selection of the operator whose patch is not evaluated.
+
+        :param operator: The operator
+        :type operator: :py:class:`.AbstractEdit`
+        :return: None
+        """
+        if self.pending.get(operator):
+            self.pending[operator] -= 1
+
+    def reset_pending(self):
+        """
+        Forget the selections whose results are not recorded, e.g., at the start of
+        an iteration or generation, as the patches not evaluated are never recorded.
+
+        :return: None
+        """
+        self.pending = {operator: 0 for operator in self.operators}
+
+    def reward(self, run, improved):
+        """
+        :param run: The result of the patch
+        :type run: :py:class:`.RunResult`
+        :param bool improved: If the patch improved the fitness
+        :return: The reward of the operator which produced the patch
+        :rtype: float
+        """
+        if run.status != 'SUCCESS':
+            return 0.0
+        return 1.0 if improved else self.valid_reward
+
+    def update(self, operator, run, improved=False):
+        """
+        Record the result of a patch produced by the operator.
+
+        :param operator: The operator
+        :type operator: :py:class:`.AbstractEdit`
+        :param run: The result of the patch
+        :type run: :py:class:`.RunResult`
+        :param bool improved: If the patch improved the fitness
+        :return: None
+        """
+        if operator not in self.counts:
+            return
+        reward = self.reward(run, improved)
+        self.cancel(operator)
+        self.counts[operator] += 1
+        self.valid[operator] += run.status == 'SUCCESS'
+        self.improved[operator] += bool(improved)
+        self.rewards[operator] += reward
+        self.learn(operator, reward)
+
+    def learn(self, operator, reward):
+        """
+        Update the selection strategy with the reward of the operator.
+        """
+        pass
+
+    def feedback(self, parent, patch, run, improved=False):
+        """
+        Record the result of a neighbour which extends its parent with
+        one edit (the operator being the class of the new edit).
+        Other neighbours (e.g., edit removals) are ignored.
+
+        :param parent: The patch from which the neighbour was produced
+        :type parent: :py:class:`.Patch`
+        :param patch: The neighbour
+        :type patch: :py:class:`.Patch`
+        :param run: The result of the neighbour
+        :type run: :py:class:`.RunResult`
+        :param bool improved: If the neighbour improved the fitness
+        :return: None
+        """
+        if len(patch) == len(parent) + 1 and patch.edit_list[:-1] == parent.edit_list:
+            self.update(patch.edit_list[-1].__class__, run, improved)
+
+    def get_state(self):
+        """
+        :return: The statistics of the operators, in the order of :py:attr:`operators`,
+          to save in the checkpoints (see :py:meth:`.LocalSearch.save_checkpoint`)
+        :rtype: dict(str, list)
+        """
+        return {name: [getattr(self, name)[operator] for operator in self.operators]
+                for name in ('counts', 'valid', 'improved', 'rewards')}
+
+    def set_state(self, state):
+        """
+        Restore the statistics saved by :py:meth:`get_state`.
+
+        :param state: The statistics of the operators
+        :type state: dict(str, list)
+        :return: None
+        """
+        for name, values in state.items():
+            setattr(self, name, dict(zip(self.operators, values)))
+
+    def mean_reward(self, operator):
+        return self.rewards[operator] / self.counts[operator] if self.counts[operator] else 0.0
+
+    def __str__(self):
+        return ', '.join('{}(n={}, valid={}, improved={})'.format(
+            operator.__name__, self.counts[operator], self.valid[operator], self.improved[operator])
+            for operator in self.operators)
+
+class UniformSelector(OperatorSelector):
+    """
+    The operators are chosen uniformly at random (the statistics are still recorded).
+    """
+    def choose(self, operators):
+        return random.choice(operators)
+
+class UCBSelector(OperatorSelector):
+    """
+    Upper Confidence Bound (UCB1) bandit: the operator maximising its mean reward
+    plus ``exploration * sqrt(2 ln(total uses) / uses)`` is chosen, each operator
+    being tried once first. The pending selections count as uses.
+    """
+    def __init__(self, operators, valid_reward=0.5, exploration=1.0):
+        super().__init__(operators, valid_reward)
+        self.exploration = exploration
+
+    def uses(self, operator):
+        return self.counts[operator] + self.pending[operator]
+
+    def choose(self, operators):
+        untried = [operator for operator in operators if self.uses(operator) == 0]
+        if untried:
+            return random.choice(untried)
+        total = sum(self.uses(operator) for operator in self.operators)
+        return max(operators, key=lambda operator: self.mean_reward(operator)
+                   + self.exploration * math.sqrt(2 * math.log(total) / self.uses(operator)))
+
+class AdaptivePursuitSelector(OperatorSelector):
+    """
+    Adaptive pursuit: the quality of each operator is an exponential moving average
+    of its rewards (rate *alpha*), and the selection probabilities move towards
+    *p_max* for the best operator and *p_min* for the others (rate *beta*).
+    """
+    def __init__(self, operators, valid_reward=0.5, p_min=None, alpha=0.3, beta=0.3):
+        super().__init__(operators, valid_reward)
+        k = len(self.operators)
+        self.p_min = p_min if p_min is not None else 0.1 / k
+        self.p_max = 1 - (k - 1) * self.p_min
+        self.alpha = alpha
+        self.beta = beta
+        self.quality = {operator: 1.0 for operator in self.operators}
+        self.probabilities = {operator: 1.0 / k for operator in self.operators}
+
+    def choose(self, operators):
+        return random.choices(operators,
+                              weights=[self.probabilities[operator] for operator in operators])[0]
+
+    def get_state(self):
+        state = super().get_state()
+        state['quality'] = [self.quality[operator] for operator in self.operators]
+        state['probabilities'] = [self.probabilities[operator] for operator in self.operators]
+        return state
+
+    def learn(self, operator, reward):
+        self.quality[operator] += self.alpha * (reward - self.quality[operator])
+        best = max(self.operators, key=lambda operator: self.quality[operator])
+        for operator in self.operators:
+            target = self.p_max if operator == best else self.p_min
+            self.probabilities[operator] += self.beta * (target - self.probabilities[operator])
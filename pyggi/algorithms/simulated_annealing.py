@@ -0,0 +1,66 @@
+import math
+import random
+from .local_search import LocalSearch
+
+class ExponentialCooling(object):
+    """
+    The temperature is multiplied by *alpha* at each iteration.
+    """
+    def __init__(self, initial_temperature=1.0, alpha=0.95):
+        self.initial_temperature = initial_temperature
+        self.alpha = alpha
+
+    def __call__(self, cur_iter, max_iter):
+        return self.initial_temperature * self.alpha ** (cur_iter - 1)
+
+class LinearCooling(object):
+    """
+    The temperature decreases linearly to zero at the last iteration.
+    """
+    def __init__(self, initial_temperature=1.0):
+        self.initial_temperature = initial_temperature
+
+    def __call__(self, cur_iter, max_iter):
+        return self.initial_temperature * (max_iter - cur_iter + 1) / max_iter
+
+class SimulatedAnnealing(LocalSearch):
+    """
+    Simulated Annealing (Abstract Class)
+
+    A worse neighbour is accepted with the probability
+    ``exp(-(fitness - current_fitness) / temperature)``, the temperature
+    being given by the schedule at each iteration (see :py:class:`ExponentialCooling`
+    and :py:class:`LinearCooling`). The fitness values should be numbers, lower is better.
+
+    All children classes need to override
+
+    * :py:meth:`get_neighbour`
+
+    .. hint::
+        Example of SimulatedAnnealing usage. ::
+
+            class MySimulatedAnnealing(SimulatedAnnealing):
+                def get_neighbour(self, patch):
+                    ...
+
+            sa = MySimulatedAnnealing(program, schedule=ExponentialCooling(10.0, 0.9))
+            results = sa.run(warmup_reps=5, epoch=3, max_iter=100, timeout=15)
+    """
+    def __init__(self, program, schedule=None):
+        """
+        :param program: The Program instance to optimize.
+        :type program: :py:class:`.Program`
+        :param schedule: The temperature at each iteration, called with
+          the iteration number and the maximum iterations, by default :py:class:`ExponentialCooling`
+        :type schedule: None or callable
+        """
+        self.schedule = schedule or ExponentialCooling()
+        super().__init__(program)
+
+    def accept(self, cur_iter, fitness, current_fitness):
+        if current_fitness is None or self.is_better_than_the_best(fitness, current_fitness):
+            return True
+        temperature = self.schedule(cur_iter, self.max_iter)
+        if temperature <= 0:
+            return False
+        return random.random() < math.exp(-(fitness - current_fitness) / temperature)
@@ -0,0 +1,173 @@
+import os
+import time
+import random
+import concurrent.futures
+from ..base import Patch
+from ..utils import summarise_timings
+from .genetic_programming import GeneticProgramming
+
+class SteadyStateEvolution(GeneticProgramming):
+    """
+    Steady-state asynchronous evolutionary search
+
+    Unlike :py:class:`.GeneticProgramming`, there are no generations:
+    one offspring per worker is under evaluation at any time, and as soon as
+    an evaluation completes, its patch enters the population (replacing the
+    worst patch when the population is full) and a new offspring is bred
+    from the current population and submitted, so the workers never wait
+    for the slowest test run (see :py:meth:`.AbstractProgram.set_workers`).
+
+    The search only depends on its seed and on the order in which the
+    evaluations complete, which is recorded in the completion log of the result
+    (the submission number of each completed offspring). Given the same seed and
+    this log, :py:meth:`run` replays the same search, provided that the test
+    results are deterministic.
+
+    .. hint::
+        Example of SteadyStateEvolution usage. ::
+
+            ea = SteadyStateEvolution(program, [LineReplacement, LineInsertion, LineDeletion])
+            result = ea.run(pop_size=20, max_evals=200, workers=8, seed=0)
+            replayed = ea.run(pop_size=20, max_evals=200, workers=8, seed=0, log=result['Log'])
+    """
+    def breed(self, *args, **kwargs):
+        # The edits are created with the global random generator (see :py:meth:`.AbstractEdit.create`),
+        # seeded from the generator of the search while breeding only
+        state = random.getstate()
+        random.seed(self.random.getrandbits(64))
+        try:
+            return super().breed(*args, **kwargs)
+        finally:
+            random.setstate(state)
+
+    def run(self, warmup_reps=1, pop_size=20, max_evals=100, timeout=15, workers=None,
+            seed=None, log=None, tournament_size=3, crossover_rate=0.5, mutation_rate=0.5,
+            crossover='one_point', verbose=True):
+        """
+        :param int warmup_reps: The number of warming-up test runs to get
+          the base fitness value.
+        :param int pop_size: The maximum size of the population
+        :param int max_evals: The maximum number of evaluated offspring
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param workers: The number of concurrent evaluations, by default the number of CPUs
+        :type workers: None or int
+        :param seed: The seed of the random generator of the search
+        :param log: The completion log of a previous run to replay
+        :type log: None or list(int)
+        :return: The result of searching(Time, Success, FitnessEval, InvalidPatch,
+          CachedPatch, BestPatch, BestFitness, diff, Log, Timings)
+        :rtype: dict(str, )
+
+        The other parameters are the ones of :py:meth:`.GeneticProgramming.run`.
+        """
+        if verbose:
+            self.program.logger.info(self.program.logger.log_file_path)
+
+        warmup = list()
+        empty_patch = Patch(self.program)
+        for i in range(warmup_reps):
+            run = self.program.evaluate_patch(empty_patch, timeout=timeout, use_cache=False)
+            if run.status == 'SUCCESS':
+                warmup.append(run.fitness)
+        original_fitness = self.mean_fitness(warmup)
+
+        if verbose:
+            self.program.logger.info(
+                "The fitness value of original program: {}".format(original_fitness))
+            self.program.logger.info("Eval\tStatus\tFitness\tPatch")
+
+        self.setup()
+        self.random = random.Random(seed)
+        workers = workers or os.cpu_count() or 1
+        if self.program.executor is None:
+            self.program.set_workers(workers)
+        if log is not None:
+            max_evals = min(max_evals, len(log))
+
+        result = {
+            'BestPatch': None,
+            'Success': False,
+            'FitnessEval': 0,
+            'InvalidPatch': 0,
+            'CachedPatch': 0,
+            'diff': None,
+            'Log': []
+        }
+        best_patch = empty_patch
+        best_fitness = original_fitness
+        fitness = {empty_patch: original_fitness}
+        population = [empty_patch]
+        pending = dict()
+        self.mutations.clear()
+        if self.operator_selector is not None:
+            self.operator_selector.reset_pending()
+        futures = dict()
+        submitted = 0
+        timings = []
+
+        def submit():
+            nonlocal submitted
+            for attempt in range(10):
+                child = self.breed(population, fitness, tournament_size,
+                                   crossover_rate, mutation_rate, crossover)
+                if attempt == 9 or (child not in fitness and child not in pending.values()):
+                    break
+                self.discard(child, fitness)
+            future = self.program.submit_patch(child, timeout)
+            pending[submitted] = child
+            futures[submitted] = future
+            submitted += 1
+
+        start = time.time()
+        while submitted < min(workers, max_evals):
+            submit()
+        while pending:
+            if log is not None:
+                index = log[result['FitnessEval']]
+                futures[index].result()
+            else:
+                done, _ = concurrent.futures.wait(
+                    [futures[index] for index in pending],
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                index = min(index for index in pending if futures[index] in done)
+            patch = pending.pop(index)
+            run = futures.pop(index).result()
+            result['Log'].append(index)
+
+            result['FitnessEval'] += 1
+            timings.append(run.timings)
+            if run.cached:
+                result['CachedPatch'] += 1
+            if run.status != 'SUCCESS':
+                result['InvalidPatch'] += 1
+            fitness[patch] = run.fitness if run.status == 'SUCCESS' else None
+            update_best = self.is_better(fitness[patch], best_fitness)
+            if self.operator_selector is not None:
+                self.operator_selector.update(self.mutations.pop(patch, None), run, update_best)
+            if update_best:
+                best_fitness, best_patch = run.fitness, patch
+            if verbose:
+                self.program.logger.info("{}\t{}\t{}{}\t{}".format(
+                    index, run.status, '*' if update_best else '', run.fitness, patch))
+
+            if patch not in population:
+                population.append(patch)
+                if len(population) > pop_size:
+                    population.remove(self.rank(population, fitness)[-1])
+
+            if best_fitness is not None and self.stopping_criterion(result['FitnessEval'], best_fitness):
+                result['Success'] = True
+                break
+            if submitted < max_evals:
+                submit()
+
+        for future in futures.values():
+            future.cancel()
+        result['Time'] = time.time() - start
+        result['Timings'] = summarise_timings(timings)
+
+        if best_patch:
+            result['BestPatch'] = best_patch
+            result['BestFitness'] = best_fitness
+            result['diff'] = self.program.diff(best_patch)
+        return result
@@ -0,0 +1,215 @@
+import math
+import random
+import collections
+
+class SurrogateFilter(object):
+    """
+    An online model predicting if a patch gives an invalid program
+    (compilation error, failed tests, timeout, etc.) from features of its edits,
+    to skip the patches which are very likely invalid before evaluating them.
+
+    The model is a naive Bayes classifier on the features of :py:meth:`features`
+    (edit operator, files, relative positions and node types of the target and
+    ingredient, number of edits), updated with the result of every distinct
+    evaluated patch, which only starts to filter after *min_observations* results.
+    A patch is skipped when its predicted probability of being invalid reaches
+    *threshold*, except for a *holdout* fraction of them, which are still evaluated
+    to estimate how many valid or improving patches were missed (see :py:meth:`report`).
+
+    Only the local searches use it (see :py:attr:`.LocalSearch.surrogate` and
+    :py:meth:`.LocalSearch.draw_neighbour`); other algorithms have to call
+    :py:meth:`skip` and :py:meth:`observe` themselves.
+
+    .. hint::
+        Example of usage in any algorithm. ::
+
+            surrogate = SurrogateFilter(program, threshold=0.95)
+            if not surrogate.skip(patch):
+                run = program.evaluate_patch(patch)
+                surrogate.observe(patch, run, improved=run.fitness < best_fitness)
+            print(surrogate.report())
+    """
+    def __init__(self, program, threshold=0.9, holdout=0.1, min_observations=100,
+                 buckets=10, redraws=10, max_observed=10000, seed=None):
+        """
+        :param program: The program
+        :type program: :py:class:`.Program`
+        :param float threshold: The predicted probability of invalidity above which
+          a patch is skipped
+        :param float holdout: The fraction of the patches predicted invalid which are
+          evaluated anyway
+        :param int min_observations: The number of results observed before filtering
+        :param int buckets: The number of intervals the relative positions of the
+          modification points in their files are grouped into
+        :param int redraws: The maximum number of neighbours drawn per evaluation,
+          see :py:meth:`.LocalSearch.draw_neighbour`
+        :param int max_observed: The number of the last observed patches remembered
+          so that they are not observed again (see :py:meth:`observe`)
+        :param seed: The seed of the holdout sampling
+        """
+        self.program = program
+        self.threshold = threshold
+        self.holdout = holdout
+        self.min_observations = min_observations
+        self.buckets = buckets
+        self.redraws = redraws
+        self.max_observed = max_observed
+        self.random = random.Random(seed)
+        self.node_types = dict()
+        # Number of observations and of occurrences of each feature, per class (valid, invalid)
+        self.totals = [0, 0]
+        self.counts = [dict(), dict()]
+        self.skipped = 0
+        self.holdout_patches = set()
+        self.observed = collections.OrderedDict()
+        self.holdout_results = {'Evaluated': 0, 'Valid': 0, 'Improved': 0}
+
+    @property
+    def observations(self):
+        return self.totals[0] + self.totals[1]
+
+    def get_node_type(self, file_name, index):
+        key = (file_name, index)
+        if key not in self.node_types:
+            engine = self.program.engines[file_name]
+            self.node_types[key] = engine.get_node_type(self.program, file_name, index)
+        return self.node_types[key]
+
+    def features(self, patch):
+        """
+        :param patch: The patch
+        :type patch: :py:class:`.Patch`
+        :return: The features of the patch
+        :rtype: set(str)
+        """
+        features = {'edits={}'.format(min(len(patch), 5))}
+        for edit in patch.edit_list:
+            operator = edit.__class__.__name__
+            features.add(operator)
+            for name, value in zip(edit.fields, edit.values):
+                if name in ('target', 'ingredient') and value is not None:
+                    file_name, index = value
+                    size = len(self.program.modification_points[file_name]) or 1
+                    features.add('{}.{}.file={}'.format(operator, name, file_name))
+                    features.add('{}.{}.pos={}'.format(operator, name, index * self.buckets // size))
+                    node_type = self.get_node_type(file_name, index)
+                    if node_type is not None:
+                        features.add('{}.{}.node={}'.format(operator, name, node_type))
+                else:
+                    features.add('{}.{}={}'.format(operator, name, value))
+        return features
+
+    def predict(self, patch):
+        """
+        :param patch: The patch
+        :type patch: :py:class:`.Patch`
+        :return: The probability that the patch is invalid
+        :rtype: float
+        """
+        scores = []
+        for label in (0, 1):
+            score = math.log((self.totals[label] + 1) / (self.observations + 2))
+            for feature in self.features(patch):
+                score += math.log((self.counts[label].get(feature, 0) + 1) / (self.totals[label] + 2))
+            scores.append(score)
+        return 1 / (1 + math.exp(max(-700, min(700, scores[0] - scores[1]))))
+
+    def skip(self, patch):
+        """
+        :param patch: The patch to evaluate
+        :type patch: :py:class:`.Patch`
+        :return: If the patch is predicted invalid and should not be evaluated
+        :rtype: bool
+        """
+        if self.observations < self.min_observations or self.predict(patch) < self.threshold:
+            return False
+        if self.random.random() < self.holdout:
+            self.holdout_patches.add(patch)
+            return False
+        self.skipped += 1
+        return True
+
+    def observe(self, patch, run, improved=False):
+        """
+        Update the model with the result of an evaluated patch,
+        unless the patch is one of the last *max_observed* ones observed.
+
+        :param patch: The evaluated patch
+        :type patch: :py:class:`.Patch`
+        :param run: The result of the patch
+        :type run: :py:class:`.RunResult`
+        :param bool improved: If the patch improved the fitness
+        :return: None
+        """
+        if patch in self.observed:
+            self.observed.move_to_end(patch)
+            return
+        self.observed[patch] = None
+        while len(self.observed) > self.max_observed:
+            self.observed.popitem(last=False)
+        label = 0 if run.status == 'SUCCESS' else 1
+        if patch in self.holdout_patches:
+            self.holdout_patches.discard(patch)
+            self.holdout_results['Evaluated'] += 1
+            self.holdout_results['Valid'] += label == 0
+            self.holdout_results['Improved'] += bool(improved)
+        self.totals[label] += 1
+        for feature in self.features(patch):
+            self.counts[label][feature] = self.counts[label].get(feature, 0) + 1
+
+    def get_state(self):
+        """
+        :return: The model and the holdout statistics, to save in the checkpoints
+          (see :py:meth:`.LocalSearch.save_checkpoint`)
+        :rtype: dict(str, )
+        """
+        return {
+            'node_types': self.node_types,
+            'totals': self.totals,
+            'counts': self.counts,
+            'skipped': self.skipped,
+            'holdout_patches': list(self.holdout_patches),
+            'observed': list(self.observed),
+            'holdout_results': self.holdout_results,
+            'random': self.random.getstate()
+        }
+
+    def set_state(self, state):
+        """
+        Restore the model saved by :py:meth:`get_state`.
+
+        :param state: The model and the holdout statistics
+        :type state: dict(str, )
+        :return: None
+        """
+        self.node_types = dict(state['node_types'])
+        self.totals = list(state['totals'])
+        self.counts = [dict(counts) for counts in state['counts']]
+        self.skipped = state['skipped']
+        self.holdout_patches = set(state['holdout_patches'])
+        self.observed = collections.OrderedDict.fromkeys(state['observed'])
+        self.holdout_results = dict(state['holdout_results'])
+        self.random.setstate(state['random'])
+
+    def report(self):
+        """
+        :return: The number of observed results (Observations), of skipped patches,
+          i.e., saved evaluations (Skipped), the results of the holdout patches
+          (HoldoutEvaluated, HoldoutValid, HoldoutImproved), and the estimated
+          numbers of valid and improving patches among the skipped ones
+          (MissedValid, MissedImproved; None without holdout results)
+        :rtype: dict(str, )
+        """
+        evaluated = self.holdout_results['Evaluated']
+        return {
+            'Observations': self.observations,
+            'Skipped': self.skipped,
+            'HoldoutEvaluated': evaluated,
+            'HoldoutValid': self.holdout_results['Valid'],
+            'HoldoutImproved': self.holdout_results['Improved'],
+            'MissedValid': self.skipped * self.holdout_results['Valid'] / evaluated if evaluated else None,
+            'MissedImproved': self.skipped * self.holdout_results['Improved'] / evaluated if evaluated else None
+        }
+
+    def __str__(self):
+        return ', '.join('{}={}'.format(key, value) for key, value in self.report().items())
@@ -1,3 +1,4 @@
+import numbers
 from abc import ABC, abstractmethod
 
 class Algorithm(ABC):
@@ -13,6 +14,22 @@ class Algorithm(ABC):
     def setup(self):
         pass
 
+    @staticmethod
+    def mean_fitness(values):
+        """
+        :param values: The fitness values of the warming-up runs of the original program
+        :type values: list
+        :return: Their mean, per objective for multiple objectives (tuples of the same length),
+          the first value if they cannot be averaged, None without any value
+        """
+        if not values:
+            return None
+        if all(isinstance(value, numbers.Real) for value in values):
+            return float(sum(values)) / len(values)
+        if all(isinstance(value, tuple) and len(value) == len(values[0]) for value in values):
+            return tuple(float(sum(objective)) / len(values) for objective in zip(*values))
+        return values[0]
+
     @abstractmethod
     def run(self):
     	pass
\ No newline at end of file
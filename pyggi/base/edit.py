@@ -1,43 +1,140 @@
 import ast
 import inspect
-from abc import ABC, abstractmethod
+import itertools
+from abc import ABCMeta, abstractmethod
 
-class AbstractEdit(ABC):
-    @abstractmethod
-    def __init__(self):
+class EditMeta(ABCMeta):
+    """
+    Freeze the edits once they are created, i.e. when their ``__init__`` returns.
+    """
+    def __call__(cls, *args, **kwargs):
+        edit = super().__call__(*args, **kwargs)
+        object.__setattr__(edit, '_hash', hash((cls.__name__, edit.values)))
+        return edit
+
+class AbstractEdit(metaclass=EditMeta):
+    """
+    Edits are immutable and hashable: the values of their fields
+    (see :py:attr:`fields`) are set at the creation, in ``__init__``,
+    and never modified afterwards, so that edits can be
+    shared between patches and stored in sets or used as dictionary keys.
+
+    The fields are declared with ``__slots__``. For the edit classes without
+    ``__slots__`` (written for the previous versions), the fields are
+    the parameters of their ``__init__``, which must store them
+    as attributes of the same names.
+
+    Every edit class is registered by its qualified name (see :py:meth:`type_name`)
+    in :py:attr:`registry` so that encoded patches can be decoded (see :py:meth:`.Patch.encode`).
+    """
+    __slots__ = ('_hash',)
+    fields = ()
+    registry = dict()
+    #: The base class of the engines of the files the edits apply to
+    engine = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        AbstractEdit.registry[cls.type_name()] = cls
+        if '__slots__' in cls.__dict__:
+            cls.fields = tuple(name for klass in reversed(cls.__mro__)
+                               for name in klass.__dict__.get('__slots__', ()) if name != '_hash')
+        elif '__init__' in cls.__dict__:
+            positional = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+            parameters = list(inspect.signature(cls.__init__).parameters.values())[1:]
+            cls.fields = tuple(param.name for param in parameters if param.kind in positional)
+
+    @classmethod
+    def supports(cls, engine):
         """
-        frame = inspect.currentframe()
-        args, _, _, values = inspect.getargvalues(frame)
-        for name in args:
-            if name != 'self':
-                setattr(o, name, values[name])
-        print(self.__dict__)
+        :param engine: The engine of a file
+        :type engine: :py:class:`.AbstractEngine`
+        :return: Whether the edits apply to the files of the engine,
+          by default if it derives from :py:attr:`engine`
+        :rtype: bool
         """
-        pass
+        return cls.engine is None or issubclass(engine, cls.engine)
+
+    @classmethod
+    def type_name(cls):
+        """
+        :return: The name of the edit class qualified by its module,
+          which distinguishes the classes of the same name
+        :rtype: str
+        """
+        return '{}.{}'.format(cls.__module__, cls.__qualname__)
+
+    def __init__(self, *values):
+        """
+        :param values: The values of the fields, in the order of :py:attr:`fields`
+        """
+        assert len(values) == len(self.fields)
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+
+    def __setattr__(self, name, value):
+        # The hash is only set when the edit is created (see EditMeta)
+        if hasattr(self, '_hash'):
+            raise AttributeError("{} is immutable".format(self.__class__.__name__))
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        if hasattr(self, '_hash'):
+            raise AttributeError("{} is immutable".format(self.__class__.__name__))
+        object.__delattr__(self, name)
+
+    @property
+    def values(self):
+        """
+        :return: The values of the fields of the edit
+        :rtype: tuple
+        """
+        return tuple(getattr(self, name) for name in self.fields)
 
     def __eq__(self, other):
-        if self.__class__ != other.__class__:
+        if self is other:
+            return True
+        if self.__class__ != other.__class__ or self._hash != other._hash:
             return False
-        for prop in self.__dict__:
-            if self.__dict__[prop] != other.__dict__[prop]:
-                return False
-        return True
+        return self.values == other.values
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, self.values)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @property
     @abstractmethod
     def domain(self):
         pass
 
+    @property
+    def modified_points(self):
+        """
+        :return: The modification points changed by the edit
+        :rtype: list(tuple(str, int))
+        """
+        return [self.target]
+
     def __str__(self):
         """
         :return: ``LineReplacement([target], [ingredient])``
         """
-        return "{}({})".format(self.__class__.__name__, self.__dict__)
+        return "{}({})".format(self.__class__.__name__, dict(zip(self.fields, self.values)))
 
     @abstractmethod
     def apply(self, program, new_contents, modification_points):
         """"
-        Apply the operator to the contents of program
+        Apply the operator to the contents of program.
+        The edit itself must not be modified.
+
         :param program: The original program instance
         :type program: :py:class:`.Program`
         :param new_contents: The new contents of program to which the edit will be applied
@@ -49,10 +146,63 @@ class AbstractEdit(ABC):
         """
         pass
 
+    @classmethod
+    def enumerate(cls, program, target_file=None, ingr_file=None):
+        """
+        Lazily generate all the edits of the class, based on their fields:
+        the *target* is any modification point of the files whose engine
+        is supported (see :py:meth:`supports`), the *ingredient* any modification point
+        of the files with the same engine as the target, and the *direction*
+        either ``'before'`` or ``'after'``.
+
+        :param str target_file: Only generate the edits targeting this file
+        :param str ingr_file: Only generate the edits using ingredients from this file
+        :return: The edits
+        :rtype: generator(:py:class:`.AbstractEdit`)
+        """
+        if target_file is not None:
+            target_files = [target_file]
+        else:
+            target_files = [f for f in program.target_files if cls.supports(program.engines[f])]
+        for target_file in target_files:
+            if ingr_file is not None:
+                ingr_files = [ingr_file]
+            else:
+                ingr_files = [f for f in program.target_files
+                              if program.engines[f] == program.engines[target_file]]
+            choices = []
+            for field in cls.fields:
+                if field == 'target':
+                    choices.append([(target_file, i)
+                                    for i in range(len(program.modification_points[target_file]))])
+                elif field == 'ingredient':
+                    choices.append([(f, i) for f in ingr_files
+                                    for i in range(len(program.modification_points[f]))])
+                elif field == 'direction':
+                    choices.append(['before', 'after'])
+                else:
+                    raise ValueError('Cannot enumerate the field {} of {}'.format(
+                        field, cls.__name__))
+            for values in itertools.product(*choices):
+                edit = cls(*values)
+                # The edits equivalent to another one are only generated once
+                if edit.normalise(program) == edit:
+                    yield edit
+
+    def normalise(self, program):
+        """
+        :param program: The program
+        :type program: :py:class:`.Program`
+        :return: The canonical form of the edit, so that equivalent edits are equal
+          (see :py:meth:`.Patch.add`), by default the edit itself
+        :rtype: :py:class:`.AbstractEdit`
+        """
+        return self
+
     @classmethod
     @abstractmethod
     def create(cls):
         """
         :return: The operator instance with randomly-selected properties.
         """
-        pass
\ No newline at end of file
+        pass
@@ -2,7 +2,8 @@
 This module contains Patch class.
 """
 import os
-from copy import deepcopy
+import json
+import marshal
 from . import AbstractEdit
 
 class Patch:
@@ -14,10 +15,26 @@ class Patch:
     dynamic information, such as the execution time or any other user-provided
     properties, via the predefined format that PYGGI recognises.
 
+    The edit list is an immutable tuple of immutable edits: adding or removing
+    an edit creates a new tuple, thus cloning a patch does not copy anything.
+
     """
     def __init__(self, program):
         self.program = program
-        self.edit_list = []
+        self.edit_list = ()
+
+    @property
+    def edit_list(self):
+        """
+        :return: The sequence of edits
+        :rtype: tuple(:py:class:`.AbstractEdit`)
+        """
+        return self._edit_list
+
+    @edit_list.setter
+    def edit_list(self, edit_list):
+        self._edit_list = tuple(edit_list)
+        self._hash = None
 
     def __str__(self):
         return ' | '.join(list(map(str, self.edit_list)))
@@ -28,6 +45,23 @@ class Patch:
     def __eq__(self, other):
         return isinstance(other, Patch) and self.edit_list == other.edit_list
 
+    def __hash__(self):
+        """
+        The hash only depends on the sequence of edits, so that patches
+        can be stored in sets or used as dictionary keys (e.g., tabu lists or caches).
+        A patch must not be modified while it is stored in such a container.
+        It is computed once for each edit list.
+        """
+        if self._hash is None:
+            self._hash = hash(self._edit_list)
+        return self._hash
+
+    def __getstate__(self):
+        # The hash of strings differs between processes
+        state = dict(self.__dict__)
+        state['_hash'] = None
+        return state
+
     def clone(self):
         """
         Create a new patch which has the same sequence of edits with the current one.
@@ -36,7 +70,7 @@ class Patch:
         :rtype: :py:class:`.Patch`
         """
         clone_patch = Patch(self.program)
-        clone_patch.edit_list = deepcopy(self.edit_list)
+        clone_patch.edit_list = self.edit_list
         return clone_patch
 
     @property
@@ -45,14 +79,15 @@ class Patch:
 
     def add(self, edit):
         """
-        Add an edit to the edit list
+        Add an edit to the edit list, in its canonical form
+        (see :py:meth:`.AbstractEdit.normalise`)
 
         :param edit: The edit to be added
         :type edit: :py:class:`.base.AbstractEdit`
         :return: None
         """
         assert isinstance(edit, AbstractEdit)
-        self.edit_list.append(edit)
+        self.edit_list += (edit.normalise(self.program),)
 
     def remove(self, index: int):
         """
@@ -60,4 +95,113 @@ class Patch:
 
         :param int index: The index of edit to delete
         """
-        del self.edit_list[index]
+        edit_list = list(self.edit_list)
+        del edit_list[index]
+        self.edit_list = tuple(edit_list)
+
+    def encode(self):
+        """
+        Encode the patch into a compact representation independent of the program.
+        Each edit is encoded as its type code followed by the values of its fields,
+        where the modification points are encoded as ``{"point": [file id, index]}``
+        with the file id being the index of the file in the target files of the program,
+        and the other tuples as lists.
+
+        :return: ``[edit type names, [[type code, field values..], ..]]``
+          (see :py:meth:`.AbstractEdit.type_name`)
+        :rtype: list
+        """
+        file_ids = {file_name: i for i, file_name in enumerate(self.program.target_files)}
+        def encode_value(value):
+            if isinstance(value, tuple):
+                if (len(value) == 2 and isinstance(value[1], int)
+                        and isinstance(value[0], str) and value[0] in file_ids):
+                    return {'point': [file_ids[value[0]], value[1]]}
+                return [encode_value(item) for item in value]
+            assert value is None or isinstance(value, (str, int, float))
+            return value
+
+        types = []
+        type_codes = dict()
+        edits = []
+        for edit in self.edit_list:
+            name = edit.type_name()
+            if name not in type_codes:
+                type_codes[name] = len(types)
+                types.append(name)
+            edits.append([type_codes[name]] + [encode_value(value) for value in edit.values])
+        return [types, edits]
+
+    @classmethod
+    def decode(cls, program, data):
+        """
+        :param program: The program to which the patch is bound
+        :type program: :py:class:`.Program`
+        :param data: The encoded patch, see :py:meth:`encode`
+        :type data: list
+        :return: The decoded patch
+        :rtype: :py:class:`.Patch`
+        """
+        target_files = program.target_files
+        def decode_value(value):
+            if isinstance(value, dict):
+                file_id, index = value['point']
+                return (target_files[file_id], index)
+            elif isinstance(value, (list, tuple)):
+                return tuple(decode_value(item) for item in value)
+            return value
+
+        types, edits = data
+        types = [AbstractEdit.registry[name] for name in types]
+        patch = cls(program)
+        patch.edit_list = tuple(types[edit[0]](*(decode_value(value) for value in edit[1:]))
+                                for edit in edits)
+        return patch
+
+    def to_json(self):
+        """
+        :return: The JSON form of :py:meth:`encode`
+        :rtype: str
+        """
+        return json.dumps(self.encode(), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, program, s):
+        return cls.decode(program, json.loads(s))
+
+    def to_bytes(self):
+        """
+        :return: The binary form of :py:meth:`encode` (using :py:mod:`marshal`,
+          thus only readable by the same version of Python)
+        :rtype: bytes
+        """
+        return marshal.dumps(self.encode())
+
+    @classmethod
+    def from_bytes(cls, program, b):
+        return cls.decode(program, marshal.loads(b))
+
+def encode_patches(value):
+    """
+    :return: The value where the patches are replaced by their encoding
+      (see :py:meth:`.Patch.encode`), in lists and dictionaries
+    """
+    if isinstance(value, Patch):
+        return (Patch.__name__, value.encode())
+    elif isinstance(value, dict):
+        return {key: encode_patches(item) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [encode_patches(item) for item in value]
+    return value
+
+def decode_patches(program, value):
+    """
+    :return: The value where the encoded patches are decoded, see :py:func:`encode_patches`
+    """
+    if isinstance(value, tuple) and len(value) == 2 and value[0] == Patch.__name__:
+        return Patch.decode(program, value[1])
+    elif isinstance(value, dict):
+        return {key: decode_patches(program, item) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [decode_patches(program, item) for item in value]
+    return value
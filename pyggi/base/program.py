@@ -6,6 +6,7 @@ This module contains GranularityLevel and Program class.
 import os
 import shutil
 import json
+import re
 import time
 import pathlib
 import random
@@ -15,16 +16,34 @@ import subprocess
 import shlex
 import copy
 import difflib
+import hashlib
 import signal
+import queue
+import threading
+import concurrent.futures
 from abc import ABC, abstractmethod
 from distutils.dir_util import copy_tree
 from .. import PYGGI_DIR
 from ..utils import Logger, weighted_choice
 
 class RunResult:
+    """
+    The result of a test run: its status (``'SUCCESS'`` if the fitness could be computed)
+    and its fitness value, either a number or a tuple of numbers for multiple objectives
+    (see :py:meth:`.AbstractProgram.compute_fitness`).
+
+    The durations (unit: seconds) of the phases of its evaluation are recorded in
+    :py:attr:`timings`: ``'apply'`` (applying the edits), ``'dump'`` (converting the
+    contents to source code), ``'cache'`` (looking up the variant cache), ``'syntax'``,
+    ``'write'`` (writing the files), ``'spawn'`` (starting the test process),
+    ``'test'`` (running the tests) and ``'parse'`` (computing the fitness),
+    a phase being missing if it did not happen (e.g., for a cached result).
+    """
     def __init__(self, status, fitness=None):
         self.status = status
         self.fitness = fitness
+        self.cached = False
+        self.timings = dict()
     def __str__(self):
         return '<{} {}>'.format(self.__class__.__name__, str(vars(self))[1:-1])
 
@@ -44,10 +63,92 @@ class AbstractEngine(ABC):
     def get_source(cls, program, file_name, index):
         pass
 
+    @classmethod
+    def get_line_ranges(cls, program, file_name):
+        """
+        :param program: The program instance
+        :type program: :py:class:`.Program`
+        :param str file_name: The target file name
+        :return: None if unsupported, otherwise the first and the last source
+          line (1-based, inclusive) of each modification point of the original file
+        :rtype: None or list(tuple(int, int))
+        """
+        return None
+
+    @classmethod
+    def filter_modification_points(cls, file_name, contents_of_file, modification_points):
+        """
+        :param str file_name: The target file name
+        :param contents_of_file: The contents of the file
+        :param modification_points: The modification points of the file
+        :return: The modification points worth editing (by default, all of them)
+        :rtype: list
+        """
+        return modification_points
+
+    @classmethod
+    def get_node_type(cls, program, file_name, index):
+        """
+        :param program: The program instance
+        :type program: :py:class:`.Program`
+        :param str file_name: The target file name
+        :param int index: The index of the modification point
+        :return: The kind of the modification point (e.g., the class of the AST node),
+          or None if unsupported
+        :rtype: None or str
+        """
+        return None
+
+    @classmethod
+    def get_ingredient_constraints(cls, program, file_name):
+        """
+        :param program: The program instance
+        :type program: :py:class:`.Program`
+        :param str file_name: The target file name
+        :return: None if unsupported, otherwise what each modification point of the file
+          requires to be used as an ingredient (e.g. an enclosing loop, the names it reads)
+          and what its position provides to an ingredient replacing it or inserted next to it,
+          an ingredient being compatible with a target if its requirements are a subset
+          of the provisions of the target (see :py:meth:`.AbstractProgram.random_ingredient`)
+        :rtype: None or tuple(list(frozenset(str)), list(frozenset(str)))
+        """
+        return None
+
+    @classmethod
+    def check_syntax(cls, file_name, source):
+        """
+        :param str file_name: The target file name
+        :param str source: The source code of the file, see :py:meth:`dump`
+        :return: False if the source code is known to be invalid, True otherwise
+        :rtype: bool
+        """
+        return True
+
+    @classmethod
+    def get_equivalence_key(cls, file_name, contents_of_file, source):
+        """
+        :param str file_name: The target file name
+        :param contents_of_file: The contents of the file
+        :param str source: The source code of the file, see :py:meth:`dump`
+        :return: The normalised form of the file, identical for
+          semantically equivalent contents (by default, the source code itself)
+        :rtype: str
+        """
+        return source
+
     @classmethod
     def write_to_tmp_dir(cls, contents_of_file, tmp_path):
+        cls.write_source(cls.dump(contents_of_file), tmp_path)
+
+    @classmethod
+    def write_source(cls, source, tmp_path):
+        """
+        :param str source: The source code of the file, see :py:meth:`dump`
+        :param str tmp_path: The path of the file in the temporary directory
+        :return: None
+        """
         with open(tmp_path, 'w') as tmp_file:
-            tmp_file.write(cls.dump(contents_of_file))
+            tmp_file.write(source)
 
     @classmethod
     @abstractmethod
@@ -72,6 +173,14 @@ class AbstractProgram(ABC):
         self.path = os.path.abspath(path.strip())
         self.name = os.path.basename(self.path)
         self.logger = Logger(self.name + '_' + self.timestamp)
+        self.lock = threading.Lock()
+        self.executor = None
+        # The results of the evaluated variants, least recently used first
+        self.variant_cache = collections.OrderedDict()
+        self.variant_cache_size = 0
+        self.normalise_variants = False
+        # Parse several numbers printed by the test command as multiple objectives
+        self.multi_objective = False
 
         # Create the temporary directory
         self.create_tmp_variant()
@@ -83,11 +192,23 @@ class AbstractProgram(ABC):
         # Associate each file to its engine
         self.load_engines()
 
+        # Per-test failure history used to prioritise the tests
+        self.prioritise_tests = False
+        self.fail_fast = False
+        self.test_history = dict()
+        self.num_test_runs = 0
+
         # Load actual contents using the engines
         self.load_contents()
         assert self.modification_points
         assert self.contents
 
+        # Record the per-test coverage of the original program
+        self.coverage = None
+        self.covering_tests = None
+        if self.coverage_command:
+            self.set_coverage(self.collect_coverage())
+
         self.logger.info("Path to the temporal program variants: {}".format(self.tmp_path))
 
     def __str__(self):
@@ -112,6 +233,8 @@ class AbstractProgram(ABC):
                 config = json.load(config_file)
         self.test_command = config['test_command']
         self.target_files = config['target_files']
+        self.coverage_command = config.get('coverage_command')
+        self.filter_points = config.get('filter_points', False)
         return config
 
     @classmethod
@@ -133,6 +256,29 @@ class AbstractProgram(ABC):
             engine = self.engines[file_name]
             self.contents[file_name] = engine.get_contents(os.path.join(self.path, file_name))
             self.modification_points[file_name] = engine.get_modification_points(self.contents[file_name])
+            if self.filter_points:
+                self.modification_points[file_name] = self.filter_modification_points(
+                    file_name, self.modification_points[file_name])
+        self.ingredient_index = dict()
+        self.ingredient_constraints = dict()
+        self.compatible_ingredients = dict()
+        self.points_by_type = dict()
+        self.syntax_checked = dict()
+
+    def filter_modification_points(self, file_name, modification_points):
+        """
+        Remove the modification points which are not worth editing, when the
+        ``filter_points`` option of the configuration is set. Override it to
+        customise the filter.
+
+        :param str file_name: The target file name
+        :param modification_points: The modification points of the file
+        :return: The relevant modification points, by default the ones kept by the engine
+          (see :py:meth:`.AbstractEngine.filter_modification_points`)
+        :rtype: list
+        """
+        return self.engines[file_name].filter_modification_points(
+            file_name, self.contents[file_name], modification_points)
 
     def set_weight(self, file_name, index, weight):
         """
@@ -168,6 +314,108 @@ class AbstractProgram(ABC):
             files = self.target_files
         return random.choice(files)
 
+    def get_ingredient_index(self, file_name):
+        """
+        The modification points of the file grouped by source code
+        (see :py:meth:`get_source`) and node type, computed once per file.
+
+        :param str file_name: The ingredient file name
+        :return: The canonical index of each modification point, i.e. the index of
+          the first point with the same source code and node type, and the distinct canonical indices
+        :rtype: tuple(list(int), list(int))
+        """
+        if file_name not in self.ingredient_index:
+            engine = self.engines[file_name]
+            first = dict()
+            canonical = [first.setdefault((engine.get_node_type(self, file_name, i),
+                                           self.get_source(file_name, i)), i)
+                         for i in range(len(self.modification_points[file_name]))]
+            self.ingredient_index[file_name] = (canonical, list(first.values()))
+        return self.ingredient_index[file_name]
+
+    def get_compatible_ingredients(self, target, ingr_file):
+        """
+        The distinct ingredients of the file whose requirements are met at the target
+        (see :py:meth:`.AbstractEngine.get_ingredient_constraints`), computed once per
+        set of provisions, from the ingredients grouped by requirements,
+        so that the targets with the same provisions share their ingredients.
+
+        :param target: The target (file name and index)
+        :type target: tuple(str, int)
+        :param str ingr_file: The ingredient file name
+        :return: The canonical indices of the compatible ingredients, all the distinct
+          ones if the engines do not support constraints
+        :rtype: list(int)
+        """
+        for file_name in {target[0], ingr_file}:
+            if file_name not in self.ingredient_constraints:
+                engine = self.engines[file_name]
+                constraints = engine.get_ingredient_constraints(self, file_name)
+                if constraints is not None:
+                    groups = dict()
+                    for i in self.get_ingredient_index(file_name)[1]:
+                        groups.setdefault(constraints[0][i], []).append(i)
+                    # The equal provisions are shared
+                    shared = dict()
+                    constraints = (groups, [shared.setdefault(frozenset(provisions), frozenset(provisions))
+                                            for provisions in constraints[1]])
+                self.ingredient_constraints[file_name] = constraints
+        target_constraints = self.ingredient_constraints[target[0]]
+        ingr_constraints = self.ingredient_constraints[ingr_file]
+        if target_constraints is None or ingr_constraints is None:
+            return self.get_ingredient_index(ingr_file)[1]
+        provisions = target_constraints[1][target[1]]
+        key = (provisions, ingr_file)
+        if key not in self.compatible_ingredients:
+            self.compatible_ingredients[key] = sorted(
+                i for requirements, indices in ingr_constraints[0].items()
+                if requirements <= provisions for i in indices)
+        return self.compatible_ingredients[key]
+
+    def get_points_by_type(self, file_name):
+        """
+        :param str file_name: The target file name
+        :return: The indices of the modification points of the file
+          by node type (see :py:meth:`.AbstractEngine.get_node_type`), computed once per file
+        :rtype: dict(str, list(int))
+        """
+        if file_name not in self.points_by_type:
+            engine = self.engines[file_name]
+            points_by_type = dict()
+            for i in range(len(self.modification_points[file_name])):
+                points_by_type.setdefault(engine.get_node_type(self, file_name, i), []).append(i)
+            self.points_by_type[file_name] = points_by_type
+        return self.points_by_type[file_name]
+
+    def random_ingredient(self, ingr_file=None, target=None):
+        """
+        :param str ingr_file: The ingredient is chosen within ingr_file
+        :param target: If given, the ingredient is chosen among the ones compatible
+          with the target (see :py:meth:`get_compatible_ingredients`), if any
+        :type target: None or tuple(str, int)
+        :return: A modification point chosen uniformly among the distinct source codes
+          of the file, as its canonical index (see :py:meth:`get_ingredient_index`)
+        :rtype: tuple(str, int)
+        """
+        if ingr_file is None:
+            ingr_file = random.choice(self.target_files)
+        candidates = self.get_ingredient_index(ingr_file)[1]
+        if target is not None:
+            candidates = self.get_compatible_ingredients(target, ingr_file) or candidates
+        return (ingr_file, random.choice(candidates))
+
+    def canonical_ingredient(self, ingredient):
+        """
+        :param ingredient: The ingredient (file name and index), or None
+        :type ingredient: None or tuple(str, int)
+        :return: The first modification point with the same source code
+        :rtype: None or tuple(str, int)
+        """
+        if ingredient is None:
+            return None
+        ingr_file, index = ingredient
+        return (ingr_file, self.get_ingredient_index(ingr_file)[0][index])
+
     def random_target(self, target_file=None, method="random"):
         """
         :param str target_file: The modification point is chosen within target_file
@@ -191,6 +439,133 @@ class AbstractProgram(ABC):
             #list_of_prob = list(map(lambda w: float(w)/cumulated_weights, self.modification_weights[target_file]))
             #return (target_file, random.choices(list(range(len(candidates))), weights=list_of_prob, k=1)[0])
 
+    def collect_coverage(self):
+        """
+        Run the coverage command on the original program and parse its output.
+        The command should print a JSON object mapping each test name
+        to the source lines (1-based) it executes in each target file, e.g.
+        ``{"test_a": {"triangle.py": [1, 2, 5]}}``.
+
+        :return: The per-test coverage map
+        :rtype: dict(str, dict(str, list(int)))
+        """
+        return_code, stdout, stderr, _ = self.exec_cmd(self.coverage_command, timeout=None)
+        if return_code is None:
+            raise Exception('Program', 'Coverage command timed out')
+        try:
+            return json.loads(stdout)
+        except ValueError:
+            raise Exception('Program', 'Cannot parse the coverage: {}'.format(stderr)) from None
+
+    def set_coverage(self, coverage):
+        """
+        Store the per-test coverage map and index, for every modification point,
+        the set of tests executing it.
+
+        :param coverage: The coverage map, see :py:meth:`collect_coverage`
+        :type coverage: dict(str, dict(str, list(int)))
+        :return: None
+        """
+        self.coverage = coverage
+        self.covering_tests = dict()
+        for file_name in self.target_files:
+            line_ranges = self.engines[file_name].get_line_ranges(self, file_name)
+            if line_ranges is None:
+                continue
+            tests_by_line = collections.defaultdict(set)
+            for test, lines_by_file in coverage.items():
+                for line in lines_by_file.get(file_name, []):
+                    tests_by_line[line].add(test)
+            self.covering_tests[file_name] = [
+                frozenset().union(*(tests_by_line.get(l, ()) for l in range(first, last + 1)))
+                for first, last in line_ranges]
+
+    def select_tests(self, patch):
+        """
+        Select the tests whose coverage intersects the modification points
+        edited by the patch.
+
+        :param patch: The patch
+        :type patch: :py:class:`.Patch`
+        :return: The sorted names of the selected tests,
+          or None if the whole test suite should be run
+        :rtype: None or list(str)
+        """
+        if self.covering_tests is None:
+            return None
+        selected = set()
+        for edit in patch.edit_list:
+            for file_name, index in edit.modified_points:
+                if file_name not in self.covering_tests:
+                    return None
+                selected.update(self.covering_tests[file_name][index])
+        return sorted(selected) or None
+
+    def get_failed_tests(self, return_code, stdout, stderr):
+        """
+        Parse the names of the failed tests from the output of the test command.
+        By default, every line starting with ``FAILED <test name>`` in the standard
+        output or error is recognised, as in the short test summary of *pytest*.
+
+        :return: The names of the failed tests
+        :rtype: list(str)
+        """
+        return re.findall(r'^FAILED (\S+)', stdout + '\n' + stderr, flags=re.MULTILINE)
+
+    def update_test_history(self, failed_tests):
+        """
+        :param failed_tests: The tests failed in the last test run
+        :type failed_tests: list(str)
+        :return: None
+        """
+        self.num_test_runs += 1
+        for test in failed_tests:
+            _, count = self.test_history.get(test, (0, 0))
+            self.test_history[test] = (self.num_test_runs, count + 1)
+
+    def prioritise(self, tests):
+        """
+        Sort the tests so that the tests which recently failed come first.
+        Ties are broken by the number of failures, then by the given order.
+
+        :param tests: The tests to sort
+        :type tests: list(str)
+        :return: The sorted tests
+        :rtype: list(str)
+        """
+        return sorted(tests, key=lambda test: self.test_history.get(test, (0, 0)), reverse=True)
+
+    def get_test_env(self, tests=None):
+        """
+        :param tests: The selected tests, None if the whole test suite is run
+        :type tests: None or list(str)
+        :return: The environment variables given to the test command:
+
+          - ``PYGGI_TESTS``: the selected tests
+          - ``PYGGI_TEST_ORDER``: the tests to run first, if :py:attr:`prioritise_tests`
+          - ``PYGGI_FAIL_FAST``: ``1`` if the test run should stop at the first failure
+        :rtype: dict(str, str)
+        """
+        env = dict()
+        if tests:
+            env['PYGGI_TESTS'] = ' '.join(tests)
+        if self.prioritise_tests and self.test_history:
+            env['PYGGI_TEST_ORDER'] = ' '.join(self.prioritise(list(self.test_history)))
+        if self.fail_fast:
+            env['PYGGI_FAIL_FAST'] = '1'
+        return env
+
+    def get_test_command(self, tests=None):
+        """
+        :param tests: The tests to run, None to run the whole test suite
+        :type tests: None or list(str)
+        :return: The test command where the ``{tests}`` placeholder is
+          replaced with the given tests
+        :rtype: str
+        """
+        return self.test_command.replace(
+            '{tests}', ' '.join(map(shlex.quote, tests or [])))
+
     @property
     def tmp_path(self):
         """
@@ -210,21 +585,181 @@ class AbstractProgram(ABC):
         copy_tree(self.path, self.tmp_path)
 
     def remove_tmp_variant(self):
+        self.set_workers(0)
         shutil.rmtree(self.tmp_path)
 
-    def write_to_tmp_dir(self, new_contents):
+    def copy_variant(self, suffix):
+        """
+        Copy the program such that the copy evaluates the patches in its own copy
+        of the temporary directory, e.g. in another process.
+        Remove it with :py:meth:`remove_tmp_variant` once done.
+
+        :param str suffix: The suffix of the temporary directory of the copy
+        :return: The copy of the program
+        :rtype: :py:class:`.AbstractProgram`
+        """
+        program = copy.copy(self)
+        program.timestamp = '{}_{}'.format(self.timestamp, suffix)
+        program.lock = threading.Lock()
+        program.executor = None
+        program.variant_cache = collections.OrderedDict(self.variant_cache)
+        program.test_history = dict(self.test_history)
+        if os.path.exists(program.tmp_path):
+            shutil.rmtree(program.tmp_path)
+        shutil.copytree(self.tmp_path, program.tmp_path, symlinks=True)
+        return program
+
+    def set_workers(self, workers=None):
+        """
+        Set the number of patches evaluated concurrently by
+        :py:meth:`submit_patch` and :py:meth:`evaluate_patches`.
+        Each worker is a thread evaluating patches in its own copy of the
+        temporary directory. As the test runs are subprocesses, they run in parallel.
+
+        :param workers: The number of workers, by default the number of CPUs.
+          If 0, the workers and their directories are removed.
+        :type workers: None or int
+        :return: None
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            while not self.free_workers.empty():
+                shutil.rmtree(self.free_workers.get())
+            self.executor = None
+        if workers == 0:
+            return
+        workers = workers or os.cpu_count() or 1
+        self.free_workers = queue.Queue()
+        for i in range(workers):
+            worker_path = '{}_{}'.format(self.tmp_path, i)
+            if os.path.exists(worker_path):
+                shutil.rmtree(worker_path)
+            shutil.copytree(self.tmp_path, worker_path, symlinks=True)
+            self.free_workers.put(worker_path)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    def submit_patch(self, patch, timeout=15, select_tests=True):
+        """
+        Schedule the evaluation of the patch by one of the workers,
+        see :py:meth:`set_workers`.
+
+        :param patch: The patch to evaluate
+        :type patch: :py:class:`.Patch`
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param bool select_tests: If only the tests covering the edits are run,
+          see :py:meth:`evaluate_patch`
+        :return: The future result of :py:meth:`evaluate_patch`
+        :rtype: :py:class:`concurrent.futures.Future`
+        """
+        if self.executor is None:
+            self.set_workers()
+        return self.executor.submit(self.evaluate_patch_in_worker, patch, timeout, select_tests)
+
+    def evaluate_patch_in_worker(self, patch, timeout=15, select_tests=True):
+        tmp_path = self.free_workers.get()
+        try:
+            return self.evaluate_patch(patch, timeout=timeout, select_tests=select_tests, tmp_path=tmp_path)
+        finally:
+            self.free_workers.put(tmp_path)
+
+    def evaluate_patches(self, patches, timeout=15, select_tests=True):
+        """
+        Evaluate the patches concurrently, see :py:meth:`set_workers`.
+
+        :param patches: The patches to evaluate
+        :type patches: list(:py:class:`.Patch`)
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param bool select_tests: If only the tests covering the edits are run,
+          see :py:meth:`evaluate_patch`
+        :return: The results of the patches, in the same order
+        :rtype: list(:py:class:`.RunResult`)
+        """
+        futures = [self.submit_patch(patch, timeout, select_tests) for patch in patches]
+        return [future.result() for future in futures]
+
+    def write_to_tmp_dir(self, new_contents, tmp_path=None):
         """
         Write new contents to the temporary directory of program
 
         :param new_contents: The new contents of the program.
           Refer to *apply* method of :py:class:`.patch.Patch`
         :type new_contents: dict(str, ?)
+        :param str tmp_path: The directory to write into, by default the temporary directory
         :rtype: None
         """
         for target_file in new_contents:
             engine = self.engines[target_file]
-            tmp_path = os.path.join(self.tmp_path, target_file)
-            engine.write_to_tmp_dir(new_contents[target_file], tmp_path)
+            file_path = os.path.join(tmp_path or self.tmp_path, target_file)
+            engine.write_to_tmp_dir(new_contents[target_file], file_path)
+
+    def write_sources_to_tmp_dir(self, sources, tmp_path=None):
+        """
+        Write the source codes to the temporary directory of program
+
+        :param sources: The source code of each target file
+        :type sources: dict(str, str)
+        :param str tmp_path: The directory to write into, by default the temporary directory
+        :rtype: None
+        """
+        for target_file in sources:
+            engine = self.engines[target_file]
+            file_path = os.path.join(tmp_path or self.tmp_path, target_file)
+            engine.write_source(sources[target_file], file_path)
+
+    def check_syntax(self, file_name, source):
+        """
+        Check in-process whether the source code of a program variant can be valid,
+        before running the test command. By default, the engine of the file decides.
+        Override it to provide a custom check.
+
+        :param str file_name: The target file name
+        :param str source: The source code of the file
+        :return: False if the source code is known to be invalid, True otherwise
+        :rtype: bool
+        """
+        return self.engines[file_name].check_syntax(file_name, source)
+
+    def can_check_syntax(self, file_name):
+        """
+        The syntax check of a file is only used if it accepts the original source code
+        of the file, as a check rejecting valid code (e.g., the braces of a C file
+        split by ``#ifdef``) would reject every variant. It is verified once per file.
+
+        :param str file_name: The target file name
+        :return: If the variants of the file can be checked by :py:meth:`check_syntax`
+        :rtype: bool
+        """
+        if file_name not in self.syntax_checked:
+            checked = self.check_syntax(file_name, self.dump(self.contents, file_name))
+            if not checked:
+                self.logger.warning("The syntax check of {} is disabled as it rejects the original file".format(
+                    file_name))
+            self.syntax_checked[file_name] = checked
+        return self.syntax_checked[file_name]
+
+    def get_variant_key(self, sources, new_contents=None):
+        """
+        :param sources: The source code of each target file
+        :type sources: dict(str, str)
+        :param new_contents: The contents of the program variant
+        :type new_contents: None or dict(str, ?)
+        :return: The key identifying the program variant in the cache.
+          If :py:attr:`normalise_variants` is set and *new_contents* is given,
+          the equivalence keys of the engines are used instead of the source codes
+          (see :py:meth:`.AbstractEngine.get_equivalence_key`), so that
+          equivalent variants share the same result.
+        :rtype: bytes
+        """
+        digest = hashlib.sha1()
+        for file_name in self.target_files:
+            if self.normalise_variants and new_contents is not None:
+                key = self.engines[file_name].get_equivalence_key(
+                    file_name, new_contents[file_name], sources[file_name])
+            else:
+                key = sources[file_name]
+            digest.update(key.encode())
+            digest.update(b'\0')
+        return digest.digest()
 
     def dump(self, contents, file_name):
         """
@@ -246,11 +781,12 @@ class AbstractProgram(ABC):
                 edit.apply(self, new_contents, modification_points)
         return new_contents
 
-    def apply(self, patch):
+    def apply(self, patch, tmp_path=None):
         """
         This method applies the patch to the target program.
         It does not directly modify the source code of the original program,
-        but modifies the copied program within the temporary directory.
+        but modifies the copied program within the temporary directory
+        (or *tmp_path* if given).
 
         :return: The contents of the patch-applied program, See *Hint*.
         :rtype: dict(str, list(str))
@@ -260,13 +796,23 @@ class AbstractProgram(ABC):
             - value: The contents of the file
         """
         new_contents = self.get_modified_contents(patch)
-        self.write_to_tmp_dir(new_contents)
+        self.write_to_tmp_dir(new_contents, tmp_path)
         return new_contents
 
-    def exec_cmd(self, cmd, timeout=15):
-        cwd = os.getcwd()
-        os.chdir(self.tmp_path)
-        kwargs = {}
+    def exec_cmd(self, cmd, timeout=15, env=None, cwd=None):
+        """
+        :param str cmd: The command to execute
+        :param float timeout: The time limit (unit: seconds)
+        :param env: The additional environment variables
+        :type env: None or dict(str, str)
+        :param str cwd: The working directory, by default the temporary directory
+        :return: The return code, the standard output and error, and the elapsed time,
+          or only None values if the timeout is expired
+        :rtype: tuple(int, str, str, float)
+        """
+        kwargs = {'cwd': cwd or self.tmp_path}
+        if env:
+            kwargs['env'] = dict(os.environ, **env)
         if os.name == 'posix':
             kwargs['preexec_fn'] = os.setsid
         elif os.name == 'nt':
@@ -292,24 +838,169 @@ class AbstractProgram(ABC):
                 sprocess.kill()
             _, _ = sprocess.communicate()
             return (None, None, None, None)
-        finally:
-            os.chdir(cwd)
 
     def compute_fitness(self, result, return_code, stdout, stderr, elapsed_time):
+        """
+        Set the fitness value of the result from the output of the test command,
+        which should be a number, or, if :py:attr:`multi_objective` is set,
+        several numbers separated by whitespaces (the fitness value is then a tuple).
+        If the output cannot be parsed, the status is set to ``'PARSE_ERROR'``.
+        """
         try:
-            result.fitness = float(stdout.strip())
+            values = tuple(map(float, stdout.split()))
+            assert len(values) == 1 or (self.multi_objective and values)
+            result.fitness = values[0] if len(values) == 1 else values
         except:
             result.status = 'PARSE_ERROR'
 
-    def evaluate_patch(self, patch, timeout=15):
-        # apply + run
-        self.apply(patch)
-        return_code, stdout, stderr, elapsed_time = self.exec_cmd(self.test_command, timeout)
+    def evaluate_patch(self, patch, timeout=15, select_tests=True, tmp_path=None, use_cache=True):
+        """
+        :param patch: The patch to evaluate
+        :type patch: :py:class:`.Patch`
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param bool select_tests: If the per-test coverage is available, run only
+          the tests covering the edited modification points. They are given to the
+          test command via the ``{tests}`` placeholder and
+          the ``PYGGI_TESTS`` environment variable (see :py:meth:`get_test_env`).
+        :param str tmp_path: The directory where the patch is evaluated,
+          by default the temporary directory
+        :param bool use_cache: If the patch-applied program is identical to
+          an already evaluated variant (e.g., the original program or the parent
+          patch), return its result (with ``cached`` set) without running the tests.
+          The result is stored in the cache in any case.
+          The cache is only enabled if :py:attr:`variant_cache_size` is positive
+          (see :py:meth:`cache_result`).
+
+        If the source code of an edited file is invalid (see :py:meth:`check_syntax`
+        and :py:meth:`can_check_syntax`),
+        the tests are not run and the status of the result is ``'COMPILE_ERROR'``.
+        :return: The result of the test run
+        :rtype: :py:class:`.RunResult`
+        """
+        # apply
+        timings = dict()
+        start = time.perf_counter()
+        new_contents = self.get_modified_contents(patch)
+        timings['apply'], start = time.perf_counter() - start, time.perf_counter()
+        sources = {file_name: self.dump(new_contents, file_name) for file_name in self.target_files}
+        timings['dump'], start = time.perf_counter() - start, time.perf_counter()
+        tests = self.select_tests(patch) if select_tests else None
+        key = None
+        if self.variant_cache_size > 0:
+            key = (self.get_variant_key(sources, new_contents), tuple(tests or ()), self.fail_fast)
+            cached = self.get_cached_result(key) if use_cache else None
+            timings['cache'], start = time.perf_counter() - start, time.perf_counter()
+            if cached is not None:
+                result = copy.copy(cached)
+                result.cached = True
+                result.timings = timings
+                return result
+        edited_files = set(point[0] for edit in patch.edit_list for point in edit.modified_points)
+        if not all(self.check_syntax(file_name, sources[file_name]) for file_name in edited_files
+                   if self.can_check_syntax(file_name)):
+            result = RunResult('COMPILE_ERROR')
+            timings['syntax'] = time.perf_counter() - start
+            result.timings = timings
+            self.cache_result(key, result)
+            return result
+        timings['syntax'], start = time.perf_counter() - start, time.perf_counter()
+        self.write_variant(patch, sources, tmp_path)
+        timings['write'] = time.perf_counter() - start
+
+        # run
+        result = self.run_tests(tests, timeout, tmp_path)
+        result.timings = dict(timings, **result.timings)
+        self.cache_result(key, result)
+        return result
+
+    def get_cached_result(self, key):
+        """
+        :param key: The key of the variant, see :py:meth:`get_variant_key`
+        :return: The cached result of the variant, if any
+        :rtype: None or :py:class:`.RunResult`
+        """
+        with self.lock:
+            result = self.variant_cache.get(key)
+            if result is not None:
+                self.variant_cache.move_to_end(key)
+            return result
+
+    def cache_result(self, key, result):
+        """
+        Store the result of a variant in the cache, which keeps the
+        :py:attr:`variant_cache_size` most recently used results (0 to disable the cache).
+        As a cached result is returned for every later evaluation of the variant,
+        the cache should not be enabled if the fitness is noisy (e.g., the execution time).
+
+        :param key: The key of the variant, see :py:meth:`get_variant_key`
+        :param result: The result of the variant
+        :type result: :py:class:`.RunResult`
+        :return: None
+        """
+        if key is None or self.variant_cache_size <= 0:
+            return
+        with self.lock:
+            self.variant_cache[key] = result
+            self.variant_cache.move_to_end(key)
+            while len(self.variant_cache) > self.variant_cache_size:
+                self.variant_cache.popitem(last=False)
+
+    def write_variant(self, patch, sources, tmp_path=None):
+        """
+        Write the patch-applied program to the temporary directory (or *tmp_path*).
+        If a subclass overrides :py:meth:`apply`, it is called to write the program,
+        otherwise the already rendered source codes are written.
+
+        :param patch: The patch
+        :type patch: :py:class:`.Patch`
+        :param sources: The source code of each target file
+        :type sources: dict(str, str)
+        :param str tmp_path: The directory to write into, by default the temporary directory
+        :return: None
+        """
+        if type(self).apply is AbstractProgram.apply:
+            self.write_sources_to_tmp_dir(sources, tmp_path)
+        elif tmp_path is None:
+            self.apply(patch)
+        else:
+            self.apply(patch, tmp_path)
+
+    def run_tests(self, tests, timeout=15, tmp_path=None):
+        """
+        Run the test command in the temporary directory and compute the fitness.
+
+        :param tests: The selected tests, None to run the whole test suite
+        :type tests: None or list(str)
+        :param float timeout: The time limit of test run (unit: seconds)
+        :param str tmp_path: The directory where the tests are run,
+          by default the temporary directory
+        :return: The result of the test run, with the ``'spawn'``, ``'test'`` and
+          ``'parse'`` timings (only ``'test'`` if the timeout is expired)
+        :rtype: :py:class:`.RunResult`
+        """
+        with self.lock:
+            if tests and self.prioritise_tests:
+                tests = self.prioritise(tests)
+            env = self.get_test_env(tests)
+        start = time.perf_counter()
+        return_code, stdout, stderr, elapsed_time = self.exec_cmd(
+            self.get_test_command(tests), timeout, env=env, cwd=tmp_path)
+        total_time = time.perf_counter() - start
         if return_code is None: # timeout
-            return RunResult('TIMEOUT')
+            result = RunResult('TIMEOUT')
+            result.timings['test'] = total_time
+            return result
         else:
+            if self.prioritise_tests:
+                with self.lock:
+                    self.update_test_history(self.get_failed_tests(return_code, stdout, stderr))
             result = RunResult('SUCCESS', None)
+            # The elapsed time of exec_cmd only covers the test run, the rest is the process spawn
+            result.timings['spawn'] = max(0.0, total_time - elapsed_time)
+            result.timings['test'] = min(total_time, elapsed_time)
+            start = time.perf_counter()
             self.compute_fitness(result, return_code, stdout, stderr, elapsed_time)
+            result.timings['parse'] = time.perf_counter() - start
             assert not (result.status == 'SUCCESS' and result.fitness is None)
             return result
 
@@ -1,5 +1,7 @@
+import re
 from abc import abstractmethod
 from ..base import AbstractEngine
+from ..utils import check_syntax, normalise_source, get_file_extension
 
 class AbstractLineEngine(AbstractEngine):
     @classmethod
@@ -18,6 +20,42 @@ class AbstractLineEngine(AbstractEngine):
         pass
 
 class LineEngine(AbstractLineEngine):
+    #: The line comment, and the start and end of the block comments, by file extension
+    COMMENTS = {
+        '.py': ('#', None, None),
+        '.sh': ('#', None, None),
+        '.rb': ('#', None, None),
+        '.java': ('//', '/*', '*/'),
+        '.c': ('//', '/*', '*/'),
+        '.h': ('//', '/*', '*/'),
+        '.cc': ('//', '/*', '*/'),
+        '.cpp': ('//', '/*', '*/'),
+        '.hpp': ('//', '/*', '*/'),
+        '.cs': ('//', '/*', '*/'),
+        '.js': ('//', '/*', '*/'),
+        '.ts': ('//', '/*', '*/'),
+        '.go': ('//', '/*', '*/'),
+        '.kt': ('//', '/*', '*/'),
+        '.scala': ('//', '/*', '*/'),
+        '.rs': ('//', '/*', '*/')
+    }
+    #: The lines which have no behavioural effect to edit, by file extension (the code without comments)
+    IRRELEVANT_LINES = {
+        '.py': re.compile(r'\s*(import\s|from\s+\S+\s+import\s)'),
+        '.java': re.compile(r'\s*(import|package)\s'),
+        '.c': re.compile(r'\s*#\s*include\b'),
+        '.h': re.compile(r'\s*#\s*include\b'),
+        '.cc': re.compile(r'\s*#\s*include\b'),
+        '.cpp': re.compile(r'\s*#\s*include\b'),
+        '.hpp': re.compile(r'\s*#\s*include\b'),
+        '.cs': re.compile(r'\s*using\s+[\w.]+\s*;'),
+        '.go': re.compile(r'\s*(import|package)\b'),
+        '.kt': re.compile(r'\s*(import|package)\s'),
+        '.scala': re.compile(r'\s*(import|package)\s')
+    }
+    #: The blank lines and the lines of lone braces, brackets and separators
+    EMPTY_LINE = re.compile(r'[\s{}()\[\];,]*$')
+
     @classmethod
     def get_contents(cls, file_path):
         with open(file_path, 'r') as target_file:
@@ -27,20 +65,84 @@ class LineEngine(AbstractLineEngine):
     def get_modification_points(cls, contents_of_file):
         return list(range(len(contents_of_file)))
 
+    @classmethod
+    def filter_modification_points(cls, file_name, contents_of_file, modification_points):
+        """
+        Remove the blank lines, the comments, the lone braces and the import lines
+        (see :py:attr:`IRRELEVANT_LINES`) according to the extension of the file.
+        """
+        code = cls.strip_comments(file_name, contents_of_file)
+        irrelevant = cls.IRRELEVANT_LINES.get(get_file_extension(file_name))
+        return [i for i in modification_points
+                if not cls.EMPTY_LINE.match(code[i]) and not (irrelevant and irrelevant.match(code[i]))]
+
+    @classmethod
+    def strip_comments(cls, file_name, contents_of_file):
+        """
+        :param str file_name: The target file name
+        :param contents_of_file: The lines of the file
+        :type contents_of_file: list(str)
+        :return: The lines without their comments (see :py:attr:`COMMENTS`),
+          the comment delimiters in string literals being ignored
+        :rtype: list(str)
+        """
+        line_comment, block_start, block_end = cls.COMMENTS.get(get_file_extension(file_name), (None, None, None))
+        delimiters = [re.escape(d) for d in (line_comment, block_start) if d]
+        if not delimiters:
+            return list(contents_of_file)
+        pattern = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|' + '|'.join(delimiters))
+        code = []
+        in_block = False
+        for line in contents_of_file:
+            stripped, pos = '', 0
+            while pos < len(line):
+                if in_block:
+                    end = line.find(block_end, pos)
+                    if end < 0:
+                        break
+                    in_block, pos = False, end + len(block_end)
+                    continue
+                match = pattern.search(line, pos)
+                if match is None:
+                    stripped += line[pos:]
+                    break
+                stripped += line[pos:match.start()]
+                if match.group() == line_comment:
+                    break
+                elif match.group() == block_start:
+                    in_block, pos = True, match.end()
+                else:
+                    stripped, pos = stripped + match.group(), match.end()
+            code.append(stripped)
+        return code
+
     @classmethod
     def get_source(cls, program, file_name, index):
-        return program.contents[file_name][index]
+        return program.contents[file_name][program.modification_points[file_name][index]]
     
+    @classmethod
+    def get_line_ranges(cls, program, file_name):
+        return [(i + 1, i + 1) for i in program.modification_points[file_name]]
+
     @classmethod
     def dump(cls, contents_of_file):
         return '\n'.join(contents_of_file) + '\n'
 
+    @classmethod
+    def check_syntax(cls, file_name, source):
+        return check_syntax(file_name, source)
+
+    @classmethod
+    def get_equivalence_key(cls, file_name, contents_of_file, source):
+        return normalise_source(file_name, source)
+
     @classmethod
     def do_replace(cls, program, op, new_contents, modification_points):
         l_f, l_n = op.target # line file and line number
         if op.ingredient:
             i_f, i_n = op.ingredient
-            new_contents[l_f][modification_points[l_f][l_n]] = program.contents[i_f][i_n]
+            new_contents[l_f][modification_points[l_f][l_n]] = \
+                program.contents[i_f][program.modification_points[i_f][i_n]]
         else:
             new_contents[l_f][modification_points[l_f][l_n]] = ''
         return True
@@ -52,14 +154,14 @@ class LineEngine(AbstractLineEngine):
         if op.direction == 'before':
             new_contents[l_f].insert(
                 modification_points[l_f][l_n],
-                program.contents[i_f][i_n]
+                program.contents[i_f][program.modification_points[i_f][i_n]]
             )
             for i in range(l_n, len(modification_points[l_f])):
                 modification_points[l_f][i] += 1
         elif op.direction == 'after':
             new_contents[l_f].insert(
                 modification_points[l_f][l_n] + 1,
-                program.contents[i_f][i_n]
+                program.contents[i_f][program.modification_points[i_f][i_n]]
             )
             for i in range(l_n + 1, len(modification_points[l_f])):
                 modification_points[l_f][i] += 1
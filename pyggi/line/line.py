@@ -13,19 +13,30 @@ class LineProgram(AbstractProgram):
 Possible Edit Operators
 """
 class LineEdit(AbstractEdit):
+    __slots__ = ()
+    engine = AbstractLineEngine
+
     @property
     def domain(self):
         return LineProgram
 
 class LineReplacement(LineEdit):
+    __slots__ = ('target', 'ingredient')
+
     def __init__(self, target, ingredient):
-        self.target = target
-        self.ingredient = ingredient
+        super().__init__(target, ingredient)
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
         return engine.do_replace(program, self, new_contents, modification_points)
 
+    def normalise(self, program):
+        # Identical lines are the same ingredient
+        ingredient = program.canonical_ingredient(self.ingredient)
+        if ingredient == self.ingredient:
+            return self
+        return self.__class__(self.target, ingredient)
+
     @classmethod
     def create(cls, program, target_file=None, ingr_file=None, method='random'):
         if target_file is None:
@@ -34,19 +45,26 @@ class LineReplacement(LineEdit):
             ingr_file = program.random_file(engine=program.engines[target_file])
         assert program.engines[target_file] == program.engines[ingr_file]
         return cls(program.random_target(target_file, method),
-                   program.random_target(ingr_file, 'random'))
+                   program.random_ingredient(ingr_file))
 
 class LineInsertion(LineEdit):
+    __slots__ = ('target', 'ingredient', 'direction')
+
     def __init__(self, target, ingredient, direction='before'):
         assert direction in ['before', 'after']
-        self.target = target
-        self.ingredient = ingredient
-        self.direction = direction
+        super().__init__(target, ingredient, direction)
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
         return engine.do_insert(program, self, new_contents, modification_points)
 
+    def normalise(self, program):
+        # Identical lines are the same ingredient
+        ingredient = program.canonical_ingredient(self.ingredient)
+        if ingredient == self.ingredient:
+            return self
+        return self.__class__(self.target, ingredient, self.direction)
+
     @classmethod
     def create(cls, program, target_file=None, ingr_file=None, direction=None, method='random'):
         if target_file is None:
@@ -57,12 +75,14 @@ class LineInsertion(LineEdit):
         if direction is None:
             direction = random.choice(['before', 'after'])
         return cls(program.random_target(target_file, method),
-                   program.random_target(ingr_file, 'random'),
+                   program.random_ingredient(ingr_file),
                    direction)
 
 class LineDeletion(LineEdit):
+    __slots__ = ('target',)
+
     def __init__(self, target):
-        self.target = target
+        super().__init__(target)
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
@@ -75,19 +95,20 @@ class LineDeletion(LineEdit):
         return cls(program.random_target(target_file, method))
 
 class LineMoving(LineEdit):
+    __slots__ = ('target', 'ingredient', 'direction')
+
     def __init__(self, target, ingredient, direction='before'):
         assert direction in ['before', 'after']
-        self.target = target
-        self.ingredient = ingredient
-        self.direction = direction
+        super().__init__(target, ingredient, direction)
+
+    @property
+    def modified_points(self):
+        return [self.target, self.ingredient]
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
         engine.do_insert(program, self, new_contents, modification_points)
-        self.target, self.ingredient = self.ingredient, self.target
-        return_code = engine.do_delete(program, self, new_contents, modification_points)
-        self.target, self.ingredient = self.ingredient, self.target
-        return return_code
+        return engine.do_delete(program, LineDeletion(self.ingredient), new_contents, modification_points)
 
     @classmethod
     def create(cls, program, target_file=None, ingr_file=None, direction='before', method='random'):
@@ -1,5 +1,7 @@
 from .abstract_engine import AbstractTreeEngine
 from .astor_engine import AstorEngine
+from .astor_expr_engine import AstorExprEngine
 from .xml_engine import XmlEngine
 from .tree import StmtReplacement, StmtInsertion, StmtDeletion, StmtMoving
+from .tree import ExprReplacement, OperatorReplacement
 from .tree import TreeProgram
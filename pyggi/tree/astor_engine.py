@@ -1,7 +1,9 @@
 import ast
 import astor
 import copy
+import builtins
 from . import AbstractTreeEngine
+from ..utils import check_python_syntax
 
 class AstorEngine(AbstractTreeEngine):
     @classmethod
@@ -27,10 +29,190 @@ class AstorEngine(AbstractTreeEngine):
                                        program.modification_points[file_name][index])
         return astor.to_source(blk[idx])
 
+    @classmethod
+    def get_line_ranges(cls, program, file_name):
+        line_ranges = []
+        for pos in program.modification_points[file_name]:
+            blk, idx = cls.pos_2_block_n_index(program.contents[file_name], pos)
+            last = max(getattr(n, 'end_lineno', None) or getattr(n, 'lineno', 0)
+                       for n in ast.walk(blk[idx]))
+            line_ranges.append((blk[idx].lineno, max(blk[idx].lineno, last)))
+        return line_ranges
+
+    @classmethod
+    def get_node_type(cls, program, file_name, index):
+        blk, idx = cls.pos_2_block_n_index(program.contents[file_name],
+                                           program.modification_points[file_name][index])
+        return blk[idx].__class__.__name__
+
     @classmethod
     def dump(cls, contents_of_file):
         return astor.to_source(contents_of_file)
 
+    @classmethod
+    def check_syntax(cls, file_name, source):
+        return check_python_syntax(source)
+
+    @classmethod
+    def get_equivalence_key(cls, file_name, contents_of_file, source):
+        return cls.dump_normalised(contents_of_file)
+
+    @classmethod
+    def dump_normalised(cls, node):
+        """
+        :param node: The AST node
+        :type node: :py:class:`ast.AST`
+        :return: The dump of the node (without positions) where the statements
+          without effect (*pass* statements in non-empty blocks and
+          constant expressions other than docstrings) are removed
+        :rtype: str
+        """
+        if isinstance(node, list):
+            return '[{}]'.format(','.join(map(cls.dump_normalised, node)))
+        elif not isinstance(node, ast.AST):
+            return repr(node)
+        fields = []
+        for name, value in ast.iter_fields(node):
+            if name in ['body', 'orelse', 'finalbody'] and isinstance(value, list):
+                stmts = [stmt for i, stmt in enumerate(value)
+                         if not isinstance(stmt, ast.Pass)
+                         and not (i > 0 and isinstance(stmt, ast.Expr) and cls.is_constant(stmt.value))]
+                value = stmts or value[:1]
+            fields.append(cls.dump_normalised(value))
+        return '{}({})'.format(node.__class__.__name__, ','.join(fields))
+
+    @staticmethod
+    def is_constant(node):
+        return isinstance(node, (getattr(ast, 'Constant', ()), getattr(ast, 'Str', ()), getattr(ast, 'Num', ())))
+
+    LOOPS = (ast.For, ast.AsyncFor, ast.While)
+    FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+    SCOPES = FUNCTIONS + (ast.ClassDef,)
+    COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+    @classmethod
+    def get_ingredient_constraints(cls, program, file_name):
+        """
+        A statement requires ``'loop'`` if it contains a *break* or *continue*
+        outside of its own loops, ``'function'`` if it contains a *return*, *yield*,
+        *await* or *nonlocal* outside of its own functions, and ``'name:x'`` for each
+        non-builtin name *x* it reads without binding it.
+        A position provides ``'loop'`` and ``'function'`` if it is in the body of
+        a loop or function (of the same scope), and the names visible in its scope
+        (see :py:meth:`visible_names`).
+        """
+        root = program.contents[file_name]
+        scope_names = dict()
+        def names_of(scopes):
+            if scopes not in scope_names:
+                scope_names[scopes] = frozenset('name:' + name for name in cls.visible_names(scopes))
+            return scope_names[scopes]
+
+        requirements, provisions = [], []
+        for pos in program.modification_points[file_name]:
+            node, scopes = root, (root,)
+            loop = function = False
+            for attr, i in pos:
+                if isinstance(node, cls.SCOPES):
+                    scopes += (node,)
+                    loop, function = False, isinstance(node, cls.FUNCTIONS)
+                elif isinstance(node, cls.LOOPS) and attr == 'body':
+                    loop = True
+                node = getattr(node, attr)[i]
+            provided = {'loop'} if loop else set()
+            if function:
+                provided.add('function')
+            provisions.append(names_of(scopes) | provided)
+            requirements.append(cls.get_requirements(node))
+        return requirements, provisions
+
+    @classmethod
+    def visible_names(cls, scopes):
+        """
+        :param scopes: The module and the scopes enclosing a position, from the outermost
+        :type scopes: tuple(:py:class:`ast.AST`)
+        :return: The names bound in the scopes, except in the class bodies
+          enclosing the innermost scope (they are not visible in their methods)
+        :rtype: set(str)
+        """
+        names = cls.bound_names(scopes[-1])
+        for scope in scopes[:-1]:
+            if not isinstance(scope, ast.ClassDef):
+                names |= cls.bound_names(scope)
+        return names
+
+    @classmethod
+    def bound_names(cls, scope):
+        """
+        :param scope: The module, class or function
+        :type scope: :py:class:`ast.AST`
+        :return: The names bound in the scope (excluding its nested scopes and the targets
+          of its comprehensions, local to them)
+        :rtype: set(str)
+        """
+        names = set()
+        stack = list(ast.iter_child_nodes(scope))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(node.name)
+                continue
+            elif isinstance(node, ast.Lambda):
+                continue
+            elif isinstance(node, cls.COMPREHENSIONS):
+                stack.append(node.generators[0].iter)
+                continue
+            names |= cls.get_binding(node)
+            stack.extend(ast.iter_child_nodes(node))
+        return names
+
+    @staticmethod
+    def get_binding(node):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            return {node.id}
+        elif isinstance(node, ast.arg):
+            return {node.arg}
+        elif isinstance(node, ast.alias):
+            return {(node.asname or node.name).split('.')[0]}
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return {node.name}
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            return {node.name}
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            return set(node.names)
+        return set()
+
+    @classmethod
+    def get_requirements(cls, stmt):
+        """
+        :param stmt: The statement
+        :type stmt: :py:class:`ast.stmt`
+        :return: The requirements of the statement, see :py:meth:`get_ingredient_constraints`
+        :rtype: frozenset(str)
+        """
+        requirements = set()
+        loaded, bound = set(), set()
+        stack = [(stmt, False, False)]
+        while stack:
+            node, loop, function = stack.pop()
+            if isinstance(node, (ast.Break, ast.Continue)) and not loop:
+                requirements.add('loop')
+            elif isinstance(node, (ast.Return, ast.Yield, ast.YieldFrom, ast.Await, ast.Nonlocal)) and not function:
+                requirements.add('function')
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                loaded.add(node.id)
+            bound |= cls.get_binding(node)
+            for field, value in ast.iter_fields(node):
+                for child in value if isinstance(value, list) else [value]:
+                    if isinstance(child, ast.AST):
+                        stack.append((child,
+                                      (loop or (isinstance(node, cls.LOOPS) and field == 'body'))
+                                      and not isinstance(node, cls.SCOPES),
+                                      isinstance(node, cls.FUNCTIONS)
+                                      or (function and not isinstance(node, ast.ClassDef))))
+        requirements |= {'name:' + name for name in loaded - bound if not hasattr(builtins, name)}
+        return frozenset(requirements)
+
     @classmethod
     def do_replace(cls, program, op, new_contents, modification_points):
         dst_root = new_contents[op.target[0]]
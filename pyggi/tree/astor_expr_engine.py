@@ -0,0 +1,269 @@
+import ast
+import astor
+import copy
+from . import AstorEngine
+
+class AstorExprEngine(AstorEngine):
+    """
+    The modification points are the expressions of the Python files
+    (read in place, i.e. not assigned or deleted), so that the edits
+    can change a loop bound, a comparison or any sub-expression
+    (see :py:class:`.ExprReplacement` and :py:class:`.OperatorReplacement`).
+
+    As the expressions are only replaced, the tree structure above them never
+    changes: the position of a point is an immutable tuple of ``(field, index)``
+    steps from the module, the index being None for a single child.
+    Once an expression is replaced, its position and the ones below it are
+    removed from the modification points of the variant (see :py:meth:`discard_points`),
+    so that the later edits of the patch targeting them are skipped.
+
+    .. hint::
+        Example of a program whose Python files are edited at the expression level. ::
+
+            class MyProgram(TreeProgram):
+                @classmethod
+                def get_engine(cls, file_name):
+                    return AstorExprEngine
+    """
+    #: The groups of interchangeable operators
+    OPERATORS = (
+        ('Add', 'Sub', 'Mult', 'Div', 'FloorDiv', 'Mod', 'Pow'),
+        ('LShift', 'RShift', 'BitOr', 'BitXor', 'BitAnd'),
+        ('Eq', 'NotEq', 'Lt', 'LtE', 'Gt', 'GtE'),
+        ('Is', 'IsNot'),
+        ('In', 'NotIn'),
+        ('And', 'Or'),
+        ('UAdd', 'USub')
+    )
+    SCOPES = AstorEngine.SCOPES + AstorEngine.COMPREHENSIONS
+    #: The fields of a scope evaluated in the enclosing scope
+    OUTER_FIELDS = ('args', 'decorator_list', 'returns', 'bases', 'keywords')
+
+    @classmethod
+    def get_modification_points(cls, root):
+        modification_points = list()
+        stack = [((), root)]
+        while stack:
+            pos, node = stack.pop()
+            if isinstance(node, ast.JoinedStr):
+                continue
+            if pos and cls.is_target(node):
+                modification_points.append(pos)
+            children = []
+            for field, value in ast.iter_fields(node):
+                if isinstance(value, list):
+                    children.extend((pos + ((field, i),), child) for i, child in enumerate(value)
+                                    if isinstance(child, ast.AST))
+                elif isinstance(value, ast.AST):
+                    children.append((pos + ((field, None),), value))
+            stack.extend(reversed(children))
+        return modification_points
+
+    @staticmethod
+    def is_target(node):
+        """
+        :return: If the node is an expression which can be replaced by another one
+        :rtype: bool
+        """
+        if not isinstance(node, ast.expr) or isinstance(node, (ast.Starred, getattr(ast, 'Slice', ()))):
+            return False
+        return isinstance(getattr(node, 'ctx', ast.Load()), ast.Load)
+
+    @classmethod
+    def get_node(cls, root, pos):
+        """
+        :param root: The root node of AST
+        :type root: :py:class:`ast.AST`
+        :param pos: The position of the expression
+        :type pos: tuple(tuple(str, None or int))
+        :return: The parent of the expression, the field and the index of the expression in it,
+          and the expression itself, or None if the position is not valid
+        :rtype: None or tuple(:py:class:`ast.AST`, str, None or int, :py:class:`ast.AST`)
+        """
+        parent = node = root
+        for field, index in pos:
+            parent = node
+            node = getattr(parent, field, None)
+            if index is not None:
+                if not isinstance(node, list) or index >= len(node):
+                    return None
+                node = node[index]
+            if not isinstance(node, ast.AST):
+                return None
+        return (parent, field, index, node)
+
+    @classmethod
+    def get_source(cls, program, file_name, index):
+        node = cls.get_node(program.contents[file_name], program.modification_points[file_name][index])[3]
+        return astor.to_source(node).strip()
+
+    @classmethod
+    def get_line_ranges(cls, program, file_name):
+        line_ranges = []
+        for pos in program.modification_points[file_name]:
+            node = cls.get_node(program.contents[file_name], pos)[3]
+            line_ranges.append((node.lineno, max(node.lineno, getattr(node, 'end_lineno', None) or 0)))
+        return line_ranges
+
+    @classmethod
+    def get_node_type(cls, program, file_name, index):
+        node = cls.get_node(program.contents[file_name], program.modification_points[file_name][index])[3]
+        return node.__class__.__name__
+
+    @staticmethod
+    def get_value_type(node):
+        """
+        :param node: The expression
+        :type node: :py:class:`ast.expr`
+        :return: ``'bool'`` for comparisons and boolean operations, the type of the value
+          for constants, ``'value'`` otherwise
+        :rtype: str
+        """
+        if isinstance(node, (ast.Compare, ast.BoolOp)) or (
+                isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not)):
+            return 'bool'
+        elif isinstance(node, getattr(ast, 'Constant', ())):
+            return type(node.value).__name__
+        return 'value'
+
+    @classmethod
+    def get_ingredient_constraints(cls, program, file_name):
+        """
+        The ingredients are pooled by the type of their value (see :py:meth:`get_value_type`):
+        an expression requires ``'type:t'`` for its type *t*, and the position of an
+        expression of type *t* provides its own type, ``'value'`` (names, calls, etc.),
+        and for numbers the other numeric types (any type if *t* is ``'value'``).
+        The requirements of the names and the *yield* and *await* expressions are the ones of
+        :py:meth:`.AstorEngine.get_ingredient_constraints`, comprehensions and lambdas
+        being scopes too (except for their parts evaluated outside, see :py:meth:`is_evaluated_outside`).
+        """
+        root = program.contents[file_name]
+        points = program.modification_points[file_name]
+        value_types = [cls.get_value_type(cls.get_node(root, pos)[3]) for pos in points]
+        all_types = frozenset('type:' + value_type for value_type in value_types) | {'type:value'}
+        scope_names = dict()
+
+        requirements, provisions = [], []
+        for pos, value_type in zip(points, value_types):
+            node, scopes, function = root, (root,), False
+            for step, (field, index) in enumerate(pos):
+                if isinstance(node, cls.SCOPES) and not cls.is_evaluated_outside(node, pos[step:]):
+                    scopes += (node,)
+                    function = isinstance(node, cls.FUNCTIONS) or (
+                        function and not isinstance(node, ast.ClassDef))
+                node = getattr(node, field)
+                if index is not None:
+                    node = node[index]
+            if scopes not in scope_names:
+                scope_names[scopes] = frozenset('name:' + name for name in cls.visible_names(scopes))
+            if value_type == 'value':
+                provided = all_types
+            elif value_type in ('int', 'float', 'complex'):
+                provided = {'type:int', 'type:float', 'type:complex', 'type:value'}
+            else:
+                provided = {'type:' + value_type, 'type:value'}
+            if function:
+                provided = provided | {'function'}
+            provisions.append(scope_names[scopes] | provided)
+            requirements.append(cls.get_requirements(node) | {'type:' + value_type})
+        return requirements, provisions
+
+    @classmethod
+    def is_evaluated_outside(cls, scope, steps):
+        """
+        :param scope: The node of a scope
+        :type scope: :py:class:`ast.AST`
+        :param steps: The steps from the scope to an expression
+        :type steps: tuple(tuple(str, None or int))
+        :return: Whether the expression is evaluated in the enclosing scope, as the default
+          values, annotations, decorators, base classes, and the first iterable of a comprehension
+        :rtype: bool
+        """
+        if steps[0][0] in cls.OUTER_FIELDS:
+            return True
+        return (isinstance(scope, cls.COMPREHENSIONS)
+                and tuple(steps[:2]) == (('generators', 0), ('iter', None)))
+
+    @staticmethod
+    def get_operator(node):
+        """
+        :param node: The expression
+        :type node: :py:class:`ast.expr`
+        :return: The name of the (first) operator of the expression, if any
+        :rtype: None or str
+        """
+        if isinstance(node, (ast.BinOp, ast.BoolOp, ast.UnaryOp)):
+            return node.op.__class__.__name__
+        elif isinstance(node, ast.Compare):
+            return node.ops[0].__class__.__name__
+        return None
+
+    @classmethod
+    def get_operators(cls, node):
+        """
+        :param node: The expression
+        :type node: :py:class:`ast.expr`
+        :return: The operators which can replace the operator of the expression,
+          including itself
+        :rtype: tuple(str)
+        """
+        operator = cls.get_operator(node)
+        for group in cls.OPERATORS:
+            if operator in group:
+                return group
+        return ()
+
+    @staticmethod
+    def discard_points(points, pos):
+        """
+        Mark the position of a replaced expression and the ones below it as removed.
+
+        :param points: The modification points of the file in the variant
+        :type points: list(None or tuple)
+        :param pos: The position of the replaced expression
+        :type pos: tuple(tuple(str, None or int))
+        :return: None
+        """
+        for i, point in enumerate(points):
+            if point is not None and point[:len(pos)] == pos:
+                points[i] = None
+
+    @classmethod
+    def do_replace(cls, program, op, new_contents, modification_points):
+        points = modification_points[op.target[0]]
+        pos = points[op.target[1]]
+        # The target does not exist anymore if it or an enclosing expression was replaced
+        located = cls.get_node(new_contents[op.target[0]], pos) if pos is not None else None
+        if located is None or not cls.is_target(located[3]):
+            return False
+        ingredient = cls.get_node(program.contents[op.ingredient[0]],
+                                  program.modification_points[op.ingredient[0]][op.ingredient[1]])
+        parent, field, index, _ = located
+        node = copy.deepcopy(ingredient[3])
+        if index is None:
+            setattr(parent, field, node)
+        else:
+            getattr(parent, field)[index] = node
+        cls.discard_points(points, pos)
+        return True
+
+    @classmethod
+    def do_replace_operator(cls, program, op, new_contents, modification_points):
+        pos = modification_points[op.target[0]][op.target[1]]
+        located = cls.get_node(new_contents[op.target[0]], pos) if pos is not None else None
+        if located is None or op.operator not in cls.get_operators(located[3]):
+            return False
+        node = located[3]
+        if isinstance(node, ast.Compare):
+            node.ops[0] = getattr(ast, op.operator)()
+        else:
+            node.op = getattr(ast, op.operator)()
+        return True
+
+    @classmethod
+    def do_insert(cls, program, op, new_contents, modification_points):
+        return False
+
+    @classmethod
+    def do_delete(cls, program, op, new_contents, modification_points):
+        return False
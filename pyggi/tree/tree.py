@@ -3,7 +3,7 @@ import ast
 import astor
 import random
 from abc import abstractmethod
-from . import AbstractTreeEngine, AstorEngine, XmlEngine
+from . import AbstractTreeEngine, AstorEngine, AstorExprEngine, XmlEngine
 from ..base import AbstractProgram, AbstractEdit
 from ..utils import get_file_extension
 
@@ -23,14 +23,48 @@ Possible Edit Operators
 """
 
 class TreeEdit(AbstractEdit):
+    __slots__ = ()
+    engine = AbstractTreeEngine
+
     @property
     def domain(self):
         return TreeProgram
 
-class StmtReplacement(TreeEdit):
+class StmtEdit(TreeEdit):
+    """
+    The edits of statements, which do not apply to the files edited at the
+    expression level (see :py:class:`.AstorExprEngine`)
+    """
+    __slots__ = ()
+
+    @classmethod
+    def supports(cls, engine):
+        return super().supports(engine) and not issubclass(engine, AstorExprEngine)
+
+    @classmethod
+    def check_file(cls, program, target_file=None):
+        """
+        :param program: The program
+        :type program: :py:class:`.TreeProgram`
+        :param str target_file: The target file, None to select one randomly
+        :return: The target file
+        :rtype: str
+        :raise ValueError: If the file, or every file if None, is not supported
+        """
+        if target_file is None:
+            files = [f for f in program.target_files if cls.supports(program.engines[f])]
+            if not files:
+                raise ValueError('No target file supports {}'.format(cls.__name__))
+            return random.choice(files)
+        if not cls.supports(program.engines[target_file]):
+            raise ValueError('{} does not support {}'.format(target_file, cls.__name__))
+        return target_file
+
+class StmtReplacement(StmtEdit):
+    __slots__ = ('target', 'ingredient')
+
     def __init__(self, target, ingredient):
-        self.target = target
-        self.ingredient = ingredient
+        super().__init__(target, ingredient)
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
@@ -38,20 +72,19 @@ class StmtReplacement(TreeEdit):
 
     @classmethod
     def create(cls, program, target_file=None, ingr_file=None, method='random'):
-        if target_file is None:
-            target_file = program.random_file(AbstractTreeEngine)
+        target_file = cls.check_file(program, target_file)
         if ingr_file is None:
             ingr_file = program.random_file(engine=program.engines[target_file])
         assert program.engines[target_file] == program.engines[ingr_file]
-        return cls(program.random_target(target_file, method),
-                   program.random_target(ingr_file, 'random'))
+        target = program.random_target(target_file, method)
+        return cls(target, program.random_ingredient(ingr_file, target))
+
+class StmtInsertion(StmtEdit):
+    __slots__ = ('target', 'ingredient', 'direction')
 
-class StmtInsertion(TreeEdit):
     def __init__(self, target, ingredient, direction='before'):
         assert direction in ['before', 'after']
-        self.target = target
-        self.ingredient = ingredient
-        self.direction = direction
+        super().__init__(target, ingredient, direction)
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
@@ -59,20 +92,20 @@ class StmtInsertion(TreeEdit):
 
     @classmethod
     def create(cls, program, target_file=None, ingr_file=None, direction=None, method='random'):
-        if target_file is None:
-            target_file = program.random_file(AbstractTreeEngine)
+        target_file = cls.check_file(program, target_file)
         if ingr_file is None:
             ingr_file = program.random_file(engine=program.engines[target_file])
         assert program.engines[target_file] == program.engines[ingr_file]
         if direction is None:
             direction = random.choice(['before', 'after'])
-        return cls(program.random_target(target_file, method),
-                   program.random_target(ingr_file, 'random'),
-                   direction)
+        target = program.random_target(target_file, method)
+        return cls(target, program.random_ingredient(ingr_file, target), direction)
+
+class StmtDeletion(StmtEdit):
+    __slots__ = ('target',)
 
-class StmtDeletion(TreeEdit):
     def __init__(self, target):
-        self.target = target
+        super().__init__(target)
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
@@ -80,29 +113,28 @@ class StmtDeletion(TreeEdit):
 
     @classmethod
     def create(cls, program, target_file=None, method='random'):
-        if target_file is None:
-            target_file = program.random_file(AbstractTreeEngine)
+        target_file = cls.check_file(program, target_file)
         return cls(program.random_target(target_file, method))
 
-class StmtMoving(TreeEdit):
+class StmtMoving(StmtEdit):
+    __slots__ = ('target', 'ingredient', 'direction')
+
     def __init__(self, target, ingredient, direction='before'):
         assert direction in ['before', 'after']
-        self.target = target
-        self.ingredient = ingredient
-        self.direction = direction
+        super().__init__(target, ingredient, direction)
+
+    @property
+    def modified_points(self):
+        return [self.target, self.ingredient]
 
     def apply(self, program, new_contents, modification_points):
         engine = program.engines[self.target[0]]
         engine.do_insert(program, self, new_contents, modification_points)
-        self.target, self.ingredient = self.ingredient, self.target
-        return_code = engine.do_delete(program, self, new_contents, modification_points)
-        self.target, self.ingredient = self.ingredient, self.target
-        return return_code
+        return engine.do_delete(program, StmtDeletion(self.ingredient), new_contents, modification_points)
 
     @classmethod
     def create(cls, program, target_file=None, ingr_file=None, direction=None, method='random'):
-        if target_file is None:
-            target_file = program.random_file(AbstractTreeEngine)
+        target_file = cls.check_file(program, target_file)
         if ingr_file is None:
             ingr_file = program.random_file(engine=program.engines[target_file])
         assert program.engines[target_file] == program.engines[ingr_file]
@@ -111,3 +143,76 @@ class StmtMoving(TreeEdit):
         return cls(program.random_target(target_file, method),
                    program.random_target(ingr_file, 'random'),
                    direction)
+
+class ExprReplacement(TreeEdit):
+    """
+    Replace an expression by a compatible one (see :py:class:`.AstorExprEngine`)
+    """
+    __slots__ = ('target', 'ingredient')
+    engine = AstorExprEngine
+
+    def __init__(self, target, ingredient):
+        super().__init__(target, ingredient)
+
+    def apply(self, program, new_contents, modification_points):
+        engine = program.engines[self.target[0]]
+        return engine.do_replace(program, self, new_contents, modification_points)
+
+    @classmethod
+    def create(cls, program, target_file=None, ingr_file=None, method='random'):
+        if target_file is None:
+            target_file = program.random_file(AstorExprEngine)
+        if ingr_file is None:
+            ingr_file = program.random_file(engine=program.engines[target_file])
+        assert program.engines[target_file] == program.engines[ingr_file]
+        target = program.random_target(target_file, method)
+        return cls(target, program.random_ingredient(ingr_file, target))
+
+class OperatorReplacement(TreeEdit):
+    """
+    Replace the operator of an arithmetic, bitwise, boolean or unary operation,
+    or the first operator of a comparison, by another one of the same group
+    (see :py:attr:`.AstorExprEngine.OPERATORS`)
+    """
+    __slots__ = ('target', 'operator')
+    engine = AstorExprEngine
+
+    def __init__(self, target, operator):
+        super().__init__(target, operator)
+
+    def apply(self, program, new_contents, modification_points):
+        engine = program.engines[self.target[0]]
+        return engine.do_replace_operator(program, self, new_contents, modification_points)
+
+    #: The types of the expressions with an operator
+    OPERATIONS = ('BinOp', 'BoolOp', 'UnaryOp', 'Compare')
+
+    @classmethod
+    def enumerate(cls, program, target_file=None, ingr_file=None):
+        target_files = [target_file] if target_file is not None else [
+            f for f in program.target_files if cls.supports(program.engines[f])]
+        for target_file in target_files:
+            engine = program.engines[target_file]
+            points_by_type = program.get_points_by_type(target_file)
+            for i in sorted(i for node_type in cls.OPERATIONS for i in points_by_type.get(node_type, [])):
+                node = engine.get_node(program.contents[target_file],
+                                       program.modification_points[target_file][i])[3]
+                for operator in engine.get_operators(node):
+                    if operator != engine.get_operator(node):
+                        yield cls((target_file, i), operator)
+
+    @classmethod
+    def create(cls, program, target_file=None):
+        if target_file is None:
+            target_file = program.random_file(AstorExprEngine)
+        engine = program.engines[target_file]
+        points_by_type = program.get_points_by_type(target_file)
+        candidates = [i for node_type in cls.OPERATIONS for i in points_by_type.get(node_type, [])]
+        while candidates:
+            i = candidates.pop(random.randrange(len(candidates)))
+            node = engine.get_node(program.contents[target_file], program.modification_points[target_file][i])[3]
+            operators = [operator for operator in engine.get_operators(node)
+                         if operator != engine.get_operator(node)]
+            if operators:
+                return cls((target_file, i), random.choice(operators))
+        raise ValueError('{} has no operator to replace'.format(target_file))
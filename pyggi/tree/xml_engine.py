@@ -2,6 +2,7 @@ import copy
 import re
 import os
 from . import AbstractTreeEngine
+from ..utils import check_syntax, normalise_source
 from xml.etree import ElementTree
 
 class XmlEngine(AbstractTreeEngine):
@@ -37,16 +38,97 @@ class XmlEngine(AbstractTreeEngine):
         return cls.dump(program.contents[file_name].find(program.modification_points[file_name][index]))
 
     @classmethod
-    def write_to_tmp_dir(cls, contents_of_file, tmp_path):
+    def get_line_ranges(cls, program, file_name):
+        line_ranges = dict()
+        line = 1
+        def aux(element):
+            nonlocal line
+            first = line
+            line += (element.text or '').count('\n')
+            for child in element:
+                aux(child)
+            line_ranges[element] = (first, line)
+            line += (element.tail or '').count('\n')
+        root = program.contents[file_name]
+        aux(root)
+        return [line_ranges[root.find(xpath)] for xpath in program.modification_points[file_name]]
+
+    @classmethod
+    def get_node_type(cls, program, file_name, index):
+        return cls.split_xpath(program.modification_points[file_name][index])[1]
+
+    LOOPS = ('for', 'while', 'do')
+    FUNCTIONS = ('function', 'constructor', 'destructor', 'lambda')
+
+    @classmethod
+    def get_ingredient_constraints(cls, program, file_name):
+        """
+        An element requires ``'accepts:tag'`` for its own tag, ``'break'`` or ``'loop'``
+        if it contains a *break* or *continue* outside of its own loops (and switches
+        for *break*), and ``'function'`` if it contains a *return* outside of its own functions.
+        A position provides ``'accepts:tag'`` for every tag found in the file
+        as a child of an element with the tag of its parent, and the enclosing
+        loops, switches and functions of its function.
+        """
+        root = program.contents[file_name]
+        parents = {child: parent for parent in root.iter() for child in parent}
+        accepted = dict()
+        for parent in root.iter():
+            for child in parent:
+                accepted.setdefault(parent.tag, set()).add('accepts:' + child.tag)
+        accepted = {tag: frozenset(tags) for tag, tags in accepted.items()}
+
+        requirements, provisions = [], []
+        for xpath in program.modification_points[file_name]:
+            node = root.find(xpath)
+            provided = set()
+            ancestor = parents[node]
+            while ancestor is not None and ancestor.tag not in cls.FUNCTIONS:
+                if ancestor.tag in cls.LOOPS:
+                    provided |= {'loop', 'break'}
+                elif ancestor.tag == 'switch':
+                    provided.add('break')
+                ancestor = parents.get(ancestor)
+            if ancestor is not None:
+                provided.add('function')
+            provisions.append(accepted[parents[node].tag] | provided)
+
+            required = {'accepts:' + node.tag}
+            for element in node.iter():
+                if element.tag not in ('break', 'continue', 'return'):
+                    continue
+                ancestor = element
+                while ancestor is not node:
+                    ancestor = parents[ancestor]
+                    if ancestor.tag in cls.FUNCTIONS or (element.tag != 'return' and (
+                            ancestor.tag in cls.LOOPS or (element.tag == 'break' and ancestor.tag == 'switch'))):
+                        break
+                else:
+                    required.add({'break': 'break', 'continue': 'loop', 'return': 'function'}[element.tag])
+            requirements.append(frozenset(required))
+        return requirements, provisions
+
+    @classmethod
+    def write_source(cls, source, tmp_path):
         root, ext = os.path.splitext(tmp_path)
         assert ext == '.xml'
         with open(root, 'w') as tmp_file:
-            tmp_file.write(cls.dump(contents_of_file))
+            tmp_file.write(source)
 
     @classmethod
     def dump(cls, contents_of_file):
         return cls.strip_xml_from_tree(contents_of_file)
 
+    @classmethod
+    def check_syntax(cls, file_name, source):
+        root, _ = os.path.splitext(file_name)
+        return check_syntax(root, source)
+
+    @classmethod
+    def get_equivalence_key(cls, file_name, contents_of_file, source):
+        root, _ = os.path.splitext(file_name)
+        return normalise_source(root, source)
+
     @staticmethod
     def string_to_tree(s):
         xml = re.sub(r'(?:\s+xmlns[^=]*="[^"]+")+', '', s, count=1)
@@ -1,4 +1,9 @@
 import os
+import re
+import io
+import queue
+import tokenize
+import warnings
 
 weighted_choice = lambda s : random.choice(sum(([v] * wt for v,wt in s),[]))
 
@@ -10,4 +15,143 @@ def get_file_extension(file_path):
     :rtype: str
     """
     _, file_extension = os.path.splitext(file_path)
-    return file_extension
\ No newline at end of file
+    return file_extension
+
+# Not JavaScript, whose regular expression and template literals are not recognised
+C_FAMILY_EXTENSIONS = ['.c', '.h', '.cc', '.cpp', '.cxx', '.hpp', '.java', '.cs']
+C_FAMILY_TOKENS = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|[(){}\[\]]', re.DOTALL)
+BRACKET_PAIRS = {')': '(', '}': '{', ']': '['}
+
+def check_python_syntax(source):
+    """
+    :param str source: The Python source code
+    :return: whether the source code compiles
+    :rtype: bool
+    """
+    try:
+        # The warnings of suspicious code (e.g., invalid escape sequences)
+        # would be repeated for every variant
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', SyntaxWarning)
+            warnings.simplefilter('ignore', DeprecationWarning)
+            compile(source, '<variant>', 'exec')
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+def check_bracket_balance(source):
+    """
+    :param str source: The source code of a C-family language (C, C++, Java, ..)
+    :return: whether the brackets outside of comments and literals are balanced
+    :rtype: bool
+    """
+    stack = []
+    for token in C_FAMILY_TOKENS.findall(source):
+        if token in '({[':
+            stack.append(token)
+        elif token in BRACKET_PAIRS:
+            if not stack or stack.pop() != BRACKET_PAIRS[token]:
+                return False
+    return not stack
+
+def check_syntax(file_path, source):
+    """
+    :param str file_path: The path of the file, whose extension determines the language
+    :param str source: The source code
+    :return: False if the source code is known to be invalid, True otherwise
+    :rtype: bool
+    """
+    extension = get_file_extension(file_path)
+    if extension == '.py':
+        return check_python_syntax(source)
+    elif extension in C_FAMILY_EXTENSIONS:
+        return check_bracket_balance(source)
+    return True
+
+# The preprocessor directives are kept whole, as their layout matters
+# (e.g., ``#define F(x)`` and ``#define F (x)``), and the operators of several
+# characters are single tokens, so that ``a++ + b`` and ``a + ++b`` differ
+C_FAMILY_WORDS = re.compile(
+    r'(?m:^[ \t]*#(?:\\\n|[^\n])*)|//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|\w+'
+    r'|>>>=|<<=|>>=|>>>|<=>|->\*|\.\.\.|::|->|\+\+|--|<<|>>|<=|>=|==|!=|&&|\|\||[-+*/%&|^]=|\.\*|\S',
+    re.DOTALL)
+
+def normalise_source(file_path, source):
+    """
+    :param str file_path: The path of the file, whose extension determines the language
+    :param str source: The source code
+    :return: The token stream of the source code without comments and whitespaces
+      (but with the indentation tokens of Python), which is identical
+      for semantically equivalent source codes differing only by their layout,
+      or the source code itself if the language is not supported
+    :rtype: str
+    """
+    extension = get_file_extension(file_path)
+    if extension == '.py':
+        try:
+            ignored = (tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER)
+            layout = (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT)
+            return '\n'.join('<{}>'.format(tokenize.tok_name[token.type]) if token.type in layout else token.string
+                             for token in tokenize.generate_tokens(io.StringIO(source).readline)
+                             if token.type not in ignored)
+        except (tokenize.TokenError, SyntaxError):
+            return source
+    elif extension in C_FAMILY_EXTENSIONS:
+        return '\n'.join(token.strip() for token in C_FAMILY_WORDS.findall(source)
+                         if not token.startswith('//') and not token.startswith('/*'))
+    return source
+
+def summarise_timings(timings):
+    """
+    :param timings: The timings of the evaluations (see :py:attr:`.RunResult.timings`)
+    :type timings: list(dict(str, float))
+    :return: For each phase, the mean, the median (p50), the 95th percentile (p95, nearest-rank)
+      and the maximum of its durations (unit: seconds), over the evaluations where it happened
+    :rtype: dict(str, dict(str, float))
+    """
+    durations = dict()
+    for timing in timings:
+        for phase, duration in timing.items():
+            durations.setdefault(phase, []).append(duration)
+    summary = dict()
+    for phase, values in durations.items():
+        values.sort()
+        summary[phase] = {
+            'mean': sum(values) / len(values),
+            'p50': values[(len(values) - 1) // 2],
+            'p95': values[-(-95 * len(values) // 100) - 1],
+            'max': values[-1]
+        }
+    return summary
+
+def get_result(results, processes, poll_interval=1.0):
+    """
+    Wait for the next result sent by worker processes through a queue,
+    without hanging forever if they died (e.g., killed when out of memory).
+
+    :param results: The queue of the results
+    :type results: :py:class:`multiprocessing.Queue`
+    :param processes: The processes which may still send results
+    :type processes: list(:py:class:`multiprocessing.Process`)
+    :param float poll_interval: The time between two checks of the processes (unit: seconds)
+    :return: The next result
+    :raise RuntimeError: If one of the processes crashed, or all of them exited,
+      before the result was sent
+    """
+    while True:
+        try:
+            return results.get(timeout=poll_interval)
+        except queue.Empty:
+            crashed = [process for process in processes if process.exitcode not in (None, 0)]
+            if not crashed and any(process.exitcode is None for process in processes):
+                continue
+        # A result sent just before exiting may still be in transit
+        try:
+            return results.get(timeout=poll_interval)
+        except queue.Empty:
+            pass
+        if crashed:
+            raise RuntimeError('The process {} exited with code {} without sending its result'.format(
+                crashed[0].name, crashed[0].exitcode))
+        raise RuntimeError('The processes exited without sending their results')
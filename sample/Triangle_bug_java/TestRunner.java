@@ -1,26 +1,55 @@
 import org.junit.runner.JUnitCore;
+import org.junit.runner.Request;
 import org.junit.runner.Result;
 import org.junit.runner.notification.Failure;
+import java.lang.reflect.Method;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
 
 public class TestRunner {
+   // Test methods of the class, restricted to PYGGI_TESTS if given
+   // and sorted such that the tests of PYGGI_TEST_ORDER come first
+   private static List<String> getTests(Class klass) {
+      List<String> tests = new ArrayList<String>();
+      String selected = System.getenv("PYGGI_TESTS");
+      if (selected != null && !selected.trim().isEmpty()) {
+         tests.addAll(Arrays.asList(selected.trim().split("\\s+")));
+      } else {
+         for (Method method : klass.getMethods()) {
+            if (method.isAnnotationPresent(org.junit.Test.class)) {
+               tests.add(method.getName());
+            }
+         }
+      }
+      String order = System.getenv("PYGGI_TEST_ORDER");
+      if (order != null && !order.trim().isEmpty()) {
+         List<String> ordered = new ArrayList<String>();
+         for (String test : order.trim().split("\\s+")) {
+            if (tests.remove(test)) {
+               ordered.add(test);
+            }
+         }
+         ordered.addAll(tests);
+         tests = ordered;
+      }
+      return tests;
+   }
+
    public static void main(String[] args) throws ClassNotFoundException {
       Class klass = Class.forName(args[0]);
-      Result result = JUnitCore.runClasses(klass);
-
-      //System.out.println(result.getFailureCount());
-      /* for (Failure failure : result.getFailures()) {
-         System.out.println(failure.toString());
-      } */
-
-      //System.out.println(result.getIgnoreCount());
-      //System.out.println(result.getRunCount());
-      //System.out.println(result.getRunTime());
-      //System.out.println(result.wasSuccessful());
-      //System.out.println("[PYGGI_RESULT] {" +
-      //  "runtime: " + result.getRunTime() + "," +
-      //  "failed: " + result.getFailureCount() + "," +
-      //  "pass_all: " + result.wasSuccessful() + "}"
-      //);
-      System.out.println(result.getFailureCount());
+      boolean failFast = System.getenv("PYGGI_FAIL_FAST") != null;
+      int failureCount = 0;
+      for (String test : getTests(klass)) {
+         Result result = new JUnitCore().run(Request.method(klass, test));
+         if (!result.wasSuccessful()) {
+            failureCount += 1;
+            System.err.println("FAILED " + test);
+            if (failFast) {
+               break;
+            }
+         }
+      }
+      System.out.println(failureCount);
    }
 }
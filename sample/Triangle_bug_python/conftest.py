@@ -0,0 +1,24 @@
+"""
+Make pytest follow the test selection and ordering given by PYGGI:
+
+- ``PYGGI_TESTS``: only run these tests
+- ``PYGGI_TEST_ORDER``: run these tests first
+- ``PYGGI_FAIL_FAST``: stop at the first failure
+"""
+import os
+
+def pytest_configure(config):
+    if os.environ.get('PYGGI_FAIL_FAST'):
+        config.option.maxfail = 1
+
+def pytest_collection_modifyitems(config, items):
+    selected = os.environ.get('PYGGI_TESTS', '').split()
+    if selected:
+        deselected = [item for item in items if item.nodeid not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if item.nodeid in selected]
+    order = os.environ.get('PYGGI_TEST_ORDER', '').split() + selected
+    if order:
+        rank = {test: i for i, test in reversed(list(enumerate(order)))}
+        items.sort(key=lambda item: rank.get(item.nodeid, len(rank)))
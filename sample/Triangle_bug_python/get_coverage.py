@@ -0,0 +1,48 @@
+"""
+Print the per-test line coverage of triangle.py in the format
+expected by the ``coverage_command`` of PYGGI ::
+
+    {"test_triangle.py::test_a": {"triangle.py": [1, 2, 5]}, ...}
+
+Lines executed outside of any test (e.g. at import time) are
+attributed to every test.
+"""
+import sys
+import json
+import os
+import contextlib
+import pytest
+
+TARGET_FILES = ['triangle.py']
+
+class CoveragePlugin:
+    def __init__(self):
+        self.paths = {os.path.abspath(f): f for f in TARGET_FILES}
+        self.common = {f: set() for f in TARGET_FILES}
+        self.coverage = dict()
+        self.current = self.common
+
+    def trace(self, frame, event, arg):
+        file_name = self.paths.get(frame.f_code.co_filename)
+        if file_name is None:
+            return None
+        if event == 'line':
+            self.current[file_name].add(frame.f_lineno)
+        return self.trace
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        self.current = {f: set() for f in TARGET_FILES}
+        self.coverage[item.nodeid] = self.current
+        yield
+        self.current = self.common
+
+if __name__ == "__main__":
+    plugin = CoveragePlugin()
+    sys.settrace(plugin.trace)
+    with contextlib.redirect_stdout(sys.stderr):
+        pytest.main(['-q', '-p', 'no:cacheprovider', 'test_triangle.py'],
+                    plugins=[plugin])
+    sys.settrace(None)
+    print(json.dumps({test: {f: sorted(lines | plugin.common[f]) for f, lines in cov.items()}
+                      for test, cov in plugin.coverage.items()}))
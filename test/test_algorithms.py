@@ -1,8 +1,16 @@
 import pytest
+import os
 import random
-from pyggi.base import Algorithm, Patch
+from pyggi.base import Algorithm, Patch, RunResult
+from pyggi.line import LineProgram, LineReplacement, LineInsertion, LineDeletion, LineMoving
+from pyggi.line.line import LineEdit
 from pyggi.tree import TreeProgram, StmtReplacement, StmtInsertion, StmtDeletion, StmtMoving
-from pyggi.algorithms import LocalSearch
+from pyggi.algorithms.island_model import Migration
+from pyggi.algorithms.nsga2 import dominates, non_dominated_sort, crowding_distance
+from pyggi.algorithms import SimulatedAnnealing, ExponentialCooling, LinearCooling, LateAcceptanceHillClimbing
+from pyggi.algorithms import UCBSelector, AdaptivePursuitSelector
+from pyggi.algorithms import EditScan, EditEffectTable, iter_single_edits, SurrogateFilter
+from pyggi.algorithms import LocalSearch, BatchLocalSearch, GeneticProgramming, SteadyStateEvolution, NSGA2, IslandModel, DeltaDebugging
 
 @pytest.fixture(scope='session')
 def setup_program():
@@ -21,6 +29,31 @@ def setup_program():
     program = MyProgram('../sample/Triangle_bug_python')
     return program
 
+@pytest.fixture(scope='session')
+def setup_line_program():
+    class MyLineProgram(LineProgram):
+        def compute_fitness(self, result, return_code, stdout, stderr, elapsed_time):
+            import re
+            failed = re.findall("([0-9]+) failed", stdout)
+            result.fitness = int(failed[0]) if failed else 0
+    program = MyLineProgram('../sample/Triangle_bug_python')
+    return program
+
+@pytest.fixture(scope='session')
+def setup_covered_line_program():
+    class MyLineProgram(LineProgram):
+        def compute_fitness(self, result, return_code, stdout, stderr, elapsed_time):
+            import re
+            failed = re.findall("([0-9]+) failed", stdout)
+            result.fitness = int(failed[0]) if failed else 0
+    config = {
+        "target_files": ["triangle.py"],
+        "test_command": "pytest -s {tests}",
+        "coverage_command": "python get_coverage.py"
+    }
+    program = MyLineProgram('../sample/Triangle_bug_python', config=config)
+    return program
+
 class TestAlgorithm(object):
 
     def test_fails_without_override(self, setup_program):
@@ -28,6 +61,12 @@ class TestAlgorithm(object):
             program = setup_program
             algorithm = Algorithm(program)
 
+    def test_mean_fitness(self):
+        assert Algorithm.mean_fitness([]) is None
+        assert Algorithm.mean_fitness([1, 2]) == 1.5
+        assert Algorithm.mean_fitness([(1, 4), (2, 6)]) == (1.5, 5.0)
+        assert Algorithm.mean_fitness([(1, 4), 2]) == (1, 4)
+
     def test_init_and_setup(self, setup_program):
 
         class MyAlgorithm(Algorithm):
@@ -75,3 +114,566 @@ class TestLocalSearch(object):
         assert result[0]['FitnessEval'] <= max_iter
         if result[0]['FitnessEval'] < max_iter:
             assert result[0]['BestFitness'] < run.fitness
+
+
+    def test_run_in_processes(self, setup_line_program):
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                patch.add(random.choice([LineDeletion(('triangle.py', 2)),
+                                         LineReplacement(('triangle.py', 14), ('triangle.py', 9))]))
+                return patch
+
+            def is_better_than_the_best(self, fitness, best_fitness):
+                return best_fitness is None or fitness < best_fitness
+
+        program = setup_line_program
+        random.seed(0)
+        result = MyLocalSearch(program).run(warmup_reps=1, epoch=3, max_iter=3, timeout=10,
+                                            verbose=False, processes=2)
+        assert len(result) == 3
+        for epoch_result in result:
+            assert epoch_result['FitnessEval'] == 3
+            assert isinstance(epoch_result['BestPatch'], Patch)
+            assert epoch_result['BestFitness'] == 0
+        # The epochs only depend on the seed, whichever process runs them
+        random.seed(0)
+        replayed = MyLocalSearch(program).run(warmup_reps=1, epoch=3, max_iter=3, timeout=10,
+                                              verbose=False, processes=2)
+        assert [epoch_result['BestPatch'] for epoch_result in replayed] == \
+            [epoch_result['BestPatch'] for epoch_result in result]
+        assert not any('_epoch' in path for path in os.listdir(os.path.dirname(program.tmp_path)))
+
+    def test_run_in_processes_with_dead_worker(self, setup_line_program):
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                os._exit(1)
+
+        program = setup_line_program
+        with pytest.raises(RuntimeError):
+            MyLocalSearch(program).run(warmup_reps=1, epoch=2, max_iter=3, timeout=10,
+                                       verbose=False, processes=2)
+        assert not any('_epoch' in path for path in os.listdir(os.path.dirname(program.tmp_path)))
+
+
+    def test_confirm_best(self, setup_covered_line_program):
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                # Only covered by the passing tests, while a test failing on the
+                # original program still fails with the whole test suite
+                patch.add(LineDeletion(('triangle.py', 20)))
+                return patch
+
+            def is_better_than_the_best(self, fitness, best_fitness):
+                return best_fitness is None or fitness < best_fitness
+
+            def stopping_criterion(self, iter, fitness):
+                return fitness < 2
+
+        program = setup_covered_line_program
+        assert program.evaluate_patch(MyLocalSearch(program).get_neighbour(Patch(program))).fitness == 1
+        result = MyLocalSearch(program).run(warmup_reps=1, epoch=1, max_iter=2, timeout=10, verbose=False)
+        assert result[0]['BestPatch'] is None
+        assert not result[0]['Success']
+
+    def test_minimise(self, setup_covered_line_program):
+        fix = LineReplacement(('triangle.py', 14), ('triangle.py', 9))
+
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                patch.add(LineDeletion(('triangle.py', 2)))
+                patch.add(fix)
+                return patch
+
+        program = setup_covered_line_program
+        result = MyLocalSearch(program).run(warmup_reps=1, epoch=1, max_iter=1, timeout=10,
+                                            verbose=False, minimise=True)
+        assert result[0]['BestFitness'] == 0
+        assert result[0]['MinimisedPatch'].edit_list == (fix,)
+        assert result[0]['MinimisedFitness'] == 0
+
+    def test_checkpoint(self, setup_line_program, tmp_path):
+        class Interrupted(Exception):
+            pass
+
+        class MyLocalSearch(LocalSearch):
+            def setup(self):
+                self.calls = getattr(self, 'calls', 0)
+
+            def get_neighbour(self, patch):
+                self.calls += 1
+                if self.calls == 7:
+                    raise Interrupted()
+                patch.add(random.choice([LineDeletion(('triangle.py', 2)), LineDeletion(('triangle.py', 3))]))
+                return patch
+
+        program = setup_line_program
+        checkpoint = str(tmp_path / 'search.ckpt')
+        with pytest.raises(Interrupted):
+            MyLocalSearch(program).run(warmup_reps=1, epoch=2, max_iter=4, timeout=10, verbose=False,
+                                       checkpoint=checkpoint, checkpoint_interval=2)
+        assert os.listdir(str(tmp_path)) == ['search.ckpt']
+        result = MyLocalSearch(program).resume(checkpoint)
+        assert len(result) == 2
+        assert [epoch_result['FitnessEval'] for epoch_result in result] == [4, 4]
+        assert all(epoch_result['BestPatch'] is None or isinstance(epoch_result['BestPatch'], Patch)
+                   for epoch_result in result)
+
+    def test_checkpoint_operator_selector(self, setup_line_program, tmp_path):
+        class Interrupted(Exception):
+            pass
+
+        class MyLocalSearch(LocalSearch):
+            def setup(self):
+                self.calls = getattr(self, 'calls', 0)
+
+            def get_neighbour(self, patch):
+                self.calls += 1
+                if self.calls == 7:
+                    raise Interrupted()
+                patch.add(random.choice([LineDeletion(('triangle.py', 2)), LineDeletion(('triangle.py', 3))]))
+                return patch
+
+        program = setup_line_program
+        checkpoint = str(tmp_path / 'search.ckpt')
+        search = MyLocalSearch(program)
+        search.operator_selector = UCBSelector([LineDeletion, LineInsertion])
+        search.surrogate = SurrogateFilter(program)
+        with pytest.raises(Interrupted):
+            search.run(warmup_reps=1, epoch=2, max_iter=4, timeout=10, verbose=False,
+                       checkpoint=checkpoint, checkpoint_interval=2)
+        observed = search.surrogate.observed
+        search = MyLocalSearch(program)
+        search.operator_selector = UCBSelector([LineDeletion, LineInsertion])
+        search.surrogate = SurrogateFilter(program)
+        search.resume(checkpoint)
+        assert search.operator_selector.counts == {LineDeletion: 8, LineInsertion: 0}
+        assert set(observed) <= set(search.surrogate.observed)
+        assert search.surrogate.observations == len(search.surrogate.observed)
+
+
+class TestSimulatedAnnealing(object):
+
+    def test_schedules(self):
+        assert ExponentialCooling(2.0, 0.5)(1, 10) == 2.0
+        assert ExponentialCooling(2.0, 0.5)(3, 10) == 0.5
+        assert LinearCooling(2.0)(1, 10) == 2.0
+        assert LinearCooling(2.0)(10, 10) == pytest.approx(0.2)
+
+    def test_accept(self, setup_line_program):
+        class MySimulatedAnnealing(SimulatedAnnealing):
+            def get_neighbour(self, patch):
+                return patch
+
+        sa = MySimulatedAnnealing(setup_line_program, schedule=LinearCooling(1.0))
+        sa.max_iter = 10
+        assert sa.accept(1, 1, 2)
+        assert sa.accept(1, 2, None)
+        assert not sa.accept(11, 2, 1)
+        random.seed(0)
+        assert 0 < sum(sa.accept(1, 2, 1) for _ in range(100)) < 100
+
+    def test_run(self, setup_line_program):
+        class MySimulatedAnnealing(SimulatedAnnealing):
+            def get_neighbour(self, patch):
+                patch.add(random.choice([LineDeletion(('triangle.py', 2)),
+                                         LineReplacement(('triangle.py', 14), ('triangle.py', 9))]))
+                return patch
+
+            def stopping_criterion(self, iter, fitness):
+                return fitness == 0
+
+        sa = MySimulatedAnnealing(setup_line_program)
+        random.seed(0)
+        result = sa.run(warmup_reps=1, epoch=1, max_iter=10, timeout=10, verbose=False)
+        assert result[0]['FitnessEval'] <= 10
+        assert set(result[0]['Timings']['apply']) == {'mean', 'p50', 'p95', 'max'}
+        assert result[0]['Success']
+        assert result[0]['BestFitness'] == 0
+        assert LineReplacement(('triangle.py', 14), ('triangle.py', 9)) in result[0]['BestPatch'].edit_list
+
+
+class TestLateAcceptanceHillClimbing(object):
+
+    def test_accept(self, setup_line_program):
+        class MyLateAcceptanceHillClimbing(LateAcceptanceHillClimbing):
+            def get_neighbour(self, patch):
+                return patch
+
+        lahc = MyLateAcceptanceHillClimbing(setup_line_program, history_length=2)
+        assert lahc.accept(1, 3, 2) is False
+        assert lahc.accept(2, 2, 2)
+        assert lahc.accept(3, 1, 2)
+        # worse than the visited patch, but not than the one visited two steps before
+        assert lahc.accept(4, 2, 1)
+        lahc.setup()
+        assert lahc.history == []
+
+
+class TestOperatorSelection(object):
+
+    def test_ucb(self):
+        selector = UCBSelector([LineDeletion, LineReplacement])
+        for _ in range(20):
+            operator = selector.select()
+            status = 'SUCCESS' if operator is LineDeletion else 'COMPILE_ERROR'
+            selector.update(operator, RunResult(status, 1), improved=False)
+        assert selector.counts[LineDeletion] > selector.counts[LineReplacement] > 0
+        assert selector.valid[LineDeletion] == selector.counts[LineDeletion]
+        assert selector.valid[LineReplacement] == 0
+
+    def test_ucb_pending(self):
+        selector = UCBSelector([LineDeletion, LineReplacement, LineInsertion])
+        assert {selector.select() for _ in range(3)} == {LineDeletion, LineReplacement, LineInsertion}
+        selector.update(LineDeletion, RunResult('SUCCESS', 1), improved=True)
+        assert selector.pending == {LineDeletion: 0, LineReplacement: 1, LineInsertion: 1}
+        selector.reset_pending()
+        assert selector.select([LineReplacement]) is LineReplacement
+        assert selector.select([LineMoving]) is LineMoving
+        assert selector.pending == {LineDeletion: 0, LineReplacement: 1, LineInsertion: 0}
+
+    def test_adaptive_pursuit(self):
+        selector = AdaptivePursuitSelector([LineDeletion, LineReplacement], p_min=0.1)
+        for _ in range(20):
+            selector.update(LineDeletion, RunResult('SUCCESS', 1), improved=True)
+            selector.update(LineReplacement, RunResult('COMPILE_ERROR'))
+        assert selector.probabilities[LineDeletion] == pytest.approx(0.9, abs=1e-3)
+        assert selector.probabilities[LineReplacement] == pytest.approx(0.1, abs=1e-3)
+
+    def test_local_search(self, setup_line_program):
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                patch.add(self.select_operator().create(self.program))
+                return patch
+
+        program = setup_line_program
+        ls = MyLocalSearch(program)
+        ls.operator_selector = UCBSelector([LineDeletion, LineReplacement])
+        ls.run(warmup_reps=1, epoch=1, max_iter=5, timeout=10, verbose=False)
+        assert sum(ls.operator_selector.counts.values()) == 5
+
+
+class TestBatchLocalSearch(object):
+
+    @pytest.mark.parametrize('acceptance', ['best', 'first'])
+    def test_run(self, setup_line_program, acceptance):
+        class MyBatchLocalSearch(BatchLocalSearch):
+            def setup(self):
+                self.edits = [LineDeletion(('triangle.py', 2)),
+                              LineReplacement(('triangle.py', 14), ('triangle.py', 9))]
+
+            def get_neighbour(self, patch):
+                patch.add(random.choice(self.edits))
+                return patch
+
+            def is_better_than_the_best(self, fitness, best_fitness):
+                return best_fitness is None or fitness < best_fitness
+
+            def stopping_criterion(self, iter, fitness):
+                return fitness == 0
+
+        program = setup_line_program
+        program.set_workers(2)
+        random.seed(0)
+        try:
+            ls = MyBatchLocalSearch(program, batch_size=4, acceptance=acceptance)
+            result = ls.run(warmup_reps=1, epoch=1, max_iter=5, timeout=10, verbose=False)
+        finally:
+            program.set_workers(0)
+        assert len(result) == 1
+        assert result[0]['FitnessEval'] <= 4 * 5
+        assert result[0]['Success']
+        assert result[0]['BestFitness'] == 0
+
+
+class TestGeneticProgramming(object):
+
+    def test_crossover(self, setup_line_program):
+        program = setup_line_program
+        gp = GeneticProgramming(program, [LineDeletion])
+        patch, other = Patch(program), Patch(program)
+        for i in range(3):
+            patch.add(LineDeletion(('triangle.py', i)))
+            other.add(LineDeletion(('triangle.py', 10 + i)))
+        for method in ['one_point', 'uniform']:
+            child = gp.crossover(patch, other, method=method)
+            assert set(child.edit_list) <= set(patch.edit_list + other.edit_list)
+        assert len(patch) == 3 and len(other) == 3
+
+    def test_run(self, setup_line_program):
+        class MyGeneticProgramming(GeneticProgramming):
+            def stopping_criterion(self, generation, fitness):
+                return fitness == 0
+
+        class FixingReplacement(LineReplacement):
+            __slots__ = ()
+
+            @classmethod
+            def create(cls, program):
+                return LineReplacement(('triangle.py', 14), ('triangle.py', 9))
+
+        program = setup_line_program
+        program.set_workers(2)
+        random.seed(0)
+        try:
+            gp = MyGeneticProgramming(program, [FixingReplacement, LineDeletion])
+            result = gp.run(warmup_reps=1, epoch=1, generations=3, pop_size=6, timeout=10, verbose=False)
+        finally:
+            program.set_workers(0)
+        assert len(result) == 1
+        assert result[0]['FitnessEval'] <= 3 * 6
+        assert result[0]['Success']
+        assert result[0]['BestFitness'] == 0 < gp.program.evaluate_patch(Patch(program)).fitness
+        assert LineReplacement(('triangle.py', 14), ('triangle.py', 9)) in result[0]['BestPatch'].edit_list
+
+
+class TestSteadyStateEvolution(object):
+
+    def test_replay(self, setup_line_program):
+        program = setup_line_program
+        program.set_workers(3)
+        state = random.getstate()
+        try:
+            ea = SteadyStateEvolution(program, [LineReplacement, LineDeletion])
+            result = ea.run(pop_size=4, max_evals=8, workers=3, timeout=10, seed=1, verbose=False)
+            replayed = ea.run(pop_size=4, max_evals=8, workers=3, timeout=10, seed=1,
+                              log=result['Log'], verbose=False)
+        finally:
+            program.set_workers(0)
+        # The global random generator is left untouched
+        assert random.getstate() == state
+        assert result['FitnessEval'] == len(result['Log']) == 8
+        assert sorted(result['Log']) == list(range(8))
+        assert replayed['Log'] == result['Log']
+        assert replayed['BestPatch'] == result['BestPatch']
+        assert replayed.get('BestFitness') == result.get('BestFitness')
+
+
+class TestNSGA2(object):
+
+    def test_non_dominated_sort(self):
+        points = [(1, 5), (2, 2), (5, 1), (3, 3), (2, 2), (4, 4), (6, 6)]
+        assert dominates((2, 2), (3, 3))
+        assert not dominates((2, 2), (2, 2))
+        assert not dominates((1, 5), (5, 1))
+        fronts = non_dominated_sort(points)
+        assert [sorted(front) for front in fronts] == [[0, 1, 2, 4], [3], [5], [6]]
+        for i, front in enumerate(fronts):
+            for j in front:
+                assert not any(dominates(points[k], points[j]) for other in fronts[i:] for k in other)
+        distances = crowding_distance([(1, 5), (2, 2), (5, 1)])
+        assert distances[0] == distances[2] == float('inf')
+        assert distances[1] == pytest.approx(2.0)
+
+    def test_run(self, setup_line_program):
+        class MyNSGA2(NSGA2):
+            def get_objectives(self, patch, run):
+                return (run.fitness, len(patch))
+
+        program = setup_line_program
+        program.set_workers(2)
+        random.seed(0)
+        try:
+            nsga2 = MyNSGA2(program, [LineReplacement, LineDeletion])
+            result = nsga2.run(generations=2, pop_size=6, timeout=10, verbose=False)
+        finally:
+            program.set_workers(0)
+        front = result[0]['ParetoFront']
+        assert front
+        assert any(len(solution['Patch']) == 0 for solution in front)
+        points = [(solution['Fitness'], len(solution['Patch'])) for solution in front]
+        assert not any(dominates(p, q) for p in points for q in points)
+
+    def test_operator_selector(self, setup_line_program):
+        class MyNSGA2(NSGA2):
+            def get_objectives(self, patch, run):
+                return (run.fitness, len(patch))
+
+        program = setup_line_program
+        random.seed(0)
+        nsga2 = MyNSGA2(program, [LineReplacement, LineDeletion])
+        nsga2.operator_selector = UCBSelector([LineReplacement, LineDeletion])
+        nsga2.run(generations=2, pop_size=6, timeout=10, verbose=False)
+        assert sum(nsga2.operator_selector.counts.values()) > 0
+        assert not any(nsga2.operator_selector.pending.values())
+        assert not nsga2.mutations
+
+
+class TestIslandModel(object):
+
+    def test_get_neighbours(self, setup_line_program):
+        factory = lambda program: None
+        assert IslandModel(setup_line_program, factory, islands=3).get_neighbours(2) == [0]
+        assert IslandModel(setup_line_program, factory, islands=3, topology='complete').get_neighbours(1) == [0, 2]
+        assert IslandModel(setup_line_program, factory, islands=2, topology=[[1], []]).get_neighbours(1) == []
+
+    def test_migration(self, setup_line_program):
+        import queue
+        program = setup_line_program
+        inbox, outbox = queue.Queue(), queue.Queue()
+        migration = Migration(program, inbox, [outbox], interval=2)
+        patch = Patch(program)
+        patch.add(LineDeletion(('triangle.py', 2)))
+        assert migration.exchange(1, patch, 1) == []
+        assert outbox.empty()
+        inbox.put((patch.encode(), 0))
+        assert migration.exchange(2, patch, 1) == [(patch, 0)]
+        assert outbox.get_nowait() == (patch.encode(), 1)
+
+    def test_run(self, setup_line_program):
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                patch.add(random.choice([LineDeletion(('triangle.py', 2)),
+                                         LineReplacement(('triangle.py', 14), ('triangle.py', 9))]))
+                return patch
+
+            def is_better_than_the_best(self, fitness, best_fitness):
+                return best_fitness is None or fitness < best_fitness
+
+        program = setup_line_program
+        islands = IslandModel(program, MyLocalSearch, islands=2, interval=2)
+        random.seed(0)
+        result = islands.run(warmup_reps=1, epoch=1, max_iter=4, timeout=10, verbose=False)
+        assert len(result['Islands']) == 2
+        assert result['FitnessEval'] == sum(r[0]['FitnessEval'] for r in result['Islands'])
+        assert isinstance(result['BestPatch'], Patch)
+        assert result['BestFitness'] == 0
+        assert not any(path.endswith('_island0') or path.endswith('_island1')
+                       for path in os.listdir(os.path.dirname(program.tmp_path)))
+
+    def test_run_with_dead_island(self, setup_line_program):
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                patch.add(LineDeletion(('triangle.py', 2)))
+                return patch
+
+            def run(self, **kwargs):
+                # The first island dies without reporting, the second one completes
+                if self.program.timestamp.endswith('island0'):
+                    os._exit(1)
+                return super().run(**kwargs)
+
+        program = setup_line_program
+        islands = IslandModel(program, MyLocalSearch, islands=2, topology='isolated')
+        with pytest.raises(RuntimeError):
+            islands.run(warmup_reps=1, epoch=1, max_iter=4, timeout=10, verbose=False)
+        assert not any('_island' in path for path in os.listdir(os.path.dirname(program.tmp_path)))
+
+
+class TestDeltaDebugging(object):
+
+    def test_run(self, setup_line_program):
+        program = setup_line_program
+        patch = Patch(program)
+        patch.add(LineDeletion(('triangle.py', 2)))
+        patch.add(LineReplacement(('triangle.py', 7), ('triangle.py', 5)))
+        patch.add(LineReplacement(('triangle.py', 14), ('triangle.py', 9)))
+        patch.add(LineDeletion(('triangle.py', 12)))
+        program.set_workers(2)
+        try:
+            result = DeltaDebugging(program).run(patch, timeout=10)
+        finally:
+            program.set_workers(0)
+        assert result['Fitness'] == 0
+        assert result['Patch'].edit_list == (LineReplacement(('triangle.py', 14), ('triangle.py', 9)),)
+        assert result['diff'].strip()
+        assert result['FitnessEval'] > 0
+
+
+class TestEditScan(object):
+
+    def test_iter_single_edits(self, setup_line_program):
+        program = setup_line_program
+        edits = list(iter_single_edits(program, [LineDeletion]))
+        assert len(edits) == len(program.modification_points['triangle.py'])
+        assert len(set(edits)) == len(edits)
+        sampled = list(iter_single_edits(program, [LineDeletion, LineReplacement], sample=0.1, seed=0))
+        assert sampled == list(iter_single_edits(program, [LineDeletion, LineReplacement], sample=0.1, seed=0))
+        assert len(sampled) < len(edits) ** 2
+
+    def test_run(self, setup_line_program, tmp_path):
+        program = setup_line_program
+        path = str(tmp_path / 'edits.json')
+        fix = LineReplacement(('triangle.py', 14), ('triangle.py', 9))
+        edits = [LineDeletion(('triangle.py', 2)), fix]
+        table = EditScan(program).run(edits, timeout=10, batch_size=1, path=path, verbose=False)
+        assert len(table) == 2 and fix in table
+        assert table.get(fix) == ('SUCCESS', 0)
+        assert table.improving_edits() == [fix]
+        assert fix in table.safe_edits()
+        assert not table.is_pruned(fix)
+
+        loaded = EditEffectTable.load(path, program)
+        assert loaded.original_fitness == table.original_fitness
+        assert loaded.entries == table.entries
+        # The edits already in the table are not evaluated again
+        resumed = EditScan(program).run(edits + [LineDeletion(('triangle.py', 3))],
+                                        timeout=10, path=path, verbose=False)
+        assert len(resumed) == 3
+
+
+class TestSurrogateFilter(object):
+
+    def test_skip(self, setup_line_program):
+        program = setup_line_program
+        surrogate = SurrogateFilter(program, threshold=0.9, holdout=0.5, min_observations=10, seed=0)
+        invalid, valid = Patch(program), Patch(program)
+        invalid.add(LineReplacement(('triangle.py', 0), ('triangle.py', 1)))
+        valid.add(LineDeletion(('triangle.py', 2)))
+        assert 'LineReplacement.target.file=triangle.py' in surrogate.features(invalid)
+        assert not surrogate.skip(invalid)
+        for i in range(2, 12):
+            patch = Patch(program)
+            patch.add(LineReplacement(('triangle.py', 0), ('triangle.py', i)))
+            surrogate.observe(patch, RunResult('COMPILE_ERROR'))
+            patch = Patch(program)
+            patch.add(LineDeletion(('triangle.py', i)))
+            surrogate.observe(patch, RunResult('SUCCESS', 1))
+        # A patch is only observed once
+        totals = list(surrogate.totals)
+        surrogate.observe(patch, RunResult('COMPILE_ERROR'))
+        assert surrogate.totals == totals
+        assert surrogate.predict(invalid) > 0.9 > surrogate.predict(valid)
+        assert not any(surrogate.skip(valid) for _ in range(10))
+        skipped = [surrogate.skip(invalid) for _ in range(20)]
+        assert surrogate.skipped == sum(skipped) > 0
+        surrogate.observe(invalid, RunResult('SUCCESS', 1), improved=True)
+        report = surrogate.report()
+        assert report['Skipped'] == surrogate.skipped
+        assert report['HoldoutEvaluated'] == report['HoldoutImproved'] == 1
+        assert report['MissedImproved'] == surrogate.skipped
+
+    def test_features(self, setup_line_program):
+        class LineCopy(LineEdit):
+            __slots__ = ('target', 'ingredient')
+
+            def apply(self, program, new_contents, modification_points):
+                return False
+
+            @classmethod
+            def create(cls, program):
+                return cls(program.random_target(), None)
+
+        program = setup_line_program
+        surrogate = SurrogateFilter(program, max_observed=2)
+        patches = []
+        for i in range(3):
+            patch = Patch(program)
+            patch.add(LineCopy(('triangle.py', i), None))
+            patches.append(patch)
+            surrogate.observe(patch, RunResult('SUCCESS', 1))
+        assert 'LineCopy.ingredient=None' in surrogate.features(patches[0])
+        assert list(surrogate.observed) == patches[1:]
+        assert surrogate.observations == 3
+
+    def test_local_search(self, setup_line_program):
+        class MyLocalSearch(LocalSearch):
+            def get_neighbour(self, patch):
+                patch.add(LineDeletion(('triangle.py', random.randrange(0, 3))))
+                return patch
+
+        program = setup_line_program
+        local_search = MyLocalSearch(program)
+        local_search.surrogate = SurrogateFilter(program, min_observations=2)
+        result = local_search.run(warmup_reps=1, epoch=1, max_iter=5, timeout=10, verbose=False)
+        assert 0 < result[0]['Surrogate']['Observations'] <= result[0]['FitnessEval']
+        assert result[0]['Surrogate']['Observations'] == len(local_search.surrogate.observed)
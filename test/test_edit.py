@@ -1,9 +1,12 @@
 import pytest
+import ast
 import copy
 from pyggi.line import LineProgram
 from pyggi.line import LineReplacement, LineInsertion, LineDeletion
+from pyggi.line.line import LineEdit
 from pyggi.tree import TreeProgram
-from pyggi.tree import StmtReplacement, StmtInsertion, StmtDeletion
+from pyggi.tree import StmtReplacement, StmtInsertion, StmtDeletion, StmtMoving
+from pyggi.tree import AstorExprEngine, ExprReplacement, OperatorReplacement
 
 @pytest.fixture(scope='session')
 def setup_line_replacement():
@@ -49,6 +52,14 @@ def setup_stmt_deletion():
     target = (target_file, 1)
     return StmtDeletion(target), target
 
+@pytest.fixture(scope='session')
+def setup_expr_program():
+    class ExprProgram(TreeProgram):
+        @classmethod
+        def get_engine(cls, file_name):
+            return AstorExprEngine
+    return ExprProgram('../sample/Triangle_bug_python')
+
 class TestEdit(object):
     def test_equal(self):
         target_file = 'Triangle.java'
@@ -64,6 +75,54 @@ class TestEdit(object):
         assert line_replacement != line_replacement3
         assert line_insertion != line_replacement
 
+    def test_hash(self):
+        target = ('Triangle.java', 1)
+        ingredient = ('Triangle.java', 2)
+        edits = {LineReplacement(target, ingredient), LineReplacement(target, ingredient),
+                 LineInsertion(target, ingredient), LineDeletion(target)}
+        assert len(edits) == 3
+        assert LineReplacement(target, ingredient) in edits
+        assert copy.deepcopy(LineReplacement(target, ingredient)) in edits
+
+    def test_immutable(self, setup_line_replacement):
+        line_replacement, target, ingredient = setup_line_replacement
+        with pytest.raises(AttributeError):
+            line_replacement.target = ingredient
+        with pytest.raises(AttributeError):
+            line_replacement.weight = 1
+        assert line_replacement.fields == ('target', 'ingredient')
+        assert line_replacement.target == target
+
+    def test_legacy_edit(self):
+        class LegacyDeletion(LineEdit):
+            def __init__(self, target):
+                self.target = target
+
+            def apply(self, program, new_contents, modification_points):
+                return False
+
+            @classmethod
+            def create(cls, program):
+                return cls(program.random_target())
+
+        edit = LegacyDeletion(('Triangle.java', 1))
+        assert LegacyDeletion.fields == ('target',)
+        assert edit.values == (('Triangle.java', 1),)
+        assert edit == LegacyDeletion(('Triangle.java', 1))
+        assert edit != LegacyDeletion(('Triangle.java', 2))
+        assert len({edit, LegacyDeletion(('Triangle.java', 1))}) == 1
+        with pytest.raises(AttributeError):
+            edit.target = ('Triangle.java', 2)
+
+    def test_enumerate_unknown_field(self, setup_expr_program):
+        class WeightedDeletion(LineEdit):
+            def __init__(self, target, weight):
+                self.target = target
+                self.weight = weight
+
+        with pytest.raises(ValueError):
+            list(WeightedDeletion.enumerate(setup_expr_program, target_file='triangle.py'))
+
     def test_domain(self, setup_line_replacement, setup_stmt_replacement):
         line_replacement, target, ingredient = setup_line_replacement
         stmt_replacement, target2, ingredient2 = setup_stmt_replacement
@@ -100,6 +159,21 @@ class TestEdit(object):
             assert program.modification_points[target[0]] != len(modification_points[target[0]])
             assert program.contents != new_contents
 
+        def test_normalise(self):
+            program = LineProgram('../sample/Triangle_bug_java')
+            lines = program.contents['Triangle.java']
+            canonical, distinct = program.get_ingredient_index('Triangle.java')
+            assert len(distinct) == len(set(lines)) < len(lines)
+            duplicate = next(i for i in range(len(lines)) if canonical[i] != i)
+            assert lines[canonical[duplicate]] == lines[duplicate]
+
+            edit = LineReplacement(('Triangle.java', 1), ('Triangle.java', duplicate))
+            normalised = edit.normalise(program)
+            assert normalised == LineReplacement(('Triangle.java', 1), ('Triangle.java', canonical[duplicate]))
+            assert normalised.normalise(program) is normalised
+            for _ in range(20):
+                assert LineReplacement.create(program, target_file='Triangle.java').ingredient[1] in distinct
+
     class TestLineInsertion(object):
 
         def test_init(self, setup_line_insertion):
@@ -225,3 +299,97 @@ class TestEdit(object):
             new_contents = copy.deepcopy(program.contents)
             stmt_deletion.apply(program, new_contents, modification_points)
             assert program.modification_points[target[0]] == modification_points[target[0]]
+
+    class TestExprEdits(object):
+
+        def find(self, program, source):
+            sources = [program.get_source('triangle.py', i)
+                       for i in range(len(program.modification_points['triangle.py']))]
+            return ('triangle.py', sources.index(source))
+
+        def test_modification_points(self, setup_expr_program):
+            program = setup_expr_program
+            points = program.modification_points['triangle.py']
+            assert all(isinstance(pos, tuple) for pos in points)
+            assert all(AstorExprEngine.is_target(AstorExprEngine.get_node(program.contents['triangle.py'], pos)[3])
+                       for pos in points)
+
+        def test_ingredient_constraints_class(self):
+            from types import SimpleNamespace
+            root = ast.parse('y = 0\nclass A:\n    x = y + 1\n    def f(self):\n        return y\n')
+            points = AstorExprEngine.get_modification_points(root)
+            program = SimpleNamespace(contents={'a.py': root}, modification_points={'a.py': points})
+            _, provisions = AstorExprEngine.get_ingredient_constraints(program, 'a.py')
+            in_class = points.index((('body', 1), ('body', 0), ('value', None)))
+            in_method = points.index((('body', 1), ('body', 1), ('body', 0), ('value', None)))
+            assert {'name:x', 'name:f', 'name:y'} <= provisions[in_class]
+            assert 'name:y' in provisions[in_method]
+            assert 'name:x' not in provisions[in_method] and 'name:f' not in provisions[in_method]
+
+        def test_ingredient_constraints_outer_fields(self):
+            from types import SimpleNamespace
+            root = ast.parse('x = 0\ndef f(a=x):\n    y = [i for i in a]\n    return y\n')
+            points = AstorExprEngine.get_modification_points(root)
+            program = SimpleNamespace(contents={'a.py': root}, modification_points={'a.py': points})
+            _, provisions = AstorExprEngine.get_ingredient_constraints(program, 'a.py')
+            default = points.index((('body', 1), ('args', None), ('defaults', 0)))
+            iterable = points.index((('body', 1), ('body', 0), ('value', None), ('generators', 0), ('iter', None)))
+            element = points.index((('body', 1), ('body', 0), ('value', None), ('elt', None)))
+            assert 'name:x' in provisions[default]
+            assert not {'name:a', 'name:y', 'function'} & provisions[default]
+            assert {'name:a', 'name:y', 'function'} <= provisions[iterable]
+            assert 'name:i' not in provisions[iterable] and 'name:i' in provisions[element]
+
+        def test_expr_replacement(self, setup_expr_program):
+            program = setup_expr_program
+            edit = ExprReplacement(self.find(program, '(a > b)'), self.find(program, '(a > c)'))
+            modification_points = copy.deepcopy(program.modification_points)
+            new_contents = copy.deepcopy(program.contents)
+            assert edit.apply(program, new_contents, modification_points)
+            assert 'if a > c:\n        tmp = a' in AstorExprEngine.dump(new_contents['triangle.py'])
+            for _ in range(10):
+                edit = ExprReplacement.create(program)
+                assert edit.ingredient[1] in program.get_compatible_ingredients(edit.target, 'triangle.py')
+            # A comparison is only replaced by a boolean or any value, not a number
+            compatible = program.get_compatible_ingredients(self.find(program, '(a > b)'), 'triangle.py')
+            assert self.find(program, '0')[1] not in compatible
+            assert self.find(program, 'a + b')[1] in compatible
+            assert self.find(program, '(a == b and b == c)')[1] in compatible
+
+        def test_replaced_enclosing_expr(self, setup_expr_program):
+            program = setup_expr_program
+            modification_points = copy.deepcopy(program.modification_points)
+            new_contents = copy.deepcopy(program.contents)
+            # Once the comparison is replaced, its operands are not the original ones anymore
+            assert ExprReplacement(self.find(program, '(a + b <= c)'), self.find(program, '(a > c)')).apply(
+                program, new_contents, modification_points)
+            assert not ExprReplacement(self.find(program, 'a + b'), self.find(program, '0')).apply(
+                program, new_contents, modification_points)
+            assert not OperatorReplacement(self.find(program, 'a + b'), 'Sub').apply(
+                program, new_contents, modification_points)
+            assert not ExprReplacement(self.find(program, '(a + b <= c)'), self.find(program, '0')).apply(
+                program, new_contents, modification_points)
+            assert 'if a > c:\n        return' in AstorExprEngine.dump(new_contents['triangle.py'])
+
+        def test_operator_replacement(self, setup_expr_program):
+            program = setup_expr_program
+            target = self.find(program, '(a + b <= c)')
+            edit = OperatorReplacement(target, 'Lt')
+            new_contents = copy.deepcopy(program.contents)
+            assert edit.apply(program, new_contents, copy.deepcopy(program.modification_points))
+            assert 'if a + b < c:' in AstorExprEngine.dump(new_contents['triangle.py'])
+            assert not OperatorReplacement(target, 'And').apply(
+                program, new_contents, copy.deepcopy(program.modification_points))
+            edits = list(OperatorReplacement.enumerate(program))
+            assert edit in edits and OperatorReplacement(target, 'LtE') not in edits
+            assert isinstance(OperatorReplacement.create(program), OperatorReplacement)
+
+        def test_stmt_edits_unsupported(self, setup_expr_program):
+            program = setup_expr_program
+            for edit_class in [StmtReplacement, StmtInsertion, StmtDeletion, StmtMoving]:
+                assert not edit_class.supports(AstorExprEngine)
+                assert not list(edit_class.enumerate(program))
+                with pytest.raises(ValueError):
+                    edit_class.create(program)
+                with pytest.raises(ValueError):
+                    edit_class.create(program, target_file='triangle.py')
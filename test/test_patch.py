@@ -1,7 +1,8 @@
 import pytest
-from pyggi.base import Patch
+from pyggi.base import Patch, AbstractEdit
 from pyggi.line import LineProgram
 from pyggi.line import LineDeletion, LineMoving, LineInsertion
+from pyggi.line.line import LineEdit
 
 @pytest.fixture(scope='session')
 def setup():
@@ -38,6 +39,30 @@ class TestPatch(object):
 
         assert patch == patch2
 
+    def test_hash(self, setup):
+        patch, program = setup
+        patch2 = Patch(program)
+        patch2.add(LineDeletion(('Triangle.java', 1)))
+        patch3 = Patch(program)
+        patch3.add(LineDeletion(('Triangle.java', 1)))
+        assert hash(patch2) == hash(patch3)
+        assert len({patch2, patch3}) == 1
+        assert patch3 in {patch2}
+
+    def test_add_equivalent(self, setup):
+        patch, program = setup
+        lines = program.contents['Triangle.java']
+        first = lines.index('        }')
+        second = lines.index('        }', first + 1)
+        patch2 = Patch(program)
+        patch2.add(LineInsertion(('Triangle.java', 1), ('Triangle.java', first)))
+        patch3 = Patch(program)
+        patch3.add(LineInsertion(('Triangle.java', 1), ('Triangle.java', second)))
+        assert patch2 == patch3
+        patch4 = Patch(program)
+        patch4.add(LineMoving(('Triangle.java', 1), ('Triangle.java', second)))
+        assert patch4.edit_list[0].ingredient == ('Triangle.java', second)
+
     def test_clone(self, setup):
         patch, program = setup
         cloned_patch = patch.clone()
@@ -45,6 +70,17 @@ class TestPatch(object):
         assert cloned_patch.program == patch.program
         assert cloned_patch == patch
 
+    def test_clone_is_independent(self, setup):
+        _, program = setup
+        patch = Patch(program)
+        patch.add(LineDeletion(('Triangle.java', 1)))
+        cloned_patch = patch.clone()
+        cloned_patch.add(LineDeletion(('Triangle.java', 2)))
+        cloned_patch.remove(0)
+        assert len(patch) == 1
+        assert patch.edit_list[0] == LineDeletion(('Triangle.java', 1))
+        assert cloned_patch.edit_list == (LineDeletion(('Triangle.java', 2)),)
+
     def test_add(self, setup):
         patch, program = setup
         deletion_operator = LineDeletion
@@ -76,6 +112,41 @@ class TestPatch(object):
         else:
             assert run.fitness is None
 
+    def test_encode(self, setup):
+        _, program = setup
+        patch = Patch(program)
+        patch.add(LineMoving(('Triangle.java', 3), ('Triangle.java', 5), 'after'))
+        patch.add(LineDeletion(('Triangle.java', 1)))
+        patch.add(LineDeletion(('Triangle.java', 2)))
+        assert patch.encode() == [['pyggi.line.line.LineMoving', 'pyggi.line.line.LineDeletion'],
+                                  [[0, {'point': [0, 3]}, {'point': [0, 5]}, 'after'],
+                                   [1, {'point': [0, 1]}], [1, {'point': [0, 2]}]]]
+        assert Patch.decode(program, patch.encode()) == patch
+        assert Patch.from_json(program, patch.to_json()) == patch
+        assert Patch.from_bytes(program, patch.to_bytes()) == patch
+        assert Patch.from_bytes(program, Patch(program).to_bytes()) == Patch(program)
+
+    def test_encode_tuple_values(self, setup):
+        _, program = setup
+        class LineDeletion(LineEdit):
+            __slots__ = ('target', 'span')
+
+            def apply(self, program, new_contents, modification_points):
+                return False
+
+            @classmethod
+            def create(cls, program):
+                return cls(program.random_target(), (1, 2))
+
+        assert AbstractEdit.registry[LineDeletion.type_name()] is LineDeletion
+        assert AbstractEdit.registry['pyggi.line.line.LineDeletion'] is not LineDeletion
+        patch = Patch(program)
+        patch.add(LineDeletion(('Triangle.java', 1), (2, 3)))
+        patch.add(LineDeletion(('Triangle.java', 2), ('Triangle.java', 3)))
+        assert Patch.decode(program, patch.encode()) == patch
+        assert Patch.from_json(program, patch.to_json()) == patch
+        assert Patch.from_bytes(program, patch.to_bytes()) == patch
+
     def test_remove(self, setup):
         patch, program = setup
         old_patch = patch.clone()
@@ -83,3 +154,14 @@ class TestPatch(object):
 
         assert len(patch) == len(old_patch) - 1
         assert patch.edit_list == old_patch.edit_list[1:]
+
+    def test_hash_cache(self, setup):
+        _, program = setup
+        patch = Patch(program)
+        patch.add(LineDeletion(('Triangle.java', 1)))
+        other = patch.clone()
+        assert hash(patch) == hash(other) and {patch, other} == {patch}
+        other.add(LineDeletion(('Triangle.java', 2)))
+        assert hash(other) == hash(tuple(other.edit_list))
+        other.edit_list = patch.edit_list
+        assert hash(other) == hash(patch)
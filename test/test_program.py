@@ -1,9 +1,10 @@
 import pytest
+import ast
 import os
 import random
-from pyggi.base import Patch
-from pyggi.line import LineProgram, LineInsertion, LineEngine
-from pyggi.tree import TreeProgram, StmtInsertion, AstorEngine
+from pyggi.base import Patch, RunResult
+from pyggi.line import LineProgram, LineInsertion, LineDeletion, LineEngine
+from pyggi.tree import TreeProgram, StmtInsertion, StmtReplacement, AstorEngine, XmlEngine
 
 class MyLineProgram(LineProgram):
     def compute_fitness(self, result, return_code, stdout, stderr, elapsed_time):
@@ -38,6 +39,13 @@ def setup_line():
     line_program = MyLineProgram('../sample/Triangle_bug_python')
     return line_program
 
+@pytest.fixture
+def setup_cached_line(setup_line):
+    setup_line.variant_cache_size = 100
+    yield setup_line
+    setup_line.variant_cache_size = 0
+    setup_line.variant_cache.clear()
+
 @pytest.fixture(scope='session')
 def setup_tree():
     tree_program = MyTreeProgram('../sample/Triangle_bug_python')
@@ -77,6 +85,35 @@ class TestLineProgram(object):
         assert program.test_command == test_command
         assert program.target_files == target_files
 
+    def test_filter_points(self):
+        config = {
+            "target_files": ["triangle.py"],
+            "test_command": "pytest -s test_triangle.py",
+            "filter_points": True
+        }
+        program = LineProgram('../sample/Triangle_bug_python', config=config)
+        lines = program.contents['triangle.py']
+        points = program.modification_points['triangle.py']
+        assert lines.index('    # Sort the sides so that a <= b <= c') not in points
+        assert lines.index('import time') not in points and lines.index('') not in points
+        assert lines.index('    if a > b:') in points
+        # The indices of the edits are the ones of the relevant lines
+        index = points.index(lines.index('    if a > b:'))
+        assert program.get_source('triangle.py', index) == '    if a > b:'
+        patch = Patch(program)
+        patch.add(LineInsertion(('triangle.py', index), ('triangle.py', index + 1)))
+        new_lines = program.get_modified_contents(patch)['triangle.py']
+        assert new_lines[points[index]:points[index] + 2] == ['        tmp = a', '    if a > b:']
+        assert program.diff(patch).count('+ ') == 1
+
+        class MyLineProgram(LineProgram):
+            def filter_modification_points(self, file_name, modification_points):
+                points = super().filter_modification_points(file_name, modification_points)
+                return [i for i in points if 'tmp' not in self.contents[file_name][i]]
+        program = MyLineProgram('../sample/Triangle_bug_python', config=config)
+        assert len(program.modification_points['triangle.py']) < len(points)
+        assert program.modification_points['triangle.py'][0] == points[0]
+
     def test_get_engine(self, setup_line):
         program = setup_line
         assert program.get_engine('triangle.py') == LineEngine
@@ -145,6 +182,155 @@ class TestLineProgram(object):
         assert run.status == 'SUCCESS'
         assert run.fitness is not None
 
+    def test_evaluate_patch_timings(self, setup_cached_line):
+        program = setup_cached_line
+        run = program.evaluate_patch(Patch(program), use_cache=False)
+        assert set(run.timings) == {'apply', 'dump', 'cache', 'syntax', 'write', 'spawn', 'test', 'parse'}
+        assert all(duration >= 0 for duration in run.timings.values())
+        cached_run = program.evaluate_patch(Patch(program))
+        assert cached_run.cached
+        assert set(cached_run.timings) == {'apply', 'dump', 'cache'}
+
+    def test_evaluate_noop_patch(self, setup_cached_line):
+        program = setup_cached_line
+        run = program.evaluate_patch(Patch(program))
+        patch = Patch(program)
+        patch.add(LineDeletion(('triangle.py', 2)))
+        noop_run = program.evaluate_patch(patch)
+        assert noop_run.cached
+        assert noop_run.status == run.status and noop_run.fitness == run.fitness
+        assert not program.evaluate_patch(patch, use_cache=False).cached
+        patch.add(LineDeletion(('triangle.py', 10)))
+        assert not program.evaluate_patch(patch).cached
+        patch.add(LineDeletion(('triangle.py', 10)))
+        assert program.evaluate_patch(patch).cached
+
+    def test_variant_cache_size(self, setup_line):
+        program = setup_line
+        program.evaluate_patch(Patch(program))
+        assert not program.evaluate_patch(Patch(program)).cached
+        assert not program.variant_cache
+        program.variant_cache_size = 2
+        try:
+            patches = []
+            for index in (2, 10, 11):
+                patch = Patch(program)
+                patch.add(LineDeletion(('triangle.py', index)))
+                patches.append(patch)
+                program.evaluate_patch(patch)
+            assert len(program.variant_cache) == 2
+            # The least recently used variant is evicted
+            assert not program.evaluate_patch(patches[0]).cached
+            assert program.evaluate_patch(patches[2]).cached
+        finally:
+            program.variant_cache_size = 0
+            program.variant_cache.clear()
+
+    def test_evaluate_patch_with_apply(self):
+        class MyApplyProgram(MyLineProgram):
+            def apply(self, patch):
+                self.applied.append(patch)
+                return super().apply(patch)
+
+        program = MyApplyProgram('../sample/Triangle_bug_python')
+        program.applied = []
+        patch = Patch(program)
+        patch.add(LineDeletion(('triangle.py', 10)))
+        run = program.evaluate_patch(patch)
+        assert program.applied == [patch]
+        assert run.status == 'SUCCESS'
+        program.remove_tmp_variant()
+
+    def test_evaluate_invalid_patch(self, setup_line):
+        program = setup_line
+        patch = Patch(program)
+        patch.add(LineDeletion(('triangle.py', 6)))
+        run = program.evaluate_patch(patch)
+        assert run.status == 'COMPILE_ERROR'
+        assert run.fitness is None
+        assert 'syntax' in run.timings and 'test' not in run.timings
+
+    def test_compute_fitness(self):
+        program = LineProgram('../sample/Triangle_bug_python')
+        try:
+            result = RunResult('SUCCESS')
+            program.compute_fitness(result, 0, '1.5\n', '', 0.1)
+            assert result.status == 'SUCCESS' and result.fitness == 1.5
+            result = RunResult('SUCCESS')
+            program.compute_fitness(result, 0, '1 2', '', 0.1)
+            assert result.status == 'PARSE_ERROR'
+            program.multi_objective = True
+            result = RunResult('SUCCESS')
+            program.compute_fitness(result, 0, '1 2', '', 0.1)
+            assert result.status == 'SUCCESS' and result.fitness == (1.0, 2.0)
+        finally:
+            program.remove_tmp_variant()
+
+    def test_can_check_syntax(self, setup_line, tmp_path):
+        assert setup_line.can_check_syntax('triangle.py')
+        # The braces are only balanced once preprocessed
+        (tmp_path / 'a.c').write_text('int f(int a) {\n#ifdef A\n  if (a) {\n#else\n  if (!a) {\n#endif\n'
+                                      '    return 1;\n  }\n  return 0;\n}\n')
+        program = LineProgram(str(tmp_path), config={'target_files': ['a.c'], 'test_command': 'echo 1'})
+        try:
+            assert not program.can_check_syntax('a.c')
+            patch = Patch(program)
+            patch.add(LineDeletion(('a.c', 6)))
+            assert program.evaluate_patch(patch).status == 'SUCCESS'
+        finally:
+            program.remove_tmp_variant()
+
+    def test_evaluate_equivalent_patch(self, setup_cached_line):
+        program = setup_cached_line
+        program.normalise_variants = True
+        try:
+            run = program.evaluate_patch(Patch(program))
+            patch = Patch(program)
+            patch.add(LineDeletion(('triangle.py', 7)))
+            equivalent_run = program.evaluate_patch(patch)
+            assert equivalent_run.cached
+            assert equivalent_run.fitness == run.fitness
+        finally:
+            program.normalise_variants = False
+
+    def test_select_tests(self):
+        config = {
+            "target_files": ["triangle.py"],
+            "test_command": "pytest -s {tests}",
+            "coverage_command": "python get_coverage.py"
+        }
+        program = MyLineProgram('../sample/Triangle_bug_python', config=config)
+        assert len(program.coverage) == 4
+        patch = Patch(program)
+        assert program.select_tests(patch) is None
+        patch.add(LineDeletion(('triangle.py', 10)))
+        tests = program.select_tests(patch)
+        assert 'test_triangle.py::test_invalid_triangles' in tests
+        assert 'test_triangle.py::test_equalateral_triangles' not in tests
+        assert program.get_test_command(tests).startswith('pytest -s test_triangle.py::')
+        assert program.get_test_command(None).strip() == 'pytest -s'
+        run = program.evaluate_patch(patch)
+        assert run.status == 'SUCCESS'
+
+    def test_prioritise_tests(self, setup_line):
+        program = setup_line
+        program.prioritise_tests = True
+        program.fail_fast = True
+        try:
+            run = program.evaluate_patch(Patch(program))
+            assert run.status == 'SUCCESS'
+            assert run.fitness == 1
+            assert len(program.test_history) == 1
+            failed = list(program.test_history)[0]
+            program.update_test_history(['test_b'])
+            assert program.prioritise(['test_a', failed, 'test_b']) == ['test_b', failed, 'test_a']
+            env = program.get_test_env()
+            assert env['PYGGI_TEST_ORDER'].split() == ['test_b', failed]
+            assert env['PYGGI_FAIL_FAST'] == '1'
+        finally:
+            program.prioritise_tests = False
+            program.fail_fast = False
+
     def test_remove_tmp_variant(self, setup_line):
         program = setup_line
         program.remove_tmp_variant()
@@ -220,6 +406,71 @@ class TestTreeProgram(object):
         patch.add(StmtInsertion(('triangle.py', 1), ('triangle.py', 10), direction='after'))
         assert program.diff(patch).strip()
 
+    def test_get_line_ranges(self, setup_tree):
+        program = setup_tree
+        line_ranges = AstorEngine.get_line_ranges(program, 'triangle.py')
+        assert len(line_ranges) == len(program.modification_points['triangle.py'])
+        assert all(first <= last for first, last in line_ranges)
+
+    def test_get_equivalence_key(self, setup_tree):
+        key = lambda source: AstorEngine.get_equivalence_key('a.py', ast.parse(source), source)
+        assert key('x = 1\n') == key('x = 1 # one\npass\n')
+        assert key('def f():\n    "doc"\n    return 1\n') == key('def f():\n    "doc"\n    "str"\n    return (1)\n')
+        assert key('def f():\n    "doc"\n    return 1\n') != key('def f():\n    return 1\n')
+        assert key('x = 1\n') != key('x = 2\n')
+
+    def test_get_node_type(self, setup_tree):
+        program = setup_tree
+        node_types = [AstorEngine.get_node_type(program, 'triangle.py', i)
+                      for i in range(len(program.modification_points['triangle.py']))]
+        assert 'FunctionDef' in node_types and 'Return' in node_types
+
+    def test_get_compatible_ingredients(self, setup_tree):
+        program = setup_tree
+        sources = [program.get_source('triangle.py', i).strip()
+                   for i in range(len(program.modification_points['triangle.py']))]
+        in_function = sources.index('tmp = a')
+        at_module = sources.index('import time')
+        returns = [i for i, source in enumerate(sources) if source.startswith('return')]
+
+        compatible = program.get_compatible_ingredients(('triangle.py', at_module), 'triangle.py')
+        assert at_module in compatible and in_function not in compatible
+        assert not set(returns) & set(compatible)
+        compatible = program.get_compatible_ingredients(('triangle.py', in_function), 'triangle.py')
+        assert in_function in compatible and returns[0] in compatible
+        # The targets with the same provisions share their ingredients
+        assert program.get_compatible_ingredients(('triangle.py', sources.index('a = b')), 'triangle.py') is compatible
+        for _ in range(10):
+            edit = StmtReplacement.create(program, target_file='triangle.py')
+            assert edit.ingredient[1] in program.get_compatible_ingredients(edit.target, 'triangle.py')
+
+    def test_get_ingredient_constraints_class(self):
+        from types import SimpleNamespace
+        root = ast.parse('y = 0\nclass A:\n    x = 1\n    def f(self):\n        return y\n')
+        points = AstorEngine.get_modification_points(root)
+        program = SimpleNamespace(contents={'a.py': root}, modification_points={'a.py': points})
+        _, provisions = AstorEngine.get_ingredient_constraints(program, 'a.py')
+        in_class = points.index([('body', 1), ('body', 0)])
+        in_method = points.index([('body', 1), ('body', 1), ('body', 0)])
+        assert {'name:x', 'name:f', 'name:y', 'name:A'} <= provisions[in_class]
+        assert 'name:y' in provisions[in_method] and 'name:A' in provisions[in_method]
+        assert 'name:x' not in provisions[in_method] and 'name:f' not in provisions[in_method]
+
+    def test_get_ingredient_constraints_xml(self):
+        from types import SimpleNamespace
+        root = XmlEngine.string_to_tree(
+            '<unit><function><block><while><block><break>break;</break></block></while>'
+            '<return>return;</return></block></function><decl_stmt>int y;</decl_stmt></unit>')
+        points = XmlEngine.get_modification_points(root)
+        program = SimpleNamespace(contents={'a.xml': root}, modification_points={'a.xml': points})
+        requirements, provisions = XmlEngine.get_ingredient_constraints(program, 'a.xml')
+        index = {xpath.split('/')[-1][:-3]: i for i, xpath in enumerate(points)}
+        assert requirements[index['break']] == {'accepts:break', 'break'}
+        assert requirements[index['while']] == {'accepts:while'}
+        assert requirements[index['return']] <= provisions[index['while']]
+        assert not requirements[index['return']] <= provisions[index['decl_stmt']]
+        assert not requirements[index['break']] <= provisions[index['return']]
+
     def test_exec_cmd(self, setup_tree):
         program = setup_tree
         _, stdout, _, _ = program.exec_cmd("echo hello")
@@ -1,6 +1,7 @@
 import pytest
 import shutil
-from pyggi.utils import get_file_extension
+import warnings
+from pyggi.utils import get_file_extension, check_syntax, normalise_source, summarise_timings
 
 class TestUtils(object):
 
@@ -13,8 +14,42 @@ class TestUtils(object):
         assert get_file_extension(java_file) == '.java'
         assert get_file_extension(c_file) == '.c'
 
+    def test_check_syntax(self):
+        assert check_syntax('a.py', 'def f():\n    return 1\n')
+        assert not check_syntax('a.py', 'def f():\nreturn 1\n')
+        assert not check_syntax('a.py', 'break\n')
+        assert check_syntax('A.java', 'class A { String s = "}"; char c = \'(\'; /* { */ }')
+        assert not check_syntax('A.java', 'class A { void f() { }')
+        assert not check_syntax('A.java', 'class A { void f() ( } }')
+        assert check_syntax('a.txt', '{')
+        assert check_syntax('a.js', 'var re = /[{]/;')
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            assert check_syntax('a.py', 'x = "\\d"\nassert (x, 1)\nx is 1\n')
+
+    def test_normalise_source(self):
+        assert normalise_source('a.py', 'x = 1 # one\n\ny = 2\n') == normalise_source('a.py', 'x = 1\ny = 2')
+        assert normalise_source('a.py', 'x = 1\n') != normalise_source('a.py', 'x = 2\n')
+        assert normalise_source('A.java', 'int x=1; // one\n/* two */') == normalise_source('A.java', 'int  x = 1 ;')
+        assert normalise_source('a.c', 'x = a++ + b;') != normalise_source('a.c', 'x = a + ++b;')
+        assert normalise_source('a.c', 'x = a - -b;') != normalise_source('a.c', 'x = a--b;')
+        assert normalise_source('a.c', 'x=a<<=b;') == normalise_source('a.c', 'x = a <<= b ;')
+        assert normalise_source('a.c', '#define F(x) x\n') != normalise_source('a.c', '#define F (x) x\n')
+        assert normalise_source('a.c', '  #include <a.h>\nint x;') == normalise_source('a.c', '#include <a.h>\n\nint  x;')
+        assert normalise_source('a.c', 's = "a  b";') != normalise_source('a.c', 's = "a b";')
+        assert normalise_source('a.js', 's = "a  b";') != normalise_source('a.js', 's = "a b";')
+        assert normalise_source('a.txt', 'a  b\n') == 'a  b\n'
+
+    def test_summarise_timings(self):
+        timings = [{'apply': i, 'test': 2 * i} for i in range(1, 21)] + [{'apply': 0}]
+        summary = summarise_timings(timings)
+        assert summary['apply'] == {'mean': 10, 'p50': 10, 'p95': 19, 'max': 20}
+        assert summary['test'] == {'mean': 21, 'p50': 20, 'p95': 38, 'max': 40}
+        assert summarise_timings([]) == {}
+
 @pytest.fixture(scope="session", autouse=True)
 def cleanup(request):
     def remove_test_dir():
         shutil.rmtree('.pyggi')
-    request.addfinalizer(remove_test_dir)
\ No newline at end of file
+    request.addfinalizer(remove_test_dir)
+